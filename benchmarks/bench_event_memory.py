@@ -0,0 +1,77 @@
+"""
+Measures the memory held per CIPEventData with its categorized log windows attached.
+
+Pass --src to measure another tree's src directory, for example an older commit checked out with
+git worktree, so the two representations can be compared:
+
+    git worktree add /tmp/before <commit>
+    python benchmarks/bench_event_memory.py --src /tmp/before/src
+    python benchmarks/bench_event_memory.py
+"""
+
+import argparse
+import gc
+import json
+import os
+import sys
+import tracemalloc
+
+CATEGORIES = ('event', 'radio', 'wgb')
+
+
+def load_lines(count, seed=0):
+    sys.path.append(os.path.abspath(os.path.dirname(__file__)))
+    import synthetic_iw_logs
+    lines = []
+    for line in synthetic_iw_logs.iter_log_lines(count * 200, seed=seed):
+        lines.append(line.decode('utf-8').rstrip('\n'))
+        if len(lines) == count:
+            break
+    return lines
+
+
+def measure(events, lines_per_category, ips):
+    from CIPEventData import CIPEventData
+    # Parsed lines are fresh strings per event, as they are when each event's tarball is extracted
+    source = load_lines(lines_per_category * len(CATEGORIES))
+    gc.collect()
+    tracemalloc.start()
+    before, _ = tracemalloc.get_traced_memory()
+    held = []
+    for index in range(events):
+        # Build the IP and datetime strings per event, as parsing each incoming message does
+        ip = '.'.join(('10', '0', str(index % ips // 256), str(index % ips % 256)))
+        dts = f"2024-04-18T{index // 3600 % 24:02d}:{index // 60 % 60:02d}:{index % 60:02d}"
+        event = CIPEventData(ip, dts, 'fault', 'E1')
+        for position, category in enumerate(CATEGORIES):
+            chunk = source[position * lines_per_category:(position + 1) * lines_per_category]
+            event.add_categorized_logs(category, [(line + ' ')[:-1] for line in chunk])
+        held.append(event)
+    gc.collect()
+    after, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {
+        'events': events,
+        'lines_per_category': lines_per_category,
+        'bytes_per_event': round((after - before) / events),
+        'peak_bytes_per_event': round((peak - before) / events),
+        'line_bytes_per_event': sum(map(len, source)),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--src', default=os.path.join(os.path.dirname(__file__), '..', 'src'),
+                        help='The src directory whose CIPEventData is measured')
+    parser.add_argument('--events', type=int, default=2000)
+    parser.add_argument('--lines', type=int, default=50, help='Log lines per category per event')
+    parser.add_argument('--ips', type=int, default=64, help='Distinct source IPs')
+    args = parser.parse_args()
+    sys.path.insert(0, os.path.abspath(args.src))
+    result = measure(args.events, args.lines, args.ips)
+    result['src'] = os.path.abspath(args.src)
+    print(json.dumps(result, indent=2))
+
+
+if __name__ == '__main__':
+    main()
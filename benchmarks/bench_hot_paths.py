@@ -0,0 +1,224 @@
+"""
+Benchmarks the IwEventParser, TarFileExtractor and TarFileLoader hot paths on synthetic IW9165 logs.
+
+Every case runs in a freshly spawned process so its peak RSS is not polluted by earlier cases, and
+the results are written as JSON so runs can be compared:
+
+    python benchmarks/bench_hot_paths.py --sizes 1MB,16MB,256MB --output before.json
+    python benchmarks/bench_hot_paths.py --sizes 1MB,16MB,256MB --output after.json --baseline before.json
+
+Synthetic inputs are cached in --workdir (benchmarks/.data by default) and reused between runs.
+"""
+
+import argparse
+import json
+import logging
+import multiprocessing
+import os
+import platform
+import resource
+import statistics
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src')))
+sys.path.append(os.path.abspath(os.path.dirname(__file__)))
+
+import synthetic_iw_logs
+
+DEFAULT_SIZES = '1MB,16MB,128MB'
+CASES = ('parse_linear', 'parse_seek', 'parse_index_cold', 'parse_index_warm',
+         'extract', 'extract_stream', 'loader')
+WINDOW_SECONDS = 2
+WINDOW_POSITION = 0.9  # Fault windows usually sit near the end of the uploaded log
+
+
+def peak_rss_kb():
+    usage = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is kilobytes on Linux and bytes on macOS
+    return usage // 1024 if sys.platform == 'darwin' else usage
+
+
+def quiet_logger():
+    logger = logging.getLogger('benchmark')
+    logger.setLevel(logging.CRITICAL)
+    return logger
+
+
+def prepare_inputs(workdir, size_bytes):
+    """
+    Generates (or reuses) the synthetic log and tarball for a size and returns their metadata.
+    """
+    os.makedirs(workdir, exist_ok=True)
+    meta_path = os.path.join(workdir, f"iw_{size_bytes}.json")
+    if os.path.exists(meta_path):
+        with open(meta_path) as file:
+            return json.load(file)
+    log_path = os.path.join(workdir, f"iw_{size_bytes}.log")
+    tar_path = os.path.join(workdir, f"iw_{size_bytes}.tar.gz")
+    lines, first, last = synthetic_iw_logs.write_log(log_path, size_bytes)
+    synthetic_iw_logs.write_tarball(tar_path, size_bytes)
+    meta = {
+        'log_path': log_path,
+        'log_bytes': os.path.getsize(log_path),
+        'log_lines': lines,
+        'tar_path': tar_path,
+        'tar_bytes': os.path.getsize(tar_path),
+        'base_timestamp': synthetic_iw_logs.window_timestamp(first, last, WINDOW_POSITION),
+    }
+    with open(meta_path, 'w') as file:
+        json.dump(meta, file)
+    return meta
+
+
+def run_case(case, meta):
+    """
+    Runs one case in the current (child) process and returns its measurements.
+    """
+    from fs.memoryfs import MemoryFS
+    from IwEventParser import IwEventParser
+    from LogIndexCache import LogIndexCache
+    from TarFileExtractor import TarFileExtractor
+    from TarFileLoader import TarFileLoader
+
+    logger = quiet_logger()
+    fs = MemoryFS()
+    processed_bytes = meta['log_bytes']
+    processed_lines = meta['log_lines']
+    result = {}
+
+    if case.startswith('parse_'):
+        with open(meta['log_path'], 'rb') as file:
+            fs.upload('/event.log', file)
+        kwargs = {}
+        if case == 'parse_seek':
+            kwargs['seek_mode'] = True
+        elif case.startswith('parse_index'):
+            kwargs['index_cache'] = LogIndexCache()
+        parser = IwEventParser(fs, logger, **kwargs)
+        parser.set_filename('/event.log')
+        if case == 'parse_index_warm':
+            parser.filter_events_by_time_window(meta['base_timestamp'], WINDOW_SECONDS)
+        rss_before = peak_rss_kb()
+        started = time.perf_counter()
+        events = parser.filter_events_by_time_window(meta['base_timestamp'], WINDOW_SECONDS)
+        seconds = time.perf_counter() - started
+        result['window_lines'] = len(events)
+
+    elif case in ('extract', 'extract_stream'):
+        with open(meta['tar_path'], 'rb') as file:
+            fs.upload('/bench.tar.gz', file)
+        extractor = TarFileExtractor(logger, fs)
+        extractor.tar_path = '/bench.tar.gz'
+        extractor.event_id = 'bench'
+        extractor.unique_dir = None
+        if case == 'extract_stream':
+            parser = IwEventParser(fs, logger)
+            extractor.stream_handler = lambda event_id, name, stream: parser.filter_stream(
+                stream, meta['base_timestamp'], WINDOW_SECONDS, name=name)
+        rss_before = peak_rss_kb()
+        started = time.perf_counter()
+        if case == 'extract_stream':
+            extractor.stream_files()
+        else:
+            extractor.extract_files()
+        seconds = time.perf_counter() - started
+
+    else:
+        directory, filename = os.path.split(meta['tar_path'])
+        loader = TarFileLoader(directory, lambda identifier: None, logger)
+        rss_before = peak_rss_kb()
+        started = time.perf_counter()
+        loader.process_file(meta['tar_path'], filename)
+        seconds = time.perf_counter() - started
+
+    result.update({
+        'seconds': seconds,
+        'bytes_per_sec': processed_bytes / seconds if seconds else None,
+        'lines_per_sec': processed_lines / seconds if seconds else None,
+        'rss_before_kb': rss_before,
+        'peak_rss_kb': peak_rss_kb(),
+    })
+    return result
+
+
+def run_isolated(case, meta):
+    context = multiprocessing.get_context('spawn')
+    with ProcessPoolExecutor(max_workers=1, mp_context=context) as executor:
+        return executor.submit(run_case, case, meta).result()
+
+
+def summarize(case, size_label, meta, runs):
+    seconds = statistics.median(run['seconds'] for run in runs)
+    return {
+        'case': case,
+        'size': size_label,
+        'log_bytes': meta['log_bytes'],
+        'log_lines': meta['log_lines'],
+        'tar_bytes': meta['tar_bytes'],
+        'repeat': len(runs),
+        'seconds': seconds,
+        'seconds_min': min(run['seconds'] for run in runs),
+        'bytes_per_sec': meta['log_bytes'] / seconds if seconds else None,
+        'lines_per_sec': meta['log_lines'] / seconds if seconds else None,
+        'peak_rss_kb': max(run['peak_rss_kb'] for run in runs),
+        'rss_before_kb': max(run['rss_before_kb'] for run in runs),
+        'window_lines': runs[0].get('window_lines'),
+    }
+
+
+def compare(results, baseline_path):
+    with open(baseline_path) as file:
+        baseline = {(entry['case'], entry['size']): entry for entry in json.load(file)['results']}
+    for entry in results:
+        previous = baseline.get((entry['case'], entry['size']))
+        if previous:
+            speedup = previous['seconds'] / entry['seconds'] if entry['seconds'] else float('inf')
+            rss_delta = entry['peak_rss_kb'] - previous['peak_rss_kb']
+            print(f"{entry['case']:>18} {entry['size']:>6}: {speedup:6.2f}x time, {rss_delta:+d} KB peak RSS")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sizes', default=DEFAULT_SIZES, help='Comma separated log sizes, 1MB up to 1GB')
+    parser.add_argument('--cases', default=','.join(CASES), help='Comma separated subset of: ' + ', '.join(CASES))
+    parser.add_argument('--repeat', type=int, default=3, help='Runs per case; the median time is reported')
+    parser.add_argument('--workdir', default=os.path.join(os.path.dirname(__file__), '.data'))
+    parser.add_argument('--output', help='Write the JSON results to this file instead of stdout')
+    parser.add_argument('--baseline', help='Earlier JSON results to compare against')
+    args = parser.parse_args()
+
+    results = []
+    for size_label in args.sizes.split(','):
+        meta = prepare_inputs(args.workdir, synthetic_iw_logs.parse_size(size_label))
+        for case in args.cases.split(','):
+            runs = [run_isolated(case, meta) for _ in range(args.repeat)]
+            entry = summarize(case, size_label, meta, runs)
+            results.append(entry)
+            print(f"{case:>18} {size_label:>6}: {entry['seconds'] * 1000:10.2f} ms "
+                  f"{entry['bytes_per_sec'] / (1 << 20):10.1f} MB/s {entry['peak_rss_kb']:>10} KB peak", file=sys.stderr)
+
+    report = {
+        'meta': {
+            'created': datetime.now().isoformat(timespec='seconds'),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'cpu_count': os.cpu_count(),
+            'window_seconds': WINDOW_SECONDS,
+            'window_position': WINDOW_POSITION,
+        },
+        'results': results,
+    }
+    if args.output:
+        with open(args.output, 'w') as file:
+            json.dump(report, file, indent=2)
+    else:
+        json.dump(report, sys.stdout, indent=2)
+    if args.baseline:
+        compare(results, args.baseline)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,100 @@
+"""
+Deterministic generator for synthetic IW9165 event logs and 'copy event-logging upload' tarballs.
+"""
+
+import io
+import os
+import random
+import tarfile
+from datetime import datetime, timedelta
+
+START_TIME = datetime(2024, 4, 18, 6, 0, 0)
+TIMESTAMP_FORMAT = "%m/%d/%Y %H:%M:%S.%f"
+
+MESSAGES = (
+    "DOT11_UPLINK_EV: parent_rssi: -{rssi}, configured low rssi: -70 serving {serving} scanning {scanning}",
+    "Aux roam switch radio role: from SCANNING to SERVING on chan {serving}",
+    "Associated To AP {ap} on radio 1 chan {serving} rssi -{rssi}",
+    "IP: tableid=0, s=10.{a}.{b}.1 (local), d=10.{a}.{b}.{c} (Vlan{vlan}), routed via FIB",
+    "MPLS-WIRELESS: link metric update peer {ap} metric {metric}",
+    "DOT11_DRV: tx queue {queue} depth {depth} retries {retries}",
+)
+
+SIZE_SUFFIXES = {'KB': 1 << 10, 'MB': 1 << 20, 'GB': 1 << 30}
+
+
+def parse_size(text):
+    """Parses sizes such as '1MB', '256MB' or '1GB' into a byte count."""
+    text = text.strip().upper()
+    for suffix, multiplier in SIZE_SUFFIXES.items():
+        if text.endswith(suffix):
+            return int(float(text[:-len(suffix)]) * multiplier)
+    return int(text)
+
+
+def iter_log_lines(target_bytes, seed=0, step_us=1500):
+    """
+    Yields encoded log lines totalling at least target_bytes. Timestamps increase by roughly step_us
+    per line, about one line in five carries the IW9165 '*' marker and one in twenty is followed by
+    an indented continuation line, as real event logs do.
+    """
+    rng = random.Random(seed)
+    timestamp = START_TIME
+    written = 0
+    index = 0
+    while written < target_bytes:
+        timestamp += timedelta(microseconds=rng.randint(step_us // 2, step_us * 3 // 2))
+        marker = '*' if rng.random() < 0.2 else ''
+        message = rng.choice(MESSAGES).format(
+            rssi=rng.randint(40, 90), serving=rng.randint(1, 165), scanning=rng.randint(1, 165),
+            ap=f"{rng.randint(0, 255):02x}:{rng.randint(0, 255):02x}:{rng.randint(0, 255):02x}",
+            a=rng.randint(0, 255), b=rng.randint(0, 255), c=rng.randint(1, 254), vlan=rng.randint(1, 4094),
+            metric=rng.randint(1, 1000), queue=rng.randint(0, 7), depth=rng.randint(0, 512), retries=rng.randint(0, 15))
+        line = f"[{marker}{timestamp.strftime(TIMESTAMP_FORMAT)}] {index}: {message}\n".encode('utf-8')
+        if rng.random() < 0.05:
+            line += f"    trace: {rng.getrandbits(64):016x}\n".encode('utf-8')
+        written += len(line)
+        index += 1
+        yield line
+
+
+def write_log(path, target_bytes, seed=0):
+    """
+    Writes a synthetic log of at least target_bytes to path.
+
+    :return: A tuple of (line count, first timestamp, last timestamp) as strings for the timestamps.
+    """
+    first = last = None
+    count = 0
+    with open(path, 'wb') as file:
+        for line in iter_log_lines(target_bytes, seed):
+            file.write(line)
+            if line.startswith(b'['):
+                stamp = line[1:line.index(b']')].decode('ascii').lstrip('*')
+                first = first or stamp
+                last = stamp
+            count += line.count(b'\n')
+    return count, first, last
+
+
+def write_tarball(path, target_bytes, files=8, seed=0):
+    """
+    Writes a gzip tarball holding files synthetic logs that together total about target_bytes.
+    """
+    with tarfile.open(path, 'w:gz', compresslevel=6) as tar:
+        for number in range(files):
+            buffer = io.BytesIO()
+            for line in iter_log_lines(target_bytes // files, seed + number):
+                buffer.write(line)
+            info = tarfile.TarInfo(f"eventlog/iw_event_{number}.log")
+            info.size = buffer.tell()
+            buffer.seek(0)
+            tar.addfile(info, buffer)
+    return os.path.getsize(path)
+
+
+def window_timestamp(first, last, fraction):
+    """Returns the timestamp fraction of the way between first and last."""
+    start = datetime.strptime(first, TIMESTAMP_FORMAT)
+    end = datetime.strptime(last, TIMESTAMP_FORMAT)
+    return (start + (end - start) * fraction).strftime(TIMESTAMP_FORMAT)
@@ -0,0 +1,164 @@
+import asyncio
+import logging
+from pydispatch import dispatcher
+from pydispatch.errors import DispatcherKeyError
+
+class _Stage:
+    def __init__(self, signal, concurrency, queue_size):
+        self.signal = signal
+        self.concurrency = concurrency
+        self.queue_size = queue_size
+        self.handlers = []  # (handler, blocking) pairs, called in registration order
+        self.queue = None
+        self.workers = []
+        self.processed = 0
+        self.failed = 0
+
+class AsyncEventBus:
+    def __init__(self, logger=None, default_concurrency=1, queue_size=0):
+        """
+        Initializes an asyncio-native event bus that takes over pydispatch signals, so each pipeline
+        stage runs on its own worker queue instead of inline inside dispatcher.send.
+
+        Existing components keep calling dispatcher.send; the bus forwards every signal it owns into
+        that signal's queue and returns immediately.
+
+        :param logger: Logger instance for logging information.
+        :param default_concurrency: Workers per signal when add_stage does not say otherwise.
+        :param queue_size: Maximum queued sends per signal; 0 means unbounded.
+        """
+        self.logger = logger if logger else logging.getLogger('AsyncEventBus')
+        self.default_concurrency = default_concurrency
+        self.queue_size = queue_size
+        self.loop = None
+        self.stages = {}
+
+    def add_stage(self, signal, handler, concurrency=None, blocking=False, wrapper=None):
+        """
+        Routes signal to handler through the bus, removing any direct pydispatch connection the
+        handler already has for it.
+
+        :param signal: The pydispatch signal name, e.g. "FileReceived".
+        :param handler: Called as handler(sender=..., **kwargs). Coroutine functions are awaited.
+        :param concurrency: Number of workers draining this signal. Handlers that keep per-call state
+                            on their instance (TarFileExtractor, IwEventParser) must stay at 1;
+                            CiscoDeviceManager opens a connection per event and may run several.
+        :param blocking: Run a synchronous handler in a worker thread so it cannot stall the loop.
+        :param wrapper: Called by the bus instead of handler, e.g. StageScheduler.wrap(signal, handler);
+                        handler itself is still the one disconnected from pydispatch.
+        """
+        stage = self.stages.get(signal)
+        if stage is None:
+            stage = self.stages[signal] = _Stage(signal, concurrency or self.default_concurrency, self.queue_size)
+            dispatcher.connect(self._forward, signal=signal, sender=dispatcher.Any)
+        elif concurrency:
+            stage.concurrency = max(stage.concurrency, concurrency)
+        try:
+            dispatcher.disconnect(handler, signal=signal, sender=dispatcher.Any)
+        except DispatcherKeyError:
+            pass  # The handler was not connected directly
+        stage.handlers.append((wrapper, False) if wrapper else (handler, blocking))
+        if self.loop is not None:
+            self._start_stage(stage)
+
+    async def start(self):
+        """Starts the worker tasks for every registered stage on the running loop."""
+        self.loop = asyncio.get_running_loop()
+        for stage in self.stages.values():
+            self._start_stage(stage)
+        self.logger.info(f"Event bus started for signals: {', '.join(self.stages)}")
+
+    def _start_stage(self, stage):
+        if stage.queue is None:
+            stage.queue = asyncio.Queue(maxsize=stage.queue_size)
+        while len(stage.workers) < stage.concurrency:
+            stage.workers.append(self.loop.create_task(self._worker(stage)))
+
+    def _forward(self, signal=None, sender=None, **kwargs):
+        """pydispatch receiver that hands the signal to the bus."""
+        self.send(signal, sender, **kwargs)
+
+    def send(self, signal, sender=None, **kwargs):
+        """
+        Queues a signal for its stage without waiting for the handlers. Safe to call from the loop
+        or from worker threads.
+        """
+        stage = self.stages.get(signal)
+        if stage is None:
+            self.logger.warning(f"No stage registered for signal {signal}")
+            return
+        if self.loop is None:
+            self.logger.error(f"Event bus not started, dropping signal {signal}")
+            return
+        try:
+            running = asyncio.get_running_loop()
+        except RuntimeError:
+            running = None
+        if running is self.loop:
+            self._enqueue(stage, sender, kwargs)
+        else:
+            self.loop.call_soon_threadsafe(self._enqueue, stage, sender, kwargs)
+
+    def _enqueue(self, stage, sender, kwargs):
+        try:
+            stage.queue.put_nowait((sender, kwargs))
+        except asyncio.QueueFull:
+            stage.failed += 1
+            self.logger.error(f"Queue for signal {stage.signal} is full, dropping it")
+
+    async def _worker(self, stage):
+        while True:
+            sender, kwargs = await stage.queue.get()
+            try:
+                for handler, blocking in stage.handlers:
+                    await self._invoke(handler, blocking, sender, kwargs)
+                stage.processed += 1
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                stage.failed += 1
+                self.logger.error(f"Handler for signal {stage.signal} failed: {str(e)}")
+            finally:
+                stage.queue.task_done()
+
+    async def _invoke(self, handler, blocking, sender, kwargs):
+        if asyncio.iscoroutinefunction(handler):
+            await handler(sender=sender, **kwargs)
+            return
+        if blocking:
+            result = await asyncio.to_thread(handler, sender=sender, **kwargs)
+        else:
+            result = handler(sender=sender, **kwargs)
+        if asyncio.iscoroutine(result):
+            await result
+
+    def stats(self):
+        """Returns queue depth and counters for every stage."""
+        return {signal: {'depth': stage.queue.qsize() if stage.queue else 0,
+                         'workers': len(stage.workers),
+                         'processed': stage.processed,
+                         'failed': stage.failed}
+                for signal, stage in self.stages.items()}
+
+    async def join(self):
+        """Waits until every queued signal, including ones queued by handlers, has been handled."""
+        pending = True
+        while pending:
+            for stage in self.stages.values():
+                if stage.queue:
+                    await stage.queue.join()
+            # A handler in a later-joined stage may have queued work for an earlier one
+            pending = any(stage.queue and stage.queue.qsize() for stage in self.stages.values())
+
+    async def stop(self):
+        """Cancels the workers and disconnects the bus from pydispatch."""
+        workers = [worker for stage in self.stages.values() for worker in stage.workers]
+        for worker in workers:
+            worker.cancel()
+        await asyncio.gather(*workers, return_exceptions=True)
+        for stage in self.stages.values():
+            stage.workers = []
+            try:
+                dispatcher.disconnect(self._forward, signal=stage.signal, sender=dispatcher.Any)
+            except DispatcherKeyError:
+                pass
@@ -1,5 +1,6 @@
 import os
 from pydispatch import dispatcher
+from PipelineMetrics import PipelineMetrics
 
 class AsyncSFTPHandle:
     def __init__(self, file_obj, fs, path, logger):
@@ -44,5 +45,8 @@ class AsyncSFTPHandle:
         self.file_obj.close()  # Ensure any necessary cleanup operations are performed if applicable
         if self.last_operation == 'write':
             # Only emit event if the last operation was a write
+            filename = os.path.basename(self.path)
+            event_id = filename[:-len('.tar.gz')] if filename.endswith('.tar.gz') else filename  # "event_id.tar.gz"
+            PipelineMetrics.get_instance().mark(event_id, 'sftp_close')
             self.custom_logger.info(f"{class_name}:{method_name} Dispatched FileReceived for {self.path}")
             dispatcher.send(signal="FileReceived", sender=self, path=self.path, fs=self.fs, logger=self.custom_logger)
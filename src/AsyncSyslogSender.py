@@ -0,0 +1,242 @@
+import asyncio
+import logging
+from datetime import datetime
+from pydispatch import dispatcher
+from CIPEventManager import CIPEventManager
+from PipelineMetrics import PipelineMetrics
+from SyslogSendQueue import SyslogSendQueue
+
+class AsyncSyslogSender:
+    APP = "IWPLOGPARSER"
+
+    def __init__(self, logger, ip, port, transport='udp', pool_size=2, max_batch_bytes=65536,
+                 udp_max_datagram=1472, reconnect_delay=1.0, max_queue_lines=None,
+                 overflow_policy='drop-oldest', spill_path=None):
+        """
+        Initializes an asyncio syslog sender that batches log windows into large writes.
+
+        :param logger: Logger instance for logging information.
+        :param ip: Syslog collector address.
+        :param port: Syslog collector port.
+        :param transport: 'udp' or 'tcp'. TCP uses RFC 6587 octet-counted framing.
+        :param pool_size: Number of persistent TCP connections kept to the collector.
+        :param max_batch_bytes: Largest single TCP write.
+        :param udp_max_datagram: Messages are coalesced, newline separated, into datagrams up to this size.
+        :param reconnect_delay: Seconds to wait before reconnecting a failed TCP connection.
+        :param max_queue_lines: When set, windows go through a bounded SyslogSendQueue of this many lines
+                                drained in the background, so a slow collector never backs up the pipeline.
+        :param overflow_policy: The queue's overflow policy: 'drop-oldest', 'drop-newest' or 'spill-to-disk'.
+        :param spill_path: File used by the 'spill-to-disk' policy.
+
+        The dropped counter covers TCP batches that could not be written and lines dropped by the send
+        queue. UDP is fire-and-forget: asyncio accepts a datagram even if the collector is down or the
+        network loses it, so over UDP only datagrams the transport refuses outright are counted.
+        """
+        self.logger = logger if logger else logging.getLogger('AsyncSyslogSender')
+        self.ip = ip
+        self.port = port
+        self.transport = transport.lower()
+        self.pool_size = pool_size
+        self.max_batch_bytes = max_batch_bytes
+        self.udp_max_datagram = udp_max_datagram
+        self.reconnect_delay = reconnect_delay
+        self.loop = None
+        self._udp_transport = None
+        self._connections = None  # asyncio.Queue of idle (reader, writer) pairs, None marks a slot to reconnect
+        self._tasks = set()
+        self._futures = set()  # Sends submitted from other threads, which close() also waits for
+        self.queue = None
+        if max_queue_lines:
+            self.queue = SyslogSendQueue(self.send_events, self.logger, max_lines=max_queue_lines,
+                                         overflow_policy=overflow_policy, spill_path=spill_path)
+        self.sent = 0
+        self.dropped = 0
+        self.bytes_sent = 0
+        self.reconnects = 0
+        dispatcher.connect(self.handle_log_processing_completed, signal="LogProcessingCompleted", sender=dispatcher.Any)
+
+    async def start(self):
+        """Binds the sender to the running loop and opens the UDP endpoint or TCP connection pool."""
+        self.loop = asyncio.get_running_loop()
+        if self.transport == 'tcp':
+            self._connections = asyncio.Queue()
+            for _ in range(self.pool_size):
+                self._connections.put_nowait(await self._connect())
+        else:
+            self._udp_transport, _ = await self.loop.create_datagram_endpoint(
+                asyncio.DatagramProtocol, remote_addr=(self.ip, self.port))
+        if self.queue:
+            await self.queue.start()
+        self.logger.info(f"Syslog sender started for {self.ip}:{self.port} over {self.transport}")
+
+    async def _connect(self):
+        """Opens one TCP connection, returning None if the collector is unreachable."""
+        try:
+            return await asyncio.open_connection(self.ip, self.port)
+        except OSError as e:
+            self.logger.error(f"Failed to connect to syslog server {self.ip}:{self.port}: {str(e)}")
+            return None
+
+    def handle_log_processing_completed(self, sender, **kwargs):
+        event_id = kwargs['event_id']
+        event = CIPEventManager.get_instance().get_event(event_id)
+        if not event:
+            self.logger.error(f"Event not found with ID {event_id}")
+            return
+        if not event.categorized_logs:
+            self.logger.error(f"No categorized logs found for event ID {event_id}")
+            return
+        if self.loop is None:
+            self.logger.error(f"Syslog sender not started, dropping logs for event ID {event_id}")
+            return
+        source_ip = event_id.split('_')[0]  # Assuming event_id is in the format "ip_datetime"
+        for category, logs in event.categorized_logs.items():
+            if self.queue:
+                self.queue.put(list(logs), source_ip, category, event_id)
+            else:
+                self._submit(self.send_events(list(logs), source_ip, category, event_id))
+
+    def _submit(self, coroutine):
+        """Schedules a coroutine on the sender's loop from either the loop thread or a worker thread."""
+        try:
+            running = asyncio.get_running_loop()
+        except RuntimeError:
+            running = None
+        if running is self.loop:
+            task = self.loop.create_task(coroutine)
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+        else:
+            future = asyncio.run_coroutine_threadsafe(coroutine, self.loop)
+            self._futures.add(future)
+            future.add_done_callback(self._futures.discard)
+
+    def _frames(self, events, source_ip, category):
+        """
+        Yields (payload, message count) batches ready to write. The header is formatted once per call
+        and each batch is encoded once, rather than once per line.
+        """
+        timestamp = datetime.now().strftime("%b %d %H:%M:%S")
+        header = f"<134>{timestamp} {source_ip} {self.APP} {category}: "
+        header_bytes = len(header.encode('utf-8'))
+        tcp = self.transport == 'tcp'
+        limit = self.max_batch_bytes if tcp else self.udp_max_datagram
+        parts = []
+        size = 0
+        for event in events:
+            length = header_bytes + (len(event) if event.isascii() else len(event.encode('utf-8')))
+            if tcp:
+                # RFC 6587 octet counting: MSG-LEN SP SYSLOG-MSG
+                part = f"{length} {header}{event}"
+                length += len(str(length)) + 1
+                separator = 0
+            else:
+                part = f"{header}{event}"
+                separator = 1 if parts else 0  # Newline between coalesced messages
+            if parts and size + separator + length > limit:
+                yield self._join(parts, tcp), len(parts)
+                parts = []
+                size = 0
+                separator = 0
+            parts.append(part)
+            size += separator + length
+        if parts:
+            yield self._join(parts, tcp), len(parts)
+
+    def _join(self, parts, tcp):
+        return ('' if tcp else '\n').join(parts).encode('utf-8')
+
+    async def send_events(self, events, source_ip, category, event_id=None):
+        """
+        Sends one category of log lines to the collector in as few writes as possible.
+
+        :param event_id: The event the lines belong to; marks its syslog_send stage in PipelineMetrics.
+
+        :return: The number of messages sent.
+        """
+        sent = 0
+        for payload, count in self._frames(events, source_ip, category):
+            if self.transport == 'tcp':
+                ok = await self._write_tcp(payload)
+            else:
+                ok = self._write_udp(payload)
+            if ok:
+                sent += count
+                self.sent += count
+                self.bytes_sent += len(payload)
+            else:
+                self.dropped += count
+        if sent and event_id:
+            PipelineMetrics.get_instance().mark(event_id, 'syslog_send')
+        if sent == len(events):
+            self.logger.info(f"Events successfully sent to syslog server under category '{category}'.")
+        else:
+            self.logger.error(f"Dropped {len(events) - sent} of {len(events)} events under category '{category}'.")
+        return sent
+
+    def _write_udp(self, payload):
+        try:
+            self._udp_transport.sendto(payload)
+            return True
+        except Exception as e:
+            self.logger.error(f"Failed to send events: {str(e)}")
+            return False
+
+    async def _write_tcp(self, payload):
+        """
+        Writes a batch on a pooled connection, reconnecting once if the connection has failed.
+        """
+        connection = await self._connections.get()
+        try:
+            for attempt in range(2):
+                if connection is None:
+                    if attempt:
+                        await asyncio.sleep(self.reconnect_delay)
+                    connection = await self._connect()
+                    if connection is None:
+                        continue
+                    self.reconnects += 1
+                reader, writer = connection
+                if reader.at_eof() or writer.is_closing():
+                    # The collector closed the connection; a write would be accepted locally and lost
+                    writer.close()
+                    connection = None
+                    continue
+                try:
+                    writer.write(payload)
+                    await writer.drain()
+                    return True
+                except (OSError, ConnectionError) as e:
+                    self.logger.error(f"Failed to send events: {str(e)}")
+                    writer.close()
+                    connection = None
+            return False
+        finally:
+            self._connections.put_nowait(connection)
+
+    def stats(self):
+        """
+        Returns the sent/dropped counters, including lines dropped by the send queue and its depth.
+        Over UDP, dropped does not include datagrams lost after they were handed to the transport.
+        """
+        stats = {'sent': self.sent, 'dropped': self.dropped, 'bytes_sent': self.bytes_sent, 'reconnects': self.reconnects}
+        if self.queue:
+            stats['dropped'] += self.queue.dropped
+            stats['queue'] = self.queue.stats()
+        return stats
+
+    async def close(self):
+        """Waits for in-flight sends and closes the UDP endpoint or the TCP pool."""
+        if self.queue:
+            await self.queue.close()
+        if self._tasks or self._futures:
+            pending = list(self._tasks) + [asyncio.wrap_future(future) for future in list(self._futures)]
+            await asyncio.gather(*pending, return_exceptions=True)
+        if self._udp_transport:
+            self._udp_transport.close()
+        if self._connections:
+            while not self._connections.empty():
+                connection = self._connections.get_nowait()
+                if connection:
+                    connection[1].close()
+        self.logger.info("Syslog sender closed.")
@@ -1,10 +1,25 @@
+import hmac
 import re
 from datetime import datetime
 from ipaddress import ip_address
 
+_OCTET = r'(?:[1-9]?[0-9]|1[0-9]{2}|2[0-4][0-9]|25[0-5])'  # No leading zeros, as ip_address requires
+_DAYS_IN_MONTH = (0, 31, 29, 31, 30, 31, 30, 31, 31, 30, 31, 30, 31)
+# Every valid "MMDD" to whether it is February 29th, so the calendar check is one dictionary lookup
+_MONTH_DAYS = {f'{month:02d}{day:02d}': month == 2 and day == 29
+               for month in range(1, 13) for day in range(1, _DAYS_IN_MONTH[month] + 1)}
+
 class CIPDataValidator:
     def __init__(self, allowed_chars=''):
         self.allowed_chars = allowed_chars
+        # One pattern for the common record shape: dotted-quad IPv4, MMDDYYYY, ASCII error and secret.
+        # Anything else (IPv6, 7-digit dates, non-ASCII text) goes through the field-by-field checks.
+        self._fast = None
+        if ',' not in allowed_chars:
+            secret_chars = 'A-Za-z0-9' + ''.join(re.escape(c) for c in allowed_chars if c.isascii())
+            self._fast = re.compile(
+                rf'{_OCTET}(?:\.{_OCTET}){{3}},([0-9]{{8}}),'
+                rf'[A-Za-z0-9]{{1,48}},[{secret_chars}]{{0,48}}').fullmatch
 
     def validate_ip(self, ip):
         try:
@@ -29,15 +44,81 @@ class CIPDataValidator:
     def validate_shared_secret(self, secret):
         return len(secret) <= 48 and all(c.isalnum() or c in self.allowed_chars for c in secret)
 
+    def check_secret(self, provided, secret):
+        """Compares a provided secret with the configured one in constant time."""
+        return hmac.compare_digest(provided.encode('utf-8'), secret.encode('utf-8'))
+
     def validate_message(self, message, secret):
+        """
+        Checks an "ip,date,error,secret" message, taking the single-regex path when the message has
+        the common shape and falling back to validate_message_fields otherwise, with identical results.
+
+        :param secret: The configured shared secret, checked before anything else is parsed. None skips
+                       the comparison, e.g. when a CIPSourceAuthenticator has already authenticated the message.
+        """
+        if secret is not None and not self.check_secret(message.rpartition(',')[2], secret):
+            return False
+        if self._fast is not None and message.isascii():
+            match = self._fast(message)
+            if match is not None:
+                date_str = match[1]
+                leap_day = _MONTH_DAYS.get(date_str[:4])
+                year = date_str[4:]
+                if leap_day is None or year == '0000':
+                    return False
+                if leap_day:
+                    year = int(year)
+                    return year % 4 == 0 and (year % 100 != 0 or year % 400 == 0)
+                return True
+        return self.validate_message_fields(message, secret)
+
+    def validate_many(self, messages, secret):
+        """
+        Validates a batch of messages.
+
+        :return: A list of booleans, True where the message at that position is valid.
+        """
+        validate = self.validate_message
+        return [validate(message, secret) for message in messages]
+
+    def validate_message_fields(self, message, secret):
+        """Field-by-field validation of an "ip,date,error,secret" message."""
         parts = message.split(',')
         if len(parts) != 4:
             return False
-        ip, date_str, error, secret = parts
+        ip, date_str, error, shared_secret = parts
+        if secret is not None and not self.check_secret(shared_secret, secret):
+            return False
         return (self.validate_ip(ip) and
                 self.validate_date(date_str) and
                 self.validate_error_string(error) and
-                self.validate_shared_secret(secret))
+                self.validate_shared_secret(shared_secret))
+
+    def parse_message(self, message):
+        """
+        Splits a validated "ip,date,error,secret" message into the dictionary CIPEventManager
+        expects, with the MMDDYYYY date converted to an ISO date.
+        """
+        ip, date_str, error, secret = message.split(',')
+        standardized_date = f'{date_str[:2].zfill(2)}{date_str[2:4].zfill(2)}{date_str[4:]}'
+        return {'ip': ip,
+                'datetime': datetime.strptime(standardized_date, '%m%d%Y').date().isoformat(),
+                'error_code': error,
+                'shared_secret': secret}
+
+    def validate_record(self, record, secret):
+        """
+        Validates a record decoded from a binary frame, whose datetime is already an integer.
+
+        :param record: A dictionary with 'ip', 'datetime', 'error_code' and 'shared_secret'.
+        :param secret: The configured shared secret, checked first; None skips the comparison.
+        """
+        if secret is not None and not self.check_secret(record['shared_secret'], secret):
+            return False
+        return (self.validate_ip(record['ip']) and
+                isinstance(record['datetime'], int) and
+                self.validate_error_string(record['error_code']) and
+                self.validate_shared_secret(record['shared_secret']))
 
 # Usage within your network classes
 # class UDPProtocol(asyncio.DatagramProtocol):
@@ -1,14 +1,39 @@
-from datetime import datetime
+import sys
+from datetime import datetime, timedelta, timezone
+from LogWindow import LogWindow
+
+_EPOCH = datetime(1970, 1, 1)
 
 class CIPEventData:
+    # Fixed slots instead of a per-instance __dict__; the store can hold many thousands of events
+    __slots__ = ('ip', 'epoch_us', 'txt', 'erc', 'id', 'log_messages', 'categorized_logs')
+
     def __init__(self, ip, dts, txt, erc):
-        self.ip = ip
-        self.datetime = datetime.fromisoformat(dts)
+        # Every event from a device shares one IP string
+        self.ip = sys.intern(ip) if isinstance(ip, str) else ip
+        if isinstance(dts, int):
+            # Binary TCP frames carry the datetime as epoch seconds
+            self.epoch_us = dts * 1000000
+        else:
+            self.epoch_us = self.to_epoch_us(datetime.fromisoformat(dts))
         self.txt = txt
         self.erc = erc
         self.id = f"{ip}_{dts}"
         self.log_messages = []  # List to store general log messages
-        self.categorized_logs = {}  # Dictionary to store categorized log messages
+        self.categorized_logs = {}  # Category to the LogWindow of its log messages
+
+    @staticmethod
+    def to_epoch_us(value):
+        """Converts a datetime to integer microseconds since the epoch; naive datetimes are taken as UTC."""
+        if value.tzinfo is not None:
+            value = value.astimezone(timezone.utc).replace(tzinfo=None)
+        delta = value - _EPOCH
+        return (delta.days * 86400 + delta.seconds) * 1000000 + delta.microseconds
+
+    @property
+    def datetime(self):
+        """The event's datetime, as a naive UTC datetime."""
+        return _EPOCH + timedelta(microseconds=self.epoch_us)
 
     def add_log_message(self, message):
         """Adds a log message to the general log list."""
@@ -21,15 +46,24 @@ class CIPEventData:
         :param category: The category under which the log should be stored (e.g., 'basic', 'details').
         :param message: The log message to store.
         """
+        self.add_categorized_logs(category, (message,))
+
+    def add_categorized_logs(self, category, messages):
+        """
+        Adds several log messages under a specific category.
+
+        :param category: The category under which the logs should be stored.
+        :param messages: The log messages to store.
+        """
         if category not in self.categorized_logs:
-            self.categorized_logs[category] = []
-        self.categorized_logs[category].append(message)
+            self.categorized_logs[category] = LogWindow()
+        self.categorized_logs[category].extend(messages)
 
     def get_categorized_logs(self, category):
         """
         Returns all log messages for a specific category.
 
         :param category: The category of logs to retrieve.
-        :return: A list of log messages for the given category.
+        :return: A LogWindow (a sequence of str) of the log messages for the given category.
         """
-        return self.categorized_logs.get(category, [])
+        return self.categorized_logs.get(category, LogWindow())
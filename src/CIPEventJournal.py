@@ -0,0 +1,260 @@
+import json
+import logging
+import os
+import re
+import threading
+from collections import deque
+
+SNAPSHOT_NAME = 'snapshot.jsonl'
+_SEGMENT = re.compile(r'^journal\.(\d+)\.jsonl$')
+
+class CIPEventJournal:
+    def __init__(self, directory, logger=None, fsync_interval=0.05, fsync_batch=256, compact_records=10000):
+        """
+        Initializes an append-only journal of event creations and log attachments, so event state
+        survives a restart.
+
+        Records are queued by the caller and written as JSON lines to the current segment by a background
+        thread, which fsyncs them in batches: at most every fsync_interval seconds, or as soon as
+        fsync_batch records are queued. The same thread runs compactions, which write the live events
+        to a snapshot and start a new segment, so recovery reads the snapshot plus the records appended
+        since, in time proportional to the live events rather than the whole history.
+
+        :param directory: Directory holding the snapshot and journal segments; created if missing.
+        :param logger: Logger instance for logging information.
+        :param fsync_interval: Longest time in seconds a record waits to be fsynced.
+        :param fsync_batch: Queued records that wake the journal thread without waiting for the interval.
+        :param compact_records: Records appended since the last snapshot before a compaction is due;
+                                it is also due once they exceed twice the live events at the last snapshot.
+        """
+        self.directory = directory
+        self.logger = logger if logger else logging.getLogger('CIPEventJournal')
+        self.fsync_interval = fsync_interval
+        self.fsync_batch = fsync_batch
+        self.compact_records = compact_records
+        self._lock = threading.Lock()  # Guards the segment file
+        self._stop = threading.Event()
+        self._wakeup = threading.Event()
+        self._queue = deque()  # Records waiting for the journal thread
+        self._compactor = None
+        self._file = None
+        self._segment = 0
+        self._pending = 0  # Records written but not yet fsynced
+        self._records = 0  # Records appended since the last snapshot
+        self._snapshot_events = 0
+        self._flusher = None
+        self.fsyncs = 0
+        self.compactions = 0
+        os.makedirs(directory, exist_ok=True)
+
+    def _segment_path(self, number):
+        return os.path.join(self.directory, f"journal.{number}.jsonl")
+
+    def _segments(self):
+        """Returns the numbers of the journal segments on disk, in order."""
+        numbers = []
+        for name in os.listdir(self.directory):
+            match = _SEGMENT.match(name)
+            if match:
+                numbers.append(int(match.group(1)))
+        return sorted(numbers)
+
+    def recover(self):
+        """
+        Yields the journaled records, oldest first: the snapshot's events, then every record appended
+        after it. Each record is a dict with 'op' set to 'create' (ip, dts, txt, erc and optionally logs)
+        or 'logs' (id and logs, a dictionary of category to log lines).
+
+        A torn final line, left by a crash mid-write, is skipped.
+        """
+        covered = -1
+        snapshot_path = os.path.join(self.directory, SNAPSHOT_NAME)
+        if os.path.exists(snapshot_path):
+            with open(snapshot_path, 'r', encoding='utf-8') as snapshot:
+                header = snapshot.readline()
+                try:
+                    covered = json.loads(header)['segment']
+                except (ValueError, KeyError) as e:
+                    self.logger.error(f"Ignoring unreadable event snapshot {snapshot_path}: {str(e)}")
+                else:
+                    for record in self._read_lines(snapshot, snapshot_path):
+                        self._snapshot_events += 1
+                        yield record
+        for number in self._segments():
+            if number <= covered:
+                continue
+            path = self._segment_path(number)
+            with open(path, 'r', encoding='utf-8') as segment:
+                for record in self._read_lines(segment, path):
+                    self._records += 1
+                    yield record
+
+    def _read_lines(self, file, path):
+        for line in file:
+            try:
+                yield json.loads(line)
+            except ValueError:
+                if line.endswith('\n'):
+                    self.logger.error(f"Skipping corrupt journal record in {path}")
+                else:
+                    self.logger.warning(f"Skipping torn final journal record in {path}")
+
+    def open(self, compactor=None):
+        """
+        Starts a new segment for appends and the background journal thread. Call after recover().
+
+        :param compactor: Called with no arguments on the journal thread when a compaction is due;
+                          it collects the live events, calls rotate() and then write_snapshot().
+        """
+        with self._lock:
+            segments = self._segments()
+            self._segment = segments[-1] + 1 if segments else 1
+            self._file = open(self._segment_path(self._segment), 'a', encoding='utf-8')
+        self._compactor = compactor
+        self._stop.clear()
+        self._flusher = threading.Thread(target=self._flush_loop, name='CIPEventJournal', daemon=True)
+        self._flusher.start()
+
+    def record_event(self, event, dts):
+        """Journals the creation of an event from the dts it was created with."""
+        self._append({'op': 'create', 'ip': event.ip, 'dts': dts, 'txt': event.txt, 'erc': event.erc})
+
+    def record_logs(self, event_id, categorized_logs):
+        """Journals log lines attached to an event."""
+        self._append({'op': 'logs', 'id': event_id,
+                      'logs': {category: list(lines) for category, lines in categorized_logs.items()}})
+
+    def _append(self, record):
+        # Only queued here, without taking the journal lock, so callers holding their own locks never
+        # wait on serialization or disk I/O; the journal thread writes records in the order queued
+        if self._file is None:
+            return
+        self._queue.append(record)
+        if len(self._queue) >= self.fsync_batch:
+            self._wakeup.set()
+
+    def _flush_loop(self):
+        while not self._stop.is_set():
+            self._wakeup.wait(self.fsync_interval)
+            self._wakeup.clear()
+            self.sync()
+            if self._compactor is not None and self.needs_compaction():
+                try:
+                    self._compactor()
+                except Exception as e:
+                    self.logger.error(f"Event journal compaction failed: {str(e)}")
+
+    def sync(self):
+        """Writes, flushes and fsyncs any queued records."""
+        with self._lock:
+            self._write_queued_locked()
+            self._sync_locked()
+
+    def _write_queued_locked(self):
+        queue = self._queue
+        # Only what is queued now, so a steady stream of producers cannot hold off the fsync
+        for _ in range(len(queue)):
+            record = queue.popleft()
+            if self._file is None:
+                continue
+            try:
+                self._file.write(json.dumps(record, ensure_ascii=False) + '\n')
+            except Exception as e:
+                self.logger.error(f"Failed to journal event record: {str(e)}")
+                continue
+            self._pending += 1
+            self._records += 1
+
+    def _sync_locked(self):
+        if not self._pending or self._file is None:
+            return
+        try:
+            self._file.flush()
+            os.fsync(self._file.fileno())
+            self.fsyncs += 1
+        except Exception as e:
+            self.logger.error(f"Failed to fsync event journal: {str(e)}")
+        self._pending = 0
+
+    def needs_compaction(self):
+        return self._records + len(self._queue) > max(self.compact_records, 2 * self._snapshot_events)
+
+    def rotate(self):
+        """
+        Writes the queued records, closes the current segment and starts the next one. Call it while
+        no new records can be queued (the event manager holds all its shard locks), after sync() so
+        little is left to write. Returns the number of the closed segment, which the snapshot of the
+        events live at this moment then covers.
+        """
+        with self._lock:
+            self._write_queued_locked()
+            closed = self._segment
+            if self._file is not None:
+                self._file.close()  # Flushed here; write_snapshot fsyncs it outside the caller's locks
+            self._segment += 1
+            self._file = open(self._segment_path(self._segment), 'a', encoding='utf-8')
+            self._records = 0
+            return closed
+
+    def write_snapshot(self, covered, events):
+        """
+        Atomically replaces the snapshot with events and deletes the segments it covers.
+
+        :param covered: Segment number returned by rotate() when the events were collected.
+        :param events: Create records, as yielded by recover(), for every live event.
+        """
+        path = os.path.join(self.directory, SNAPSHOT_NAME)
+        temporary = path + '.tmp'
+        count = 0
+        try:
+            # The closed segment must be durable in case the snapshot never replaces it
+            with open(self._segment_path(covered), 'rb') as segment:
+                os.fsync(segment.fileno())
+            with open(temporary, 'w', encoding='utf-8') as snapshot:
+                snapshot.write(json.dumps({'segment': covered}) + '\n')
+                for record in events:
+                    snapshot.write(json.dumps(record, ensure_ascii=False) + '\n')
+                    count += 1
+                snapshot.flush()
+                os.fsync(snapshot.fileno())
+            os.replace(temporary, path)
+            self._fsync_directory()
+        except Exception as e:
+            self.logger.error(f"Failed to write event snapshot: {str(e)}")
+            return False
+        for number in self._segments():
+            if number <= covered:
+                os.remove(self._segment_path(number))
+        self._snapshot_events = count
+        self.compactions += 1
+        self.logger.info(f"Compacted event journal into a snapshot of {count} events")
+        return True
+
+    def _fsync_directory(self):
+        # Makes the rename itself durable; not every platform can open a directory
+        try:
+            descriptor = os.open(self.directory, os.O_RDONLY)
+        except OSError:
+            return
+        try:
+            os.fsync(descriptor)
+        finally:
+            os.close(descriptor)
+
+    def close(self):
+        """Stops the fsync thread and syncs and closes the current segment."""
+        self._stop.set()
+        self._wakeup.set()
+        if self._flusher:
+            self._flusher.join()
+            self._flusher = None
+        with self._lock:
+            self._write_queued_locked()
+            self._sync_locked()
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+    def stats(self):
+        return {'segment': self._segment, 'records_since_snapshot': self._records,
+                'snapshot_events': self._snapshot_events, 'fsyncs': self.fsyncs, 'compactions': self.compactions}
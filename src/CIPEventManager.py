@@ -1,20 +1,58 @@
 from CIPEventData import CIPEventData
+from CIPEventStore import CIPEventStore
 import logging
+import time
+from collections import OrderedDict
 from threading import Lock
 from pydispatch import dispatcher
+from PipelineMetrics import PipelineMetrics
 
 class CIPEventManager:
+    COALESCED_CATEGORY = 'coalesced'  # Log category that records the faults attached to an event
     _instance = None
     _lock = Lock()
 
-    def __new__(cls, logger=None):
+    def __new__(cls, logger=None, ttl_seconds=None, max_bytes=None, shards=16, journal=None, coalesce_window=0.0,
+                coalesce_max_age=300.0):
+        """
+        :param logger: Logger instance for logging information.
+        :param ttl_seconds: Seconds an event is kept after it is created; None keeps events until max_bytes evicts them.
+        :param max_bytes: Estimated bytes of events and their attached logs to keep, split evenly across
+                          the shards; None means no limit.
+        :param shards: Number of independently locked stores; events are placed by a hash of their IP,
+                       so producers working on different devices rarely contend for the same lock.
+        :param journal: Optional CIPEventJournal; events it recovers are restored before it is opened
+                        for appends, and every later event creation and log attachment is journaled.
+        :param coalesce_window: Seconds within which a fault with the same IP and error code as the
+                                previous one attaches to that fault's event instead of creating a new
+                                event and log retrieval. Each attached fault restarts the window; 0 disables it.
+                                Attached faults are recorded under the COALESCED_CATEGORY log category, so
+                                they are sent, classified and journaled with the event's other logs.
+        :param coalesce_max_age: Seconds after an event is created that faults stop attaching to it, even
+                                 within the window. Faults also stop attaching once the event's logs have
+                                 been processed (LogProcessingCompleted). None or 0 means no age limit.
+        """
         with cls._lock:
             if cls._instance is None:
                 cls._logger = logger if logger else logging.getLogger('CIPEventManager')
                 cls._instance = super(CIPEventManager, cls).__new__(cls)
-                cls._instance.events = {}
-                cls._instance.id_map = {}
+                shards = max(1, int(shards or 1))
+                shard_bytes = max(1, max_bytes // shards) if max_bytes else None
+                cls._instance._shards = [(Lock(), CIPEventStore(ttl_seconds, shard_bytes, logger=cls._logger))
+                                         for _ in range(shards)]
+                # Per shard, (ip, error code) to [event ID, last seen, faults attached, created], least recently seen first
+                cls._instance._inflight = [OrderedDict() for _ in range(shards)]
+                cls._instance._coalesced_counts = [0] * shards
+                cls._instance.coalesce_window = coalesce_window or 0.0
+                cls._instance.coalesce_max_age = coalesce_max_age
+                cls._instance.clock = time.monotonic
+                cls._instance.journal = None
+                cls._instance._compact_lock = Lock()
+                if journal is not None:
+                    cls._instance._restore(journal)
                 dispatcher.connect(cls._instance.handle_network_data, signal="NetworkDataReceived", sender=dispatcher.Any)
+                dispatcher.connect(cls._instance.handle_network_batch, signal="NetworkDataBatchReceived", sender=dispatcher.Any)
+                dispatcher.connect(cls._instance.handle_log_processing_completed, signal="LogProcessingCompleted", sender=dispatcher.Any)
             return cls._instance
 
     @classmethod
@@ -23,14 +61,126 @@ class CIPEventManager:
             cls._instance = cls()
         return cls._instance
 
-    def get_event(self, event_id):
+    def _restore(self, journal):
+        """Replays the journal into the shards without signalling, then opens it for appends."""
+        restored = 0
         try:
-            return self.id_map[event_id]
-        except KeyError:
-            print("Event not found with ID:", event_id)
+            for record in journal.recover():
+                if record.get('op') == 'create':
+                    event = CIPEventData(record['ip'], record['dts'], record['txt'], record['erc'])
+                    _, store = self._shard(event.ip)
+                    if store.add(event):
+                        restored += 1
+                    if record.get('logs'):
+                        store.add_logs(event.id, record['logs'])
+                elif record.get('op') == 'logs':
+                    _, store = self._shard_for_event(record['id'])
+                    store.add_logs(record['id'], record['logs'])
+        except Exception as e:
+            self._logger.error(f"Event journal recovery stopped early: {str(e)}")
+        # Compactions, including one due straight after a long replay, run on the journal's own thread
+        journal.open(compactor=self.compact_journal)
+        self.journal = journal
+        self._logger.info(f"Restored {restored} events from the event journal")
+
+    def compact_journal(self):
+        """
+        Replaces the journal's history with a snapshot of the live events. Runs on the journal's
+        thread when a compaction is due. All shard locks are held only while each live event's log
+        windows are copied (sharing their buffers) and the journal moves to a new segment; the
+        snapshot is serialized and written after they are released.
+        """
+        if self.journal is None or not self._compact_lock.acquire(blocking=False):
+            return
+        try:
+            self.journal.sync()  # Leaves little for rotate() to write while the shards are locked
+            locks = [lock for lock, _ in self._shards]
+            for lock in locks:
+                lock.acquire()
+            try:
+                live = [(event, {category: lines.copy() for category, lines in event.categorized_logs.items()})
+                        for _, store in self._shards for event in store.events()]
+                covered = self.journal.rotate()
+            finally:
+                for lock in reversed(locks):
+                    lock.release()
+            self.journal.write_snapshot(covered, (self._journal_record(event, logs) for event, logs in live))
+        finally:
+            self._compact_lock.release()
+
+    @staticmethod
+    def _journal_record(event, categorized_logs):
+        dts = event.id.split('_', 1)[1]
+        return {'op': 'create', 'ip': event.ip, 'dts': int(dts) if dts.isdigit() else dts, 'txt': event.txt,
+                'erc': event.erc, 'logs': {category: list(lines) for category, lines in categorized_logs.items()}}
+
+    def _shard(self, ip):
+        """Returns the (lock, store) pair that holds the events for ip."""
+        return self._shards[hash(ip) % len(self._shards)]
+
+    def _coalesce(self, ip, erc, store, now):
+        """
+        Finds the in-flight event a fault from ip with error code erc attaches to, restarting its
+        window. Must be called with the shard lock for ip held.
+
+        :return: The event's ID, or None if the fault should create a new event.
+        """
+        inflight = self._inflight[hash(ip) % len(self._shards)]
+        cutoff = now - self.coalesce_window
+        while inflight:
+            oldest = next(iter(inflight.values()))
+            if oldest[1] > cutoff:
+                break
+            inflight.popitem(last=False)
+        entry = inflight.get((ip, erc))
+        if entry is None or entry[0] not in store:
             return None
+        if self.coalesce_max_age and now - entry[3] >= self.coalesce_max_age:
+            del inflight[(ip, erc)]
+            return None
+        entry[1] = now
+        entry[2] += 1
+        self._coalesced_counts[hash(ip) % len(self._shards)] += 1
+        inflight.move_to_end((ip, erc))
+        return entry[0]
+
+    def _shard_for_event(self, event_id):
+        return self._shard(event_id.split('_')[0])  # Event IDs are in the format "ip_datetime"
+
+    def get_event(self, event_id):
+        lock, store = self._shard_for_event(event_id)
+        with lock:
+            event = store.get(event_id)
+        if event is None:
+            print("Event not found with ID:", event_id)
+        return event
+
+    def get_events(self, ip, start=None, end=None):
+        """
+        Returns the stored events for a device whose datetime falls within [start, end], in time order.
+        """
+        lock, store = self._shard(ip)
+        with lock:
+            return store.range(ip, start, end)
+
+    def get_recent_events(self, ip, seconds, now=None):
+        """Returns the stored events for a device from the last seconds."""
+        lock, store = self._shard(ip)
+        with lock:
+            return store.recent(ip, seconds, now)
+
+    def stats(self):
+        """Returns the store statistics summed over all shards."""
+        totals = {'events': 0, 'sources': 0, 'bytes': 0, 'evicted': 0}
+        for lock, store in self._shards:
+            with lock:
+                for key, value in store.stats().items():
+                    totals[key] += value
+        totals['shards'] = len(self._shards)
+        totals['coalesced'] = sum(self._coalesced_counts)
+        return totals
         
-    def add_event(self, ip, dts, txt, erc):
+    def add_event(self, ip, dts, txt, erc, received_ns=None):
         """
         Creates a new event and stores it in the manager.
 
@@ -38,17 +188,44 @@ class CIPEventManager:
         :param dts: The datetime stamp of the event.
         :param txt: Text description of the event.
         :param erc: Error code associated with the event.
-        :return: Returns True if the event was added successfully, False otherwise.
+        :param received_ns: time.monotonic_ns() of when the listener received the event, for PipelineMetrics.
+        :return: Returns True if the event was added successfully, False otherwise, including when the
+                 fault was coalesced into an in-flight event.
         """
         event = CIPEventData(ip, dts, txt, erc)
-        if event.id in self.id_map:
+        lock, store = self._shard(event.ip)
+        coalesced_into = None
+        with lock:
+            if self.coalesce_window:
+                now = self.clock()
+                coalesced_into = self._coalesce(event.ip, erc, store, now)
+                if coalesced_into is not None:
+                    logs = {self.COALESCED_CATEGORY: [f"Coalesced fault at {dts} error {erc}: {txt}"]}
+                    store.add_logs(coalesced_into, logs)
+                    if self.journal is not None:
+                        self.journal.record_logs(coalesced_into, logs)
+                    added = False
+                else:
+                    added = store.add(event)
+                    if added:
+                        inflight = self._inflight[hash(event.ip) % len(self._shards)]
+                        inflight[(event.ip, erc)] = [event.id, now, 1, now]
+                        inflight.move_to_end((event.ip, erc))
+            else:
+                added = store.add(event)
+            if added and self.journal is not None:
+                self.journal.record_event(event, dts)
+        if coalesced_into is not None:
+            self._logger.debug(f"Fault {event.id} coalesced into in-flight event {coalesced_into}")
+            return False
+        if not added:
             self._logger.debug("Event with this ID already exists.")
             return False
-        self.id_map[event.id] = event
-        ip_events = self.events.setdefault(ip, {})
-        time_events = ip_events.setdefault(event.datetime, [])
-        time_events.append(event)
         self._logger.info(f"Event added successfully: {event.id}")
+        metrics = PipelineMetrics.get_instance()
+        if received_ns is not None:
+            metrics.mark(event.id, 'receive', received_ns)
+        metrics.mark(event.id, 'event_create')
         # Emit an event to notify that a new event has been registered
         dispatcher.send(signal="CIPEventCreated", sender=self, event_id=event.id)
         return True
@@ -59,9 +236,40 @@ class CIPEventManager:
         dts = data.get('datetime')
         txt = data.get('text')
         erc = data.get('error_code')
-        if self.add_event(ip, dts, txt, erc):
+        if self.add_event(ip, dts, txt, erc, received_ns=kw.get('received_ns')):
             self._logger.info("Network data processed and event created.")
 
+    def handle_network_batch(self, sender, **kw):
+        """
+        Creates the events for a batch of validated network records, such as the batches emitted
+        by the UDP batch receiver.
+        """
+        records = kw.get('data', [])
+        received_ns = kw.get('received_ns')
+        created = 0
+        for data in records:
+            if self.add_event(data.get('ip'), data.get('datetime'), data.get('text'), data.get('error_code'),
+                              received_ns=received_ns):
+                created += 1
+        self._logger.info(f"Network batch processed: {created} of {len(records)} events created.")
+
+    def handle_log_processing_completed(self, sender, **kwargs):
+        """
+        Stops later faults attaching to an event whose logs have been processed, since they would
+        not be sent with them; the next such fault creates a new event and log retrieval.
+        """
+        event_id = kwargs['event_id']
+        ip = event_id.split('_')[0]
+        lock, store = self._shard(ip)
+        with lock:
+            event = store.get(event_id)
+            if event is None:
+                return
+            inflight = self._inflight[hash(ip) % len(self._shards)]
+            entry = inflight.get((event.ip, event.erc))
+            if entry is not None and entry[0] == event_id:
+                del inflight[(event.ip, event.erc)]
+
     def add_categorized_logs_to_event(self, event_id, categorized_logs):
         """
         Adds categorized log entries to a single event.
@@ -69,18 +277,15 @@ class CIPEventManager:
         :param event_id: The ID of the event to which logs are added.
         :param categorized_logs: A dictionary where keys are categories and values are lists of logs.
         """
-        if event_id in self.id_map:
-            event = self.id_map[event_id]
-            for category, logs in categorized_logs.items():
-                event.add_categorized_log(category, logs)
+        lock, store = self._shard_for_event(event_id)
+        with lock:
+            added = store.add_logs(event_id, categorized_logs)
+            if added and self.journal is not None:
+                self.journal.record_logs(event_id, categorized_logs)
+        if added:
             self._logger.debug(f"Added categorized logs to event {event_id}")
             # Optionally emit an updated event signal
             dispatcher.send(signal="EventUpdated", sender=self, event_id=event_id, logs=categorized_logs)
         else:
             self._logger.warning(f"No event found with ID {event_id}")
 
-    def add_categorized_log(self, category, messages):
-        """Add multiple messages to a specific log category."""
-        if category not in self.categorized_logs:
-            self.categorized_logs[category] = []
-        self.categorized_logs[category].extend(messages)
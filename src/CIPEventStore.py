@@ -0,0 +1,175 @@
+import logging
+import time
+from bisect import bisect_left, bisect_right
+from collections import OrderedDict
+from datetime import datetime, timedelta, timezone
+from CIPEventData import CIPEventData
+
+# Rough per-object costs used to estimate an event's memory footprint
+EVENT_OVERHEAD_BYTES = 1024
+LINE_OVERHEAD_BYTES = 56
+WINDOW_OVERHEAD_BYTES = 200  # A LogWindow's buffer and offset array headers
+
+class CIPEventStore:
+    def __init__(self, ttl_seconds=None, max_bytes=None, logger=None, clock=time.monotonic):
+        """
+        Initializes a bounded event store with a per-IP time index.
+
+        :param ttl_seconds: Events older than this (measured from when they were stored) are evicted;
+                            None keeps them until max_bytes forces them out.
+        :param max_bytes: Estimated bytes of events and attached log lines to keep; the oldest stored
+                          events are evicted first once it is exceeded. None means no limit.
+        :param logger: Logger instance for logging information.
+        :param clock: Monotonic clock in seconds, replaceable for tests.
+        """
+        self.ttl_seconds = ttl_seconds
+        self.max_bytes = max_bytes
+        self.logger = logger if logger else logging.getLogger('CIPEventStore')
+        self.clock = clock
+        self._by_id = OrderedDict()  # event_id to (event, stored at), oldest first
+        self._times = {}  # ip to the sorted epoch microseconds of its events
+        self._events = {}  # ip to its events, aligned with _times
+        self._sizes = {}  # event_id to estimated bytes
+        self.total_bytes = 0
+        self.evicted = 0
+
+    def __len__(self):
+        return len(self._by_id)
+
+    def __contains__(self, event_id):
+        return event_id in self._by_id
+
+    def get(self, event_id):
+        entry = self._by_id.get(event_id)
+        return entry[0] if entry else None
+
+    def events(self):
+        """Returns the stored events, oldest stored first."""
+        return [event for event, _ in self._by_id.values()]
+
+    def add(self, event):
+        """
+        Stores an event, evicting expired or excess events first.
+
+        :return: False if an event with the same ID is already stored.
+        """
+        if event.id in self._by_id:
+            return False
+        self.evict_expired()
+        self._by_id[event.id] = (event, self.clock())
+        times = self._times.setdefault(event.ip, [])
+        events = self._events.setdefault(event.ip, [])
+        position = bisect_right(times, event.epoch_us)
+        times.insert(position, event.epoch_us)
+        events.insert(position, event)
+        size = self._estimate_bytes(event)
+        self._sizes[event.id] = size
+        self.total_bytes += size
+        self._evict_to_size()
+        return True
+
+    def add_logs(self, event_id, categorized_logs):
+        """
+        Attaches categorized log lines to a stored event and accounts for their size.
+
+        :return: False if the event is not stored (for example, it has already been evicted).
+        """
+        event = self.get(event_id)
+        if event is None:
+            return False
+        for category, logs in categorized_logs.items():
+            event.add_categorized_logs(category, logs)
+        size = self._estimate_bytes(event)
+        self.total_bytes += size - self._sizes[event_id]
+        self._sizes[event_id] = size
+        self._evict_to_size()
+        return True
+
+    def remove(self, event_id):
+        """
+        Removes an event, dropping the store's references to it and its attached logs. Returns the
+        event, or None.
+        """
+        entry = self._by_id.pop(event_id, None)
+        if entry is None:
+            return None
+        event = entry[0]
+        times = self._times[event.ip]
+        events = self._events[event.ip]
+        position = bisect_left(times, event.epoch_us)
+        while events[position] is not event:
+            position += 1  # Skip other events with the same timestamp
+        del times[position]
+        del events[position]
+        if not times:
+            del self._times[event.ip]
+            del self._events[event.ip]
+        self.total_bytes -= self._sizes.pop(event_id)
+        # The event itself is left intact: senders and the error code mapper may still be reading its
+        # logs outside the lock, and it is freed once they let go of it
+        return event
+
+    def range(self, ip, start=None, end=None):
+        """
+        Returns the events for ip whose datetime falls within [start, end], in time order.
+
+        :param start: Earliest datetime, or None for no lower bound.
+        :param end: Latest datetime, or None for no upper bound.
+        """
+        times = self._times.get(ip)
+        if not times:
+            return []
+        low = bisect_left(times, CIPEventData.to_epoch_us(start)) if start is not None else 0
+        high = bisect_right(times, CIPEventData.to_epoch_us(end)) if end is not None else len(times)
+        return self._events[ip][low:high]
+
+    def recent(self, ip, seconds, now=None):
+        """
+        Returns the events for ip from the last seconds, relative to now (default: the current time).
+        Event times are UTC, so a naive now is taken as UTC too.
+        """
+        now = now if now is not None else datetime.now(timezone.utc)
+        return self.range(ip, now - timedelta(seconds=seconds), now)
+
+    def evict_expired(self):
+        """Evicts every event stored longer than the TTL. Returns the number evicted."""
+        if not self.ttl_seconds:
+            return 0
+        cutoff = self.clock() - self.ttl_seconds
+        evicted = 0
+        while self._by_id:
+            event_id, (_, stored_at) = next(iter(self._by_id.items()))
+            if stored_at > cutoff:
+                break
+            self.remove(event_id)
+            evicted += 1
+        self._note_evicted(evicted, 'expired')
+        return evicted
+
+    def _evict_to_size(self):
+        if not self.max_bytes:
+            return
+        evicted = 0
+        # The newest event always stays, even if it alone is over the limit
+        while self.total_bytes > self.max_bytes and len(self._by_id) > 1:
+            self.remove(next(iter(self._by_id)))
+            evicted += 1
+        self._note_evicted(evicted, 'over the size limit')
+
+    def _note_evicted(self, evicted, reason):
+        if evicted:
+            self.evicted += evicted
+            self.logger.info(f"Evicted {evicted} events {reason}; {len(self._by_id)} events, {self.total_bytes} bytes kept")
+
+    @staticmethod
+    def _estimate_bytes(event):
+        size = EVENT_OVERHEAD_BYTES + len(event.id) + len(event.txt or '')
+        for logs in event.categorized_logs.values():
+            if hasattr(logs, 'nbytes'):
+                size += logs.nbytes + WINDOW_OVERHEAD_BYTES
+            else:
+                size += sum(map(len, logs)) + LINE_OVERHEAD_BYTES * len(logs)
+        return size
+
+    def stats(self):
+        return {'events': len(self._by_id), 'sources': len(self._times), 'bytes': self.total_bytes, 'evicted': self.evicted}
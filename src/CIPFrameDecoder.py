@@ -0,0 +1,79 @@
+import socket
+import struct
+
+class CIPFrameDecoder:
+    """
+    Incremental decoder for the length-delimited CIP fault records sent over TCP.
+
+    Each frame is a 2-byte big-endian payload length followed by the payload: the 4-byte device IP,
+    a 4-byte big-endian datetime, an 8-byte NUL-padded ASCII error code and the NUL-padded ASCII
+    shared secret filling the rest of the payload.
+    """
+    FRAME = struct.Struct('>H4sI8s')  # Length prefix and the fixed-size fields, unpacked in one call
+    PREFIX_BYTES = 2
+    FIXED_BYTES = 16  # Payload bytes before the shared secret
+
+    def __init__(self, max_frame=1024):
+        """
+        :param max_frame: Largest payload accepted; a longer length prefix means the stream is out of sync.
+        """
+        self.max_frame = max_frame
+        self._pending = bytearray()  # Tail of a frame split across reads
+        self.frames = 0
+
+    def feed(self, data):
+        """
+        Decodes every complete frame in data, keeping any partial frame for the next call.
+
+        :param data: Bytes read from the connection.
+        :return: A list of record dictionaries with 'ip', 'datetime', 'error_code' and 'shared_secret'.
+        :raises ValueError: If a length prefix is out of range.
+        """
+        if self._pending:
+            self._pending += data
+            buffer = self._pending
+        else:
+            buffer = data  # Common case: decode straight out of the read, nothing is buffered
+        records = []
+        with memoryview(buffer) as view:
+            consumed = self._decode(view, records)
+        if buffer is self._pending:
+            del self._pending[:consumed]
+        elif consumed < len(data):
+            self._pending += data[consumed:]
+        return records
+
+    def _decode(self, view, records):
+        """Appends the records of every complete frame in view and returns the bytes consumed."""
+        unpack_from = self.FRAME.unpack_from
+        end = len(view)
+        offset = 0
+        header_bytes = self.FRAME.size
+        while end - offset >= self.PREFIX_BYTES:
+            length = (view[offset] << 8) | view[offset + 1]
+            if length < self.FIXED_BYTES or length > self.max_frame:
+                raise ValueError(f"Invalid CIP frame length {length}")
+            frame_end = offset + self.PREFIX_BYTES + length
+            if frame_end > end:
+                break
+            _, ip, datetime, error_code = unpack_from(view, offset)
+            records.append({
+                'ip': socket.inet_ntoa(ip),
+                'datetime': datetime,
+                'error_code': error_code.rstrip(b'\x00').decode('ascii'),
+                'shared_secret': bytes(view[offset + header_bytes:frame_end]).rstrip(b'\x00').decode('ascii'),
+            })
+            offset = frame_end
+        self.frames += len(records)
+        return offset
+
+    @classmethod
+    def encode(cls, ip, datetime, error_code, shared_secret):
+        """Builds one frame; the counterpart of feed, for senders and tests."""
+        secret = shared_secret.encode('ascii')
+        return cls.FRAME.pack(cls.FIXED_BYTES + len(secret), socket.inet_aton(ip), datetime,
+                              error_code.encode('ascii')) + secret
+
+    def pending(self):
+        """Returns the number of buffered bytes of an incomplete frame."""
+        return len(self._pending)
@@ -0,0 +1,181 @@
+import asyncio
+import logging
+import multiprocessing
+import threading
+from pydispatch import dispatcher
+from CIPNetworkListener import CIPNetworkListener
+
+# Signals a worker forwards to the parent, which owns the CIPEventManager
+FORWARDED_SIGNALS = ("NetworkDataReceived", "NetworkDataBatchReceived")
+# Channel message carrying a worker's log record, as (LOG_MESSAGE, (levelno, text), None)
+LOG_MESSAGE = "_log"
+
+class _PipeLogHandler(logging.Handler):
+    """Sends a worker's log records to the parent, which logs them through the pool's logger."""
+    def __init__(self, send):
+        super().__init__()
+        self.send = send
+        self.setFormatter(logging.Formatter('%(message)s'))
+
+    def emit(self, record):
+        try:
+            self.send((LOG_MESSAGE, (record.levelno, self.format(record)), None))
+        except Exception:
+            self.handleError(record)
+
+def _run_worker(host, port, use_udp, config, connection, index):
+    """
+    Process entry point: runs one CIPNetworkListener bound with SO_REUSEPORT and forwards every
+    validated record to the parent over connection. A spawned process starts with no logging
+    configured, so its records at CIPListenerPool_log_level and above go over the same connection.
+    """
+    send_lock = threading.Lock()
+
+    def send(message):
+        with send_lock:
+            connection.send(message)
+
+    root = logging.getLogger()
+    root.handlers = [_PipeLogHandler(send)]
+    root.setLevel(config.get('CIPListenerPool_log_level', 'INFO'))
+    logger = logging.getLogger(f'CIPListenerPool.worker{index}')
+
+    def forward(signal=None, sender=None, **kwargs):
+        try:
+            send((signal, kwargs.get('data'), kwargs.get('received_ns')))
+        except (OSError, EOFError):
+            raise SystemExit(1)  # The parent is gone, so there is nowhere to log this
+
+    for signal_name in FORWARDED_SIGNALS:
+        dispatcher.connect(forward, signal=signal_name, sender=dispatcher.Any)
+
+    async def serve():
+        listener = CIPNetworkListener(host, port, use_udp=use_udp, logger=logger,
+                                      config=dict(config, CIPNetworkListener_reuse_port=True))
+        await listener.start_server()
+        try:
+            await asyncio.Future()
+        finally:
+            await listener.shutdown()
+
+    try:
+        asyncio.run(serve())
+    except KeyboardInterrupt:
+        pass
+    except Exception:
+        logger.exception("Listener worker failed")
+        raise SystemExit(1)
+
+class CIPListenerPool:
+    def __init__(self, host, port, use_udp=True, logger=None, config=None, workers=2):
+        """
+        Initializes a pool of listener processes that all bind the same port with SO_REUSEPORT, so
+        the kernel spreads datagrams and connections across cores. Validated records come back over
+        one pipe per worker and are re-emitted in this process, where the event manager lives, along
+        with the workers' log records. A supervisor task checks the workers every
+        CIPListenerPool_check_interval seconds and respawns any that have died.
+
+        :param host: The hostname or IP address to listen on.
+        :param port: The port number to listen on.
+        :param use_udp: Boolean flag to determine whether to use UDP (default) or TCP.
+        :param logger: External logger for logging purposes.
+        :param config: The configuration dictionary, passed on to each worker's CIPNetworkListener.
+        :param workers: Number of listener processes.
+        """
+        self.host = host
+        self.port = port
+        self.use_udp = use_udp
+        self.logger = logger if logger else logging.getLogger('CIPListenerPool')
+        self.config = config or {}
+        self.workers = workers
+        self.check_interval = self.config.get('CIPListenerPool_check_interval', 1.0)
+        self.loop = None
+        self.context = None
+        self.processes = []
+        self.connections = []
+        self.supervisor = None
+        self.forwarded = 0
+        self.restarts = 0
+
+    async def start_server(self):
+        """Spawns the workers and starts relaying their records onto the local dispatcher."""
+        self.loop = asyncio.get_running_loop()
+        self.context = multiprocessing.get_context('spawn')  # Workers must not inherit the parent's event loop
+        self.processes = [None] * self.workers
+        self.connections = [None] * self.workers
+        for index in range(self.workers):
+            self._spawn(index)
+        self.supervisor = self.loop.create_task(self._supervise())
+        self.logger.info(f"{self.workers} listener workers sharing {'UDP' if self.use_udp else 'TCP'} port {self.port}")
+
+    def _spawn(self, index):
+        receiver, sender = self.context.Pipe(duplex=False)
+        process = self.context.Process(target=_run_worker, name=f'CIPListenerWorker{index}', daemon=True,
+                                       args=(self.host, self.port, self.use_udp, self.config, sender, index))
+        process.start()
+        sender.close()  # Only the worker writes; the parent sees EOF if the worker dies
+        self.loop.add_reader(receiver.fileno(), self._on_readable, receiver, index)
+        self.processes[index] = process
+        self.connections[index] = receiver
+
+    async def _supervise(self):
+        """Respawns workers that have exited, checking every check_interval seconds."""
+        while True:
+            await asyncio.sleep(self.check_interval)
+            for index, process in enumerate(self.processes):
+                if process.is_alive():
+                    continue
+                self.logger.error(f"Listener worker {index} exited with code {process.exitcode}, restarting it")
+                self._close_connection(self.connections[index], index)
+                try:
+                    self._spawn(index)
+                    self.restarts += 1
+                except Exception as e:
+                    self.logger.error(f"Failed to restart listener worker {index}: {str(e)}")
+
+    def _on_readable(self, connection, index):
+        try:
+            while connection.poll():
+                signal_name, data, received_ns = connection.recv()
+                if signal_name == LOG_MESSAGE:
+                    level, text = data
+                    self.logger.log(level, f"[worker {index}] {text}")
+                    continue
+                self.forwarded += 1
+                dispatcher.send(signal=signal_name, sender="CIPListenerPool", data=data, received_ns=received_ns)
+        except EOFError:
+            # The supervisor notices the exit and respawns the worker
+            self.logger.error(f"Listener worker {index} closed its channel")
+            self._close_connection(connection, index)
+        except Exception as e:
+            self.logger.error(f"Failed to relay listener data: {str(e)}")
+
+    def _close_connection(self, connection, index):
+        if connection is None or self.connections[index] is not connection:
+            return
+        try:
+            self.loop.remove_reader(connection.fileno())
+        except (ValueError, OSError):
+            pass
+        connection.close()
+        self.connections[index] = None
+
+    def stats(self):
+        return {'workers': sum(1 for process in self.processes if process.is_alive()), 'forwarded': self.forwarded,
+                'restarts': self.restarts}
+
+    async def shutdown(self):
+        """Stops the supervisor and the workers and closes their channels."""
+        if self.supervisor is not None:
+            self.supervisor.cancel()
+            await asyncio.gather(self.supervisor, return_exceptions=True)
+            self.supervisor = None
+        for index, connection in enumerate(self.connections):
+            self._close_connection(connection, index)
+        for process in self.processes:
+            process.terminate()
+        for process in self.processes:
+            await asyncio.to_thread(process.join, 5)
+        self.processes = []
+        self.connections = []
+        self.logger.info("Listener pool has been shutdown")
@@ -1,7 +1,43 @@
-import asyncio, struct, socket
+import asyncio, struct, socket, time
 import logging
+from collections import OrderedDict
 from pydispatch import dispatcher
 from CIPDataValidation import CIPDataValidator
+from CIPFrameDecoder import CIPFrameDecoder
+from CIPSourceAuthenticator import CIPSourceAuthenticator
+from CIPRateLimiter import CIPRateLimiter
+
+def make_authenticator(config, use_udp=False):
+    """
+    Builds the per-source authentication stage from the configuration, or returns None unless a
+    shared_secret is configured and CIPNetworkListener_auth_cache is turned on.
+
+    UDP source addresses can be spoofed, so for UDP the secret is still checked on every datagram and
+    no source is ever blocked: a trusted address would let forged datagrams skip the check, and forged
+    bad datagrams could block a real PLC.
+    """
+    if not config.get('shared_secret') or not config.get('CIPNetworkListener_auth_cache', False):
+        return None
+    if use_udp:
+        return CIPSourceAuthenticator(config['shared_secret'], positive_ttl=0, negative_ttl=0)
+    return CIPSourceAuthenticator(config['shared_secret'],
+                                  positive_ttl=config.get('CIPNetworkListener_auth_positive_ttl', 10.0),
+                                  negative_ttl=config.get('CIPNetworkListener_auth_negative_ttl', 5.0),
+                                  max_sources=config.get('CIPNetworkListener_auth_max_sources', 4096))
+
+def make_rate_limiter(config):
+    """
+    Builds the per-source rate limiter from the configuration, or returns None when neither
+    CIPNetworkListener_rate nor CIPNetworkListener_duplicate_window is set.
+    """
+    rate = config.get('CIPNetworkListener_rate')
+    duplicate_window = config.get('CIPNetworkListener_duplicate_window', 0.0)
+    if not rate and not duplicate_window:
+        return None
+    return CIPRateLimiter(rate=rate, burst=config.get('CIPNetworkListener_burst'),
+                          duplicate_window=duplicate_window,
+                          max_sources=config.get('CIPNetworkListener_rate_max_sources', 4096))
+
 class CIPNetworkListener:
     def __init__(self, host, port, use_udp=True, logger=None, config=None):
         """
@@ -11,15 +47,22 @@ class CIPNetworkListener:
         :param port: The port number to listen on.
         :param use_udp: Boolean flag to determine whether to use UDP (default) or TCP.
         :param logger: External logger for logging purposes.
+        :param config: The configuration dictionary; supplies shared_secret and the TCP read and frame sizes.
         """
         self.host = host
         self.port = port
         self.use_udp = use_udp
         self.logger = logger if logger else logging.getLogger('CIPNetworkListener')
         self.server = None  # To keep track of the server instance for shutdown
-        self.shared_secret = config['shared_secret']
+        self.config = config or {}
+        self.shared_secret = self.config.get('shared_secret')
         self.validator = CIPDataValidator()
-        self.config = config
+        self.authenticator = make_authenticator(self.config, use_udp)
+        self.rate_limiter = make_rate_limiter(self.config)
+        self.read_size = self.config.get('CIPNetworkListener_read_size', 65536)
+        self.max_frame = self.config.get('CIPNetworkListener_max_frame', 1024)
+        # Lets several listener processes bind the same port, as CIPListenerPool does
+        self.reuse_port = self.config.get('CIPNetworkListener_reuse_port', False)
 
     async def start_server(self):
         """Starts the server to listen for incoming messages based on the protocol."""
@@ -33,9 +76,16 @@ class CIPNetworkListener:
     async def start_udp_server(self):
         """Start a UDP server."""
         loop = asyncio.get_running_loop()
+        if self.config.get('CIPNetworkListener_udp_batch', False):
+            self.server = UDPBatchReceiver(self.logger, config=self.config, authenticator=self.authenticator,
+                                           rate_limiter=self.rate_limiter)
+            self.server.open(loop, self.host, self.port, reuse_port=self.reuse_port)
+            self.logger.info(f"UDP Server listening on {self.host}:{self.port} in batch mode")
+            return
         transport, protocol = await loop.create_datagram_endpoint(
-            lambda: UDPProtocol(self.logger, config=self.config),
-            local_addr=(self.host, self.port))
+            lambda: UDPProtocol(self.logger, config=self.config, authenticator=self.authenticator,
+                                rate_limiter=self.rate_limiter),
+            local_addr=(self.host, self.port), reuse_port=self.reuse_port)
         self.server = transport
         self.logger.info(f"UDP Server listening on {self.host}:{self.port}")
 
@@ -43,41 +93,58 @@ class CIPNetworkListener:
         """Start a TCP server."""
         server = await asyncio.start_server(
             self.handle_tcp_connection,
-            self.host, self.port)
+            self.host, self.port, reuse_port=self.reuse_port)
         self.logger.info(f"TCP Server listening on {self.host}:{self.port}")
         return server
 
     async def handle_tcp_connection(self, reader, writer):
         addr = writer.get_extra_info('peername')  # Get client address if needed for logging
+        decoder = CIPFrameDecoder(self.max_frame)
+        source = addr[0] if addr else None
+        # With an authenticator the secret is checked per source, so validation skips the comparison
+        secret = None if self.authenticator else self.shared_secret
         try:
+            if self.authenticator and self.authenticator.is_blocked(source):
+                self.logger.warning(f"Refused TCP connection from blocked source {addr}")
+                return
             while True:
-                data = await reader.read(1024)
+                # One read may hold many frames, or end part way through one
+                data = await reader.read(self.read_size)
                 if not data:
                     break  # Stop if no data is received
-                ip = socket.inet_ntoa(data[0:4])  # Extract and convert the IP address
-                datetime, = struct.unpack('>I', data[4:8])  # Unpack the datetime integer
-                error_code = data[8:16].decode('ascii').strip('\x00')  # Decode the error code
-                shared_secret = data[16:].decode('ascii').strip('\x00')  # Decode the shared secret
-                
-                # Now we create a structured message dictionary to validate and process
-                message = {
-                    'ip': ip,
-                    'datetime': datetime,
-                    'error_code': error_code,
-                    'shared_secret': shared_secret
-                }
-                if not self.validator.validate_message(message, self.shared_secret ):
-                    self.logger.error(f"Invalid message format from {addr}")
-                    writer.close()  # Optionally close the connection if the message is invalid
-                    return
-                # Emit event after validation
-                dispatcher.send(signal="NetworkDataReceived", sender="TCPConnection", data=message)
+                received_ns = time.monotonic_ns()  # Start of the event's pipeline latency
+                for message in decoder.feed(data):
+                    if self.rate_limiter and not self.rate_limiter.allow(
+                            source, (message['ip'], message['datetime'], message['error_code'])):
+                        continue  # Over the source's rate, or a repeat of a record already let through
+                    if self.authenticator and not self.authenticator.authenticate(source, message['shared_secret']):
+                        self.logger.error(f"Authentication failed for {addr}")
+                        return
+                    if not self.validator.validate_record(message, secret):
+                        self.logger.error(f"Invalid message format from {addr}")
+                        return
+                    # Emit event after validation
+                    dispatcher.send(signal="NetworkDataReceived", sender="TCPConnection", data=message, received_ns=received_ns)
+            if decoder.pending():
+                self.logger.warning(f"TCP connection from {addr} closed mid-frame, {decoder.pending()} bytes discarded")
         except Exception as e:
             self.logger.error(f"Error in TCP connection from {addr}: {str(e)}")
         finally:
             writer.close()
             self.logger.info(f"TCP connection with {addr} closed")
 
+    def stats(self):
+        """Returns the per-source rate limiting counters and the authentication counters."""
+        stats = {}
+        if self.rate_limiter:
+            stats['sources'] = self.rate_limiter.stats()
+        if self.authenticator:
+            stats['authentication'] = self.authenticator.stats()
+        if isinstance(self.server, UDPBatchReceiver):
+            stats['udp_batch'] = self.server.stats()
+            stats['udp_drops'] = self.server.drop_counts()
+        return stats
+
     async def shutdown(self):
         """Shutdown the server gracefully."""
         if self.server:
@@ -87,19 +154,33 @@ class CIPNetworkListener:
             self.logger.info("Server has been shutdown")
 
 class UDPProtocol(asyncio.DatagramProtocol):
-    def __init__(self, logger, config=None):
+    def __init__(self, logger, config=None, authenticator=None, rate_limiter=None):
         self.logger = logger
-        self.shared_secret = config['shared_secret']
+        self.shared_secret = (config or {}).get('shared_secret')
         self.validator = CIPDataValidator()
+        self.authenticator = authenticator
+        self.rate_limiter = rate_limiter
 
     def datagram_received(self, data, addr):
-        message = data.decode()
-        if not self.validator.validate_message(message, self.shared_secret ):
+        received_ns = time.monotonic_ns()  # Start of the event's pipeline latency
+        if self.rate_limiter and not self.rate_limiter.allow(addr[0], data):
+            return  # Over the source's rate, or a repeat of a datagram already let through
+        secret = self.shared_secret
+        if self.authenticator:
+            if self.authenticator.is_blocked(addr[0]):
+                return  # Dropped before decoding
+            secret = None  # Checked per source below instead
+        message = data.decode(errors='replace')
+        if self.authenticator and not self.authenticator.authenticate(addr[0], message.rpartition(',')[2]):
+            self.logger.error(f"Authentication failed for {addr}")
+            return
+        if not self.validator.validate_message(message, secret):
             self.logger.error(f"Invalid message format from {addr}")
             return
         self.logger.info(f"Received message from {addr}: {message}")
         # Emit event instead of direct handling
-        dispatcher.send(signal="NetworkDataReceived", sender="UDPConnection", data=message)
+        dispatcher.send(signal="NetworkDataReceived", sender="UDPConnection",
+                        data=self.validator.parse_message(message), received_ns=received_ns)
 
     def error_received(self, exc):
         self.logger.error(f"UDP error received: {str(exc)}")
@@ -109,3 +190,153 @@ class UDPProtocol(asyncio.DatagramProtocol):
             self.logger.error(f"UDP connection lost: {str(exc)}")
         else:
             self.logger.info("UDP connection closed")
+
+class UDPBatchReceiver:
+    DROP_REASONS = ('invalid', 'rate_limited', 'unauthenticated')
+
+    def __init__(self, logger, config=None, authenticator=None, rate_limiter=None, clock=time.monotonic):
+        """
+        High-rate UDP ingest. Reads straight from a non-blocking socket, draining up to
+        CIPNetworkListener_udp_max_batch datagrams per wakeup of the event loop, validates them as a
+        batch and emits a single NetworkDataBatchReceived signal for the whole batch.
+
+        Dropped datagrams are counted by reason and summarized in one warning at most every
+        CIPNetworkListener_udp_drop_log_interval seconds, so a storm does not log every batch.
+
+        :param logger: External logger for logging purposes.
+        :param config: The configuration dictionary; supplies shared_secret and the batch settings.
+        :param authenticator: Optional CIPSourceAuthenticator run on each datagram before validation.
+        :param rate_limiter: Optional CIPRateLimiter run on each raw datagram before anything else.
+        :param clock: Monotonic time source, replaceable in tests.
+        """
+        config = config or {}
+        self.logger = logger if logger else logging.getLogger('UDPBatchReceiver')
+        self.shared_secret = config.get('shared_secret')
+        self.max_batch = config.get('CIPNetworkListener_udp_max_batch', 256)
+        self.recv_size = config.get('CIPNetworkListener_udp_recv_size', 2048)
+        self.rcvbuf = config.get('CIPNetworkListener_udp_rcvbuf')
+        self.validator = CIPDataValidator()
+        self.authenticator = authenticator
+        self.rate_limiter = rate_limiter
+        self.loop = None
+        self.sock = None
+        self.max_sources = config.get('CIPNetworkListener_udp_max_sources', 4096)
+        self.source_stats = OrderedDict()  # Source IP to [packets, drops], least recently seen first
+        self.drops = dict.fromkeys(self.DROP_REASONS, 0)
+        self.drop_log_interval = config.get('CIPNetworkListener_udp_drop_log_interval', 10.0)
+        self.clock = clock
+        self._unreported = dict.fromkeys(self.DROP_REASONS, 0)  # Drops since the last warning
+        self._last_drop_log = None
+        self.batches = 0
+
+    def open(self, loop, host, port, reuse_port=False):
+        self.loop = loop
+        self.sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        if reuse_port:
+            self.sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEPORT, 1)
+        if self.rcvbuf:
+            # A larger kernel buffer absorbs bursts between wakeups
+            self.sock.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, self.rcvbuf)
+        self.sock.bind((host, port))
+        self.sock.setblocking(False)
+        loop.add_reader(self.sock.fileno(), self._on_readable)
+
+    def _on_readable(self):
+        received_ns = time.monotonic_ns()  # Start of the batch's pipeline latency
+        batch = []
+        recvfrom = self.sock.recvfrom
+        for _ in range(self.max_batch):
+            try:
+                batch.append(recvfrom(self.recv_size))
+            except (BlockingIOError, InterruptedError):
+                break  # Drained
+            except OSError as e:
+                self.logger.error(f"UDP receive failed: {str(e)}")
+                break
+        if batch:
+            self.handle_batch(batch, received_ns)
+
+    def handle_batch(self, batch, received_ns=None):
+        """
+        Validates a batch of (datagram, address) pairs and dispatches the valid ones together.
+
+        :return: The number of messages dispatched.
+        """
+        authenticator = self.authenticator
+        rate_limiter = self.rate_limiter
+        source_stats = self.source_stats
+        drops = self._unreported
+        decoded = []
+        decoded_counts = []
+        for data, addr in batch:
+            counts = source_stats.get(addr[0])
+            if counts is None:
+                counts = source_stats[addr[0]] = [0, 0]
+                while len(source_stats) > self.max_sources:
+                    source_stats.popitem(last=False)
+            else:
+                source_stats.move_to_end(addr[0])
+            counts[0] += 1
+            if rate_limiter and not rate_limiter.allow(addr[0], data):
+                counts[1] += 1
+                drops['rate_limited'] += 1
+                continue
+            if authenticator and authenticator.is_blocked(addr[0]):
+                counts[1] += 1
+                drops['unauthenticated'] += 1
+                continue  # Dropped before decoding
+            try:
+                message = data.decode()
+            except UnicodeDecodeError:
+                counts[1] += 1
+                drops['invalid'] += 1
+                continue
+            if authenticator and not authenticator.authenticate(addr[0], message.rpartition(',')[2]):
+                counts[1] += 1
+                drops['unauthenticated'] += 1
+                continue
+            decoded.append(message)
+            decoded_counts.append(counts)
+        mask = self.validator.validate_many(decoded, None if authenticator else self.shared_secret)
+        messages = []
+        for message, counts, valid in zip(decoded, decoded_counts, mask):
+            if not valid:
+                counts[1] += 1
+                drops['invalid'] += 1
+                continue
+            messages.append(self.validator.parse_message(message))
+        self.batches += 1
+        if len(messages) < len(batch):
+            self._report_drops()
+        if messages:
+            self.logger.debug(f"Received UDP batch of {len(messages)} messages")
+            dispatcher.send(signal="NetworkDataBatchReceived", sender="UDPBatch", data=messages, received_ns=received_ns)
+        return len(messages)
+
+    def _report_drops(self):
+        """Logs the drops since the last warning, by reason, if the log interval has passed."""
+        now = self.clock()
+        if self._last_drop_log is not None and now - self._last_drop_log < self.drop_log_interval:
+            return
+        unreported = self._unreported
+        summary = ', '.join(f"{count} {reason.replace('_', ' ')}" for reason, count in unreported.items() if count)
+        since = f" in the last {now - self._last_drop_log:.0f}s" if self._last_drop_log is not None else ""
+        self.logger.warning(f"Dropped UDP messages{since}: {summary}")
+        for reason, count in unreported.items():
+            self.drops[reason] += count
+            unreported[reason] = 0
+        self._last_drop_log = now
+
+    def drop_counts(self):
+        """Returns the datagrams dropped so far by reason: invalid, rate_limited and unauthenticated."""
+        return {reason: count + self._unreported[reason] for reason, count in self.drops.items()}
+
+    def stats(self):
+        """Returns {source ip: {'packets': n, 'drops': m}} for the most recently seen sources."""
+        return {ip: {'packets': packets, 'drops': drops} for ip, (packets, drops) in self.source_stats.items()}
+
+    def close(self):
+        if self.sock:
+            self.loop.remove_reader(self.sock.fileno())
+            self.sock.close()
+            self.sock = None
@@ -0,0 +1,90 @@
+import time
+from collections import OrderedDict
+from threading import Lock
+
+class _SourceState:
+    __slots__ = ('tokens', 'updated', 'recent', 'allowed', 'rate_limited', 'duplicates')
+
+    def __init__(self, tokens, now):
+        self.tokens = tokens
+        self.updated = now
+        self.recent = OrderedDict()  # Message key to when it was last let through
+        self.allowed = 0
+        self.rate_limited = 0
+        self.duplicates = 0
+
+class CIPRateLimiter:
+    def __init__(self, rate=None, burst=None, duplicate_window=0.0, max_sources=4096, max_recent=32, clock=time.monotonic):
+        """
+        Initializes per-source token-bucket rate limiting with duplicate suppression, so one PLC looping
+        on a fault cannot crowd out the others.
+
+        :param rate: Messages per second each source may sustain; None disables the token bucket.
+        :param burst: Bucket size, the messages a quiet source may send back to back. Defaults to rate, at least 1.
+        :param duplicate_window: Seconds during which a message identical to one already let through from
+                                 the same source is dropped; 0 disables duplicate suppression.
+        :param max_sources: Sources tracked; the least recently seen are forgotten first.
+        :param max_recent: Distinct recent messages remembered per source for duplicate suppression.
+        :param clock: Monotonic clock in seconds, replaceable for tests.
+        """
+        self.rate = rate
+        self.burst = burst if burst else max(rate or 1, 1)
+        self.duplicate_window = duplicate_window
+        self.max_sources = max_sources
+        self.max_recent = max_recent
+        self.clock = clock
+        self._sources = OrderedDict()  # Source IP to _SourceState
+        self._lock = Lock()
+
+    def allow(self, source, key=None):
+        """
+        Decides whether one message from source goes on to authentication and validation.
+
+        :param source: The sender's IP address.
+        :param key: A hashable identity of the message, such as the raw datagram, for duplicate suppression.
+        :return: False if the message is a recent duplicate or the source is over its rate.
+        """
+        now = self.clock()
+        with self._lock:
+            state = self._sources.get(source)
+            if state is None:
+                state = self._sources[source] = _SourceState(self.burst, now)
+                while len(self._sources) > self.max_sources:
+                    self._sources.popitem(last=False)
+            else:
+                self._sources.move_to_end(source)
+
+            window = self.duplicate_window
+            if key is not None and window:
+                seen = state.recent.get(key)
+                if seen is not None and now - seen < window:
+                    state.duplicates += 1
+                    return False
+
+            if self.rate:
+                tokens = min(self.burst, state.tokens + (now - state.updated) * self.rate)
+                state.updated = now
+                if tokens < 1:
+                    state.tokens = tokens
+                    state.rate_limited += 1
+                    return False
+                state.tokens = tokens - 1
+
+            if key is not None and window:
+                state.recent[key] = now
+                state.recent.move_to_end(key)
+                if len(state.recent) > self.max_recent:
+                    state.recent.popitem(last=False)
+            state.allowed += 1
+            return True
+
+    def stats(self):
+        """Returns {source ip: {'allowed': n, 'rate_limited': m, 'duplicates': d}}."""
+        with self._lock:
+            return {source: {'allowed': state.allowed, 'rate_limited': state.rate_limited, 'duplicates': state.duplicates}
+                    for source, state in self._sources.items()}
+
+    def drops(self, source):
+        """Returns the number of messages dropped from source, by rate or as duplicates."""
+        state = self._sources.get(source)
+        return state.rate_limited + state.duplicates if state else 0
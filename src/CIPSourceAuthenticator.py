@@ -0,0 +1,78 @@
+import hmac
+import time
+from collections import OrderedDict
+from threading import Lock
+
+class CIPSourceAuthenticator:
+    def __init__(self, shared_secret, positive_ttl=10.0, negative_ttl=5.0, max_sources=4096, clock=time.monotonic):
+        """
+        Initializes the per-source authentication stage that runs before any message parsing.
+
+        Secrets are compared in constant time. A source that presents the right secret is trusted for
+        positive_ttl seconds and its messages skip the comparison, so keep that window short where
+        source addresses can be spoofed. A source that is not trusted and presents a wrong secret is
+        blocked for negative_ttl seconds, so a flood from it is dropped before its datagrams are even
+        decoded; a trusted source is never blocked.
+
+        :param shared_secret: The configured shared secret.
+        :param positive_ttl: Seconds a source stays trusted after a good secret; 0 checks every message.
+        :param negative_ttl: Seconds an untrusted source stays blocked after a bad secret; 0 never blocks.
+        :param max_sources: Sources remembered; the least recently seen are forgotten first.
+        :param clock: Monotonic clock in seconds, replaceable for tests.
+        """
+        self._secret = shared_secret.encode('utf-8')
+        self.positive_ttl = positive_ttl
+        self.negative_ttl = negative_ttl
+        self.max_sources = max_sources
+        self.clock = clock
+        self._sources = OrderedDict()  # Source IP to (expiry, trusted)
+        self._lock = Lock()  # The TCP and UDP paths may run in different threads under the event bus
+        self.counters = {'trusted_hits': 0, 'accepted': 0, 'rejected': 0, 'blocked': 0}
+
+    def check_secret(self, provided):
+        """Compares a provided secret with the configured one in constant time."""
+        return hmac.compare_digest(provided.encode('utf-8'), self._secret)
+
+    def is_blocked(self, source):
+        """Returns True if the source is blocked after a bad secret, counting the dropped message."""
+        entry = self._sources.get(source)
+        if entry is None or entry[1] or entry[0] <= self.clock():
+            return False
+        self.counters['blocked'] += 1
+        return True
+
+    def authenticate(self, source, provided):
+        """
+        Authenticates one message from source presenting the secret provided.
+
+        :return: True if the message may go on to validation.
+        """
+        now = self.clock()
+        with self._lock:
+            entry = self._sources.get(source)
+            trusted = entry is not None and entry[1] and entry[0] > now
+            if trusted:
+                self.counters['trusted_hits'] += 1
+                return True
+            if self.check_secret(provided):
+                self.counters['accepted'] += 1
+                if self.positive_ttl:
+                    self._remember(source, now + self.positive_ttl, True)
+                return True
+            self.counters['rejected'] += 1
+            if self.negative_ttl:
+                self._remember(source, now + self.negative_ttl, False)
+            return False
+
+    def _remember(self, source, expiry, trusted):
+        self._sources[source] = (expiry, trusted)
+        self._sources.move_to_end(source)
+        while len(self._sources) > self.max_sources:
+            self._sources.popitem(last=False)
+
+    def forget(self, source):
+        with self._lock:
+            self._sources.pop(source, None)
+
+    def stats(self):
+        return dict(self.counters, sources=len(self._sources))
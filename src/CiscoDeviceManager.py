@@ -3,6 +3,7 @@ import asyncssh
 import requests
 from typing import Optional, Dict
 from CIPEventManager import CIPEventManager  # Ensure this is correctly imported
+from PipelineMetrics import PipelineMetrics
 
 class CiscoDeviceManager:
     def __init__(self, default_device_config: Dict[str, any], external_handler=None, logger=None):
@@ -11,7 +12,6 @@ class CiscoDeviceManager:
         :param device_config: A dictionary containing device parameters.
         """
         self.default_device_config = default_device_config
-        self.connection = None
         self.device_logger = logger
 
     async def fetch_credentials(self, ip: str) -> Optional[Dict[str, str]]:
@@ -34,7 +34,7 @@ class CiscoDeviceManager:
         """
         event_id = kw['event_id']
         event_manager = CIPEventManager()
-        event = await event_manager.get_event(event_id)
+        event = event_manager.get_event(event_id)
 
         if event:
             ip = event.ip  # Assuming the event object has an 'ip' attribute
@@ -52,32 +52,31 @@ class CiscoDeviceManager:
                 'known_hosts': None  # You should handle known hosts in a production environment
             })
 
-            # Attempt to connect and retrieve logs
+            # Attempt to connect and retrieve logs. The connection belongs to this call only, so
+            # events can be retrieved concurrently when the event bus runs several workers.
             try:
                 async with asyncssh.connect(**device_config) as conn:
-                    self.connection = conn
-                    log_output = await self.retrieve_events(event_id)
+                    log_output = await self.retrieve_events(event_id, conn)
                     self.device_logger.info(f"Logs retrieved for event {event_id}: {log_output}")
+                self.device_logger.warning("Disconnected from the device successfully.")
             except (asyncssh.Error, Exception) as e:
                 self.device_logger.error(f"SSH connection failed: {e}")
-            finally:
-                if self.connection:
-                    await self.connection.close()
-                    self.device_logger.warning("Disconnected from the device successfully.")
         else:
             self.device_logger.error(f"Failed to retrieve event data for event_id: {event_id}")
 
-    async def retrieve_events(self, event_id: str) -> str:
+    async def retrieve_events(self, event_id: str, connection) -> str:
         """
         Retrieves logs or events from the Cisco device.
+        :param connection: The open asyncssh connection to the event's device.
         Returns the event log as a string.
         """
-        if not self.connection:
+        if not connection:
             self.device_logger.warning("Not connected to any device.")
             return ""
 
+        PipelineMetrics.get_instance().mark(event_id, 'upload_request')
         #TODO: push this ip (1.1.1.1) into configuration
-        log_output = await self.connection.run(f'copy event-logging upload tftp://1.1.1.1/{event_id}.tar.gz')
+        log_output = await connection.run(f'copy event-logging upload tftp://1.1.1.1/{event_id}.tar.gz')
         self.device_logger.info(log_output)
         return log_output.stdout
 
@@ -1,9 +1,104 @@
 import re
+from pydispatch import dispatcher
+from CIPEventManager import CIPEventManager
+
+# Characters that end a literal run at the start of a pattern
+_REGEX_SPECIAL = frozenset('.^$*+?{}[]|()')
+# Numbered backreferences would point at the wrong group once patterns are combined
+_NUMBERED_BACKREFERENCE = re.compile(r'(?<!\\)(?:\\\\)*\\[1-9]')
+# Constructs that would see neighbouring lines when a whole window is scanned as one string
+_LINE_SENSITIVE = re.compile(r'\\[AZ]|\(\?<?[=!]')
+
+def _has_top_level_alternation(pattern):
+    """ Returns True if the pattern has a '|' outside any group or character class. """
+    depth = 0
+    in_class = False
+    i = 0
+    while i < len(pattern):
+        c = pattern[i]
+        if c == '\\':
+            i += 2
+            continue
+        if in_class:
+            if c == ']':
+                in_class = False
+        elif c == '[':
+            in_class = True
+            if pattern[i + 1:i + 2] == ']':
+                i += 1  # A leading ']' is a literal inside the class
+        elif c == '(':
+            depth += 1
+        elif c == ')':
+            depth -= 1
+        elif c == '|' and depth == 0:
+            return True
+        i += 1
+    return False
+
+def _split_literal(pattern):
+    """
+    Splits a pattern into its leading literal run, which every match must start with, and the
+    remaining pattern text. Returns ('', pattern) if there is no literal that can be relied upon.
+    """
+    if pattern.startswith('^') or _has_top_level_alternation(pattern):
+        return '', pattern
+    literal = []
+    i = 0
+    while i < len(pattern):
+        c = pattern[i]
+        if c == '\\':
+            escaped = pattern[i + 1:i + 2]
+            if not escaped or escaped.isalnum():
+                break  # Character classes (\d, \s) and anchors (\b, \A) are not literals
+            step = 2
+            c = escaped
+        elif c in _REGEX_SPECIAL:
+            break
+        else:
+            step = 1
+        if pattern[i + step:i + step + 1] in ('*', '+', '?', '{'):
+            break  # Leave a quantified character with its quantifier
+        literal.append(c)
+        i += step
+    return ''.join(literal), pattern[i:]
+
+def _trie_alternation(branches):
+    """
+    Builds an alternation of (literal, regex) branches with common literal prefixes factored out,
+    so the regex engine compares each leading character once instead of once per branch.
+    """
+    trie = {}
+    for literal, regex in branches:
+        node = trie
+        for c in literal:
+            node = node.setdefault(c, {})
+        node.setdefault(None, []).append(regex)
+
+    def emit(node):
+        alternatives = list(node.get(None, []))
+        for c, child in node.items():
+            if c is not None:
+                alternatives.append(re.escape(c) + emit(child))
+        if len(alternatives) == 1:
+            return alternatives[0]
+        return '(?:' + '|'.join(alternatives) + ')'
+
+    return emit(trie)
 
 class ErrorCodeMapper:
-    def __init__(self, initial_map=None):
+    # Shortest leading literal a pattern needs for the prefilter to be used
+    MIN_PREFILTER_LITERAL = 3
+
+    def __init__(self, initial_map=None, compiled=False):
+        """
+        :param initial_map: Optional mapping of error code to regex pattern, checked in insertion order.
+        :param compiled: When True, all patterns are merged into one alternation so each log entry is
+                         scanned once, behind a literal prefilter when every pattern has a leading literal.
+        """
         # Initialize the error_map with an optional initial mapping from a configuration file
         self.error_map = {}
+        self.compiled = compiled
+        self._combined = None
         if initial_map:
             for error_code, regex_pattern in initial_map.items():
                 self.add_error_code(error_code, regex_pattern)
@@ -11,10 +106,141 @@ class ErrorCodeMapper:
     def add_error_code(self, error_code, regex_pattern):
         """ Adds or updates an error code and its corresponding regex pattern to the mapper. """
         self.error_map[error_code] = re.compile(regex_pattern)
+        self._combined = None  # Rebuilt on the next compiled lookup
 
     def find_error_code(self, log_entry):
         """ Checks if the log entry matches any of the regex patterns and returns the corresponding error code. """
+        if self.compiled and self._get_combined():
+            return self._find_error_code_combined(log_entry)
         for error_code, pattern in self.error_map.items():
             if pattern.search(log_entry):
                 return error_code
         return None  # Return None if no error code matches
+
+    def _get_combined(self):
+        """
+        Returns the (prefilter, combined pattern, group index to priority, codes, patterns, bulk pattern) tuple,
+        building it on first use, or False if the patterns cannot be safely combined.
+        """
+        if self._combined is None:
+            self._combined = self._build_combined()
+        return self._combined
+
+    def _build_combined(self):
+        codes = list(self.error_map)
+        patterns = list(self.error_map.values())
+        if not patterns or len({pattern.flags for pattern in patterns}) != 1:
+            return False
+        if any(_NUMBERED_BACKREFERENCE.search(pattern.pattern) for pattern in patterns):
+            return False
+        if any(pattern.flags & re.VERBOSE for pattern in patterns):
+            return False  # Whitespace is not literal in verbose patterns
+        splits = [_split_literal(pattern.pattern) for pattern in patterns]
+        # Each pattern's literal prefix is factored into a trie; its named group wraps the rest
+        alternation = _trie_alternation(
+            (literal, f'(?P<_ecm{i}>{remainder})') for i, (literal, remainder) in enumerate(splits))
+        try:
+            combined = re.compile(alternation, patterns[0].flags)
+        except re.error:
+            return False  # e.g. the same group name used in two patterns
+        # The outer group of an alternative closes after any groups nested in it, so lastindex names it
+        priorities = {combined.groupindex[f'_ecm{i}']: i for i in range(len(patterns))}
+
+        prefilter = None
+        if all(len(literal) >= self.MIN_PREFILTER_LITERAL for literal, _ in splits):
+            # A line that contains none of the literal prefixes cannot match any pattern
+            literals = {literal for literal, _ in splits}
+            prefilter = re.compile(_trie_alternation((literal, '') for literal in literals), patterns[0].flags)
+        # The same alternation in MULTILINE mode scans a newline-joined window with per-line ^ and $
+        bulk = None
+        if not any(_LINE_SENSITIVE.search(pattern.pattern) for pattern in patterns):
+            bulk = re.compile(alternation, patterns[0].flags | re.MULTILINE)
+        return prefilter, combined, priorities, codes, patterns, bulk
+
+    def _find_error_code_combined(self, log_entry):
+        prefilter, combined, priorities, codes, patterns, _ = self._combined
+        if prefilter is not None and not prefilter.search(log_entry):
+            return None
+        match = combined.search(log_entry)
+        if match is None:
+            return None
+        priority = priorities[match.lastindex]
+        # The alternation finds the leftmost match; an earlier pattern may still match further right
+        for earlier in range(priority):
+            if patterns[earlier].search(log_entry):
+                return codes[earlier]
+        return codes[priority]
+
+    def classify_logs(self, categorized_logs):
+        """
+        Classifies a whole event's log windows, such as CIPEventData.categorized_logs, in one pass per
+        category. Each category is joined into a single string and scanned with the combined pattern,
+        so Python only runs for lines that match; every line is classified as find_error_code would.
+
+        :param categorized_logs: A dictionary of category to a list or LogWindow of log lines.
+        :return: A dictionary with 'category_counts' ({category: {error_code: hits}}), 'first_matches'
+                 ({error_code: first matching line}) and 'error_code' (the highest priority code hit, or None).
+        """
+        category_counts = {}
+        first_matches = {}
+        combined = self._get_combined()
+        for category, lines in categorized_logs.items():
+            if combined and combined[5] is not None:
+                hits = self._classify_joined(lines, combined)
+            else:
+                hits = ((line, self.find_error_code(line)) for line in lines)
+            counts = {}
+            for line, error_code in hits:
+                if error_code is None:
+                    continue
+                counts[error_code] = counts.get(error_code, 0) + 1
+                first_matches.setdefault(error_code, line)
+            category_counts[category] = counts
+
+        error_code = next((code for code in self.error_map if code in first_matches), None)
+        return {'category_counts': category_counts, 'first_matches': first_matches, 'error_code': error_code}
+
+    def _classify_joined(self, lines, combined):
+        """
+        Yields (line, error_code) for each matching line of the window, scanning the joined text
+        with the bulk pattern and only dropping into Python at each hit.
+        """
+        _, _, priorities, codes, patterns, bulk = combined
+        # A LogWindow already holds the joined text as one buffer
+        text = lines.text() if hasattr(lines, 'text') else '\n'.join(lines)
+        position = 0
+        while True:
+            match = bulk.search(text, position)
+            if match is None:
+                return
+            line_start = text.rfind('\n', 0, match.start()) + 1
+            line_end = text.find('\n', match.start())
+            if line_end < 0:
+                line_end = len(text)
+            line = text[line_start:line_end]
+            priority = priorities[match.lastindex]
+            if match.end() > line_end or not patterns[priority].search(line):
+                # The match ran into the next line or relied on it; classify the line on its own
+                error_code = self.find_error_code(line)
+            else:
+                error_code = codes[priority]
+                for earlier in range(priority):
+                    if patterns[earlier].search(line):
+                        error_code = codes[earlier]
+                        break
+            if error_code is not None:
+                yield line, error_code
+            position = line_end + 1
+
+    def handle_log_processing_completed(self, sender, **kwargs):
+        """
+        Classifies the log windows attached to an event and emits ErrorCodeClassified with the
+        error code to report back to the PLC.
+        """
+        event_id = kwargs['event_id']
+        event = CIPEventManager.get_instance().get_event(event_id)
+        if not event or not event.categorized_logs:
+            return
+        classification = self.classify_logs(event.categorized_logs)
+        dispatcher.send(signal="ErrorCodeClassified", sender=self, event_id=event_id,
+                        error_code=classification['error_code'], classification=classification)
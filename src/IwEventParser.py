@@ -1,16 +1,159 @@
 from datetime import datetime, timedelta
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
 from pydispatch import dispatcher
 from CIPEventManager import CIPEventManager
+from PipelineMetrics import PipelineMetrics
+import io
 import os
 
+IW_TIMESTAMP_FORMAT = "%m/%d/%Y %H:%M:%S.%f"
+_EPOCH = datetime(1970, 1, 1)
+_ONE_MICROSECOND = timedelta(microseconds=1)
+_DAYS_BEFORE_MONTH = (0, 0, 31, 59, 90, 120, 151, 181, 212, 243, 273, 304, 334)
+_DAYS_IN_MONTH = (0, 31, 28, 31, 30, 31, 30, 31, 31, 30, 31, 30, 31)
+_EPOCH_ORDINAL = 719163  # datetime(1970, 1, 1).toordinal()
+
+def parse_iw_timestamp_us(date_str):
+    """
+    Converts an IW9165 'MM/DD/YYYY HH:MM:SS.ffffff' timestamp into integer microseconds since
+    1970-01-01 (naive wall-clock time, as written by the AP). Fixed-width stamps are sliced at
+    known offsets; anything else falls back to datetime.strptime.
+
+    :param date_str: The timestamp text without the surrounding brackets.
+    :return: Microseconds since the epoch as an int.
+    :raises ValueError: If the timestamp cannot be parsed.
+    """
+    if (len(date_str) == 26 and date_str[2] == '/' and date_str[5] == '/' and date_str[10] == ' '
+            and date_str[13] == ':' and date_str[16] == ':' and date_str[19] == '.'):
+        digits = (date_str[0:2] + date_str[3:5] + date_str[6:10] + date_str[11:13]
+                  + date_str[14:16] + date_str[17:19] + date_str[20:26])
+        if digits.isdigit():
+            try:
+                month = int(digits[0:2])
+                day = int(digits[2:4])
+                year = int(digits[4:8])
+                hour = int(digits[8:10])
+                minute = int(digits[10:12])
+                second = int(digits[12:14])
+                fraction = int(digits[14:20])
+            except ValueError:
+                pass  # Non-ASCII digits; let strptime decide
+            else:
+                leap = year % 4 == 0 and (year % 100 != 0 or year % 400 == 0)
+                if (year >= 1 and 1 <= month <= 12 and hour < 24 and minute < 60 and second < 60
+                        and 1 <= day <= _DAYS_IN_MONTH[month] + (month == 2 and leap)):
+                    y = year - 1
+                    days = (y * 365 + y // 4 - y // 100 + y // 400 + _DAYS_BEFORE_MONTH[month]
+                            + (month > 2 and leap) + day - _EPOCH_ORDINAL)
+                    return (days * 86400 + hour * 3600 + minute * 60 + second) * 1000000 + fraction
+    log_datetime = datetime.strptime(date_str.replace('*', '').strip(), IW_TIMESTAMP_FORMAT)
+    return (log_datetime - _EPOCH) // _ONE_MICROSECOND
+
+def parse_line_timestamp_us(line):
+    """
+    Parses the bracketed timestamp at the start of a log line into epoch microseconds.
+
+    :raises ValueError: If the line does not carry a valid timestamp.
+    """
+    # Skip the leading asterisk IW9165 uses to flag some entries
+    end_bracket = line.find(']')
+    date_str = line[2:end_bracket] if line[1:2] == '*' else line[1:end_bracket]
+    return parse_iw_timestamp_us(date_str)
+
+def filter_window_lines(lines, start_window, end_window):
+    """
+    Collects the bracketed log lines that fall inside the window, stopping at the first
+    line past the end of the window.
+
+    :param lines: An iterable of decoded log lines.
+    :param start_window: Start of the window in epoch microseconds (inclusive).
+    :param end_window: End of the window in epoch microseconds (inclusive).
+    :return: A tuple of (stripped entries within the window, stripped lines with unparsable dates).
+    """
+    events_within_window = []
+    malformed = []
+    for line in lines:
+        if line.startswith('['):
+            try:
+                log_us = parse_line_timestamp_us(line)
+            except ValueError:
+                malformed.append(line.strip())
+                continue
+            if log_us < start_window:
+                continue  # Skip this line if it's before the start of the window
+            if log_us > end_window:
+                break  # Stop processing if past the end of the window
+            events_within_window.append(line.strip())
+    return events_within_window, malformed
+
+def filter_windows_lines(lines, windows):
+    """
+    Collects the lines for several windows in one sweep. Each window gets exactly the lines a
+    single-window filter_window_lines call would give it, including stopping at its first
+    line past the end, and lines shared between overlapping windows are the same str object.
+
+    :param lines: An iterable of decoded log lines.
+    :param windows: A list of (key, start, end) tuples in epoch microseconds.
+    :return: A tuple of ({key: stripped entries}, stripped lines with unparsable dates).
+    """
+    results = {key: [] for key, _, _ in windows}
+    malformed = []
+    # Ordered by start so the inner loop can stop at the first window that has not begun yet
+    open_windows = sorted(windows, key=lambda window: window[1])
+    for line in lines:
+        if not open_windows:
+            break  # Every window has seen a line past its end
+        if line.startswith('['):
+            try:
+                log_us = parse_line_timestamp_us(line)
+            except ValueError:
+                malformed.append(line.strip())
+                continue
+            entry = None
+            closed = False
+            for key, start_window, end_window in open_windows:
+                if log_us < start_window:
+                    break
+                if log_us > end_window:
+                    closed = True
+                    continue
+                if entry is None:
+                    entry = line.strip()
+                results[key].append(entry)
+            if closed:
+                open_windows = [window for window in open_windows if window[2] >= log_us]
+    return results, malformed
+
+def _filter_bytes_in_window(data, start_window, end_window):
+    """
+    Process-pool entry point: filters a whole log file passed in as bytes.
+    """
+    with io.TextIOWrapper(io.BytesIO(data), encoding='utf-8', errors='replace') as lines:
+        return filter_window_lines(lines, start_window, end_window)
+
 class IwEventParser:
-    def __init__(self, fs, logger, event_window = 2):
+    def __init__(self, fs, logger, event_window = 2, seek_mode = False, index_cache = None,
+                 parse_workers = 0, parse_executor = 'thread'):
         """
         Initializes the IwEventParser with a virtual filesystem and a logger.
+
+        :param seek_mode: When True, bisect on byte offsets to find the start of the
+                          time window instead of scanning the file from the beginning.
+        :param index_cache: Optional LogIndexCache; when set, each file is indexed once and
+                            later window queries jump straight to the nearest indexed offset.
+        :param parse_workers: When greater than 1, the files of an extraction are filtered in parallel
+                              on a pool of this many workers.
+        :param parse_executor: 'thread' to share the filesystem and index cache with the workers, or
+                               'process' to ship each file's bytes to a process pool.
         """
         self.fs = fs
         self.logger = logger
         self.event_window = event_window
+        self.seek_mode = seek_mode
+        self.index_cache = index_cache
+        self.parse_workers = parse_workers
+        self.parse_executor = parse_executor
+        self._executor = None
         dispatcher.connect(self.handle_extraction_completed, signal="ExtractionCompleted", sender=dispatcher.Any)
 
     def handle_extraction_completed(self, sender, **kwargs):
@@ -18,39 +161,135 @@ class IwEventParser:
         directory = kwargs['directory']
         extracted_items = kwargs['extracted_items']
         event_id = kwargs['event_id']
+        # A streaming extractor has already filtered each member on the way out of the tarball
+        streamed_results = kwargs.get('log_results')
         self.logger.info(f"Handling extracted data in directory: {directory} with items: {extracted_items}")
 
-        # Assume some way to determine the base timestamp and window, possibly from filename or metadata
-        base_timestamp = '01/01/2020 12:00:00.000'
+        base_timestamp = self._base_timestamp(event_id)
 
         log_results = {}
-        # Process each item that was extracted
-        for filepath in extracted_items:
-            filename = os.path.basename(filepath)
-            self.set_filename(filepath)  # Set the file to be processed
-            if self.is_file_non_empty():
-                filtered_logs = self.filter_events_by_time_window(base_timestamp, self.event_window)
-                if filtered_logs:
-                    # Store logs keyed by filename without the extension
-                    file_key = os.path.splitext(filename)[0]
-                    log_results[file_key] = filtered_logs
+        if streamed_results is not None:
+            log_results = streamed_results
+        elif self.parse_workers > 1 and len(extracted_items) > 1:
+            log_results = self._filter_files_parallel(extracted_items, base_timestamp, self.event_window)
+        else:
+            # Process each item that was extracted
+            for filepath in extracted_items:
+                filename = os.path.basename(filepath)
+                self.set_filename(filepath)  # Set the file to be processed
+                if self.is_file_non_empty():
+                    filtered_logs = self.filter_events_by_time_window(base_timestamp, self.event_window)
+                    if filtered_logs:
+                        # Store logs keyed by filename without the extension
+                        file_key = os.path.splitext(filename)[0]
+                        log_results[file_key] = filtered_logs
         
         # If there are any logs to add, add them to the event.
         if log_results:
             manager.add_categorized_logs_to_event(event_id, log_results)
 
+        PipelineMetrics.get_instance().mark(event_id, 'parse')
         # Optionally emit an event if other systems need to react to the completion of log processing
         dispatcher.send(signal="LogProcessingCompleted", sender=self, event_id=event_id)
 
-    def _check_file_content(self):
+    def _base_timestamp(self, event_id):
+        # Assume some way to determine the base timestamp and window, possibly from filename or metadata
+        return '01/01/2020 12:00:00.000'
+
+    def handle_member_stream(self, event_id, member_name, stream):
+        """
+        Filters one tar member straight from its decompressed stream, without staging it in the
+        filesystem. Intended as the stream_handler of a streaming TarFileExtractor.
+
+        :param event_id: The event the tarball was uploaded for.
+        :param member_name: The member's name inside the tarball.
+        :param stream: A binary file object positioned at the start of the member.
+        :return: A list of log entries within the time window.
+        """
+        return self.filter_stream(stream, self._base_timestamp(event_id), self.event_window, name=member_name)
+
+    def filter_stream(self, stream, base_timestamp, time_window_seconds, name='<stream>'):
+        """
+        Filters log entries within the time window from a binary stream, reading lines lazily and
+        stopping at the first line past the window, so only the window is ever held in memory.
+
+        :param stream: A binary file object or any iterable of byte lines.
+        :param base_timestamp: The central timestamp in the format 'MM/DD/YYYY HH:MM:SS.ffffff'.
+        :param time_window_seconds: The time window in seconds around the base timestamp.
+        :param name: Name used when logging read errors.
+        :return: A list of log entries within the time window.
+        """
+        start_window, end_window = self._window_bounds(base_timestamp, time_window_seconds)
+        events_within_window = []
+        try:
+            lines = (line.decode('utf-8', errors='replace') for line in stream)
+            events_within_window = self._collect_window(lines, start_window, end_window)
+        except Exception as e:
+            self.logger.error(f"Error reading from {name}: {str(e)}")
+        return events_within_window
+
+    def _filter_files_parallel(self, filepaths, base_timestamp, time_window_seconds):
+        """
+        Filters every non-empty file on the worker pool and merges the results keyed by
+        filename without the extension, as the sequential loop does.
+        """
+        start_window, end_window = self._window_bounds(base_timestamp, time_window_seconds)
+        executor = self._get_executor()
+        futures = {}
+        for filepath in filepaths:
+            if not self._check_file_content(filepath):
+                continue
+            if self.parse_executor == 'process':
+                try:
+                    data = self.fs.readbytes(filepath)
+                except Exception as e:
+                    self.logger.error(f"Error reading from {filepath}: {str(e)}")
+                    continue
+                futures[filepath] = executor.submit(_filter_bytes_in_window, data, start_window, end_window)
+            else:
+                futures[filepath] = executor.submit(self._filter_file, filepath, start_window, end_window)
+
+        log_results = {}
+        for filepath, future in futures.items():
+            try:
+                if self.parse_executor == 'process':
+                    filtered_logs = self._log_malformed(*future.result())
+                else:
+                    filtered_logs = future.result()
+            except Exception as e:
+                self.logger.error(f"Error filtering {filepath}: {str(e)}")
+                continue
+            if filtered_logs:
+                file_key = os.path.splitext(os.path.basename(filepath))[0]
+                log_results[file_key] = filtered_logs
+        return log_results
+
+    def _get_executor(self):
+        if self._executor is None:
+            if self.parse_executor == 'process':
+                self._executor = ProcessPoolExecutor(max_workers=self.parse_workers)
+            else:
+                self._executor = ThreadPoolExecutor(max_workers=self.parse_workers, thread_name_prefix='IwEventParser')
+        return self._executor
+
+    def shutdown(self):
+        """
+        Shuts down the parse worker pool, if one was started.
+        """
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
+
+    def _check_file_content(self, filename=None):
         """
         Checks if the file is not zero bytes by accessing the 'details' namespace.
         """
+        filename = filename or self.filename
         try:
-            info = self.fs.getinfo(self.filename, namespaces=['details'])
+            info = self.fs.getinfo(filename, namespaces=['details'])
             return info.get('details', 'size', 0) > 0
         except Exception as e:
-            self.logger.error(f"Error checking content for {self.filename}: {str(e)}")
+            self.logger.error(f"Error checking content for {filename}: {str(e)}")
             return False
 
     def read_ten_lines(self):
@@ -90,37 +329,223 @@ class IwEventParser:
         :param time_window_seconds: The time window in seconds around the base timestamp.
         :return: A list of log entries within the time window.
         """
-        base_datetime = datetime.strptime(base_timestamp, "%m/%d/%Y %H:%M:%S.%f")
-        time_delta = timedelta(seconds=time_window_seconds)
-        
-        start_window = base_datetime - time_delta
-        end_window = base_datetime + time_delta
-        
+        start_window, end_window = self._window_bounds(base_timestamp, time_window_seconds)
+        return self._filter_file(self.filename, start_window, end_window)
+
+    def filter_events_by_time_windows(self, queries):
+        """
+        Filters the current file for several time windows in one sorted sweep, e.g. for a burst
+        of faults from the same device. Each event gets the same lines that
+        filter_events_by_time_window would return for its window alone.
+
+        :param queries: A list of (event_id, base_timestamp, time_window_seconds) tuples.
+        :return: A dictionary of event_id to the list of log entries within its window.
+        """
+        windows = []
+        for event_id, base_timestamp, time_window_seconds in queries:
+            windows.append((event_id,) + self._window_bounds(base_timestamp, time_window_seconds))
+        return self._filter_file_windows(self.filename, windows)
+
+    def filter_files_by_time_windows(self, filepaths, queries):
+        """
+        Runs filter_events_by_time_windows over each non-empty file.
+
+        :return: A dictionary of event_id to {filename without extension: log entries}, holding
+                 only the files with entries for that event, like the log_results of one event.
+        """
+        windows = []
+        for event_id, base_timestamp, time_window_seconds in queries:
+            windows.append((event_id,) + self._window_bounds(base_timestamp, time_window_seconds))
+        event_results = {event_id: {} for event_id, _, _ in windows}
+        for filepath in filepaths:
+            if not self._check_file_content(filepath):
+                continue
+            file_key = os.path.splitext(os.path.basename(filepath))[0]
+            for event_id, filtered_logs in self._filter_file_windows(filepath, windows).items():
+                if filtered_logs:
+                    event_results[event_id][file_key] = filtered_logs
+        return event_results
+
+    def _filter_file_windows(self, filename, windows):
+        results = {event_id: [] for event_id, _, _ in windows}
+        if not windows:
+            return results
+        try:
+            with self.fs.open(filename, 'rb') as file:
+                file.seek(self._start_offset(filename, file, min(window[1] for window in windows)))
+                lines = (line.decode('utf-8', errors='replace') for line in iter(file.readline, b''))
+                results = self._log_malformed(*filter_windows_lines(lines, windows))
+        except Exception as e:
+            self.logger.error(f"Error reading from {filename}: {str(e)}")
+        return results
+
+    def _window_bounds(self, base_timestamp, time_window_seconds):
+        """
+        Returns the (start, end) of the window as integer epoch microseconds, so every
+        comparison against a log line is an int compare.
+        """
+        base_us = parse_iw_timestamp_us(base_timestamp)
+        time_delta_us = timedelta(seconds=time_window_seconds) // _ONE_MICROSECOND
+        return base_us - time_delta_us, base_us + time_delta_us
+
+    def _filter_file(self, filename, start_window, end_window):
+        """
+        Filters one file with the configured strategy. Safe to call from worker threads as it
+        does not touch the current filename.
+        """
+        if self.index_cache is not None or self.seek_mode:
+            return self._filter_events_from_offset(filename, start_window, end_window)
+
         events_within_window = []
 
         try:
-            with self.fs.open(self.filename, 'r') as file:
-                for line in file:
-                    if line.startswith('['):
-                        try:
-                            # Remove the asterisk and parse the datetime from the log line
-                            end_bracket = line.find(']')
-                            date_str = line[1:end_bracket].replace('*', '').strip()
-                            log_datetime = datetime.strptime(date_str, "%m/%d/%Y %H:%M:%S.%f")
-                            
-                            if log_datetime < start_window:
-                                continue  # Skip this line if it's before the start of the window
-                            if log_datetime > end_window:
-                                break  # Stop processing if past the end of the window
-                            
-                            events_within_window.append(line.strip())
-                        except ValueError:
-                            self.logger.error(f"Error parsing date from line: {line.strip()}")
-                            continue
+            with self.fs.open(filename, 'r') as file:
+                events_within_window = self._collect_window(file, start_window, end_window)
         except Exception as e:
-            self.logger.error(f"Error reading from {self.filename}: {str(e)}")
+            self.logger.error(f"Error reading from {filename}: {str(e)}")
         
         return events_within_window
+
+    def _collect_window(self, lines, start_window, end_window):
+        """
+        Collects the log lines inside the window and reports any lines with unparsable dates.
+
+        :param lines: An iterable of decoded log lines.
+        :return: A list of stripped log entries within the time window.
+        """
+        return self._log_malformed(*filter_window_lines(lines, start_window, end_window))
+
+    def _log_malformed(self, events_within_window, malformed):
+        for line in malformed:
+            self.logger.error(f"Error parsing date from line: {line}")
+        return events_within_window
+
+    def _filter_events_from_offset(self, filename, start_window, end_window):
+        """
+        Filters log entries by jumping to the cached index sample or bisected byte offset just
+        before the start of the window and scanning forward from there. Assumes the log is
+        written in timestamp order, as IW9165 event logs are.
+        """
+        events_within_window = []
+        try:
+            with self.fs.open(filename, 'rb') as file:
+                file.seek(self._start_offset(filename, file, start_window))
+                lines = (line.decode('utf-8', errors='replace') for line in iter(file.readline, b''))
+                events_within_window = self._collect_window(lines, start_window, end_window)
+        except Exception as e:
+            self.logger.error(f"Error reading from {filename}: {str(e)}")
+        return events_within_window
+
+    def _start_offset(self, filename, file, start_window):
+        """
+        Returns the byte offset to start scanning from: the nearest cached index sample, the
+        bisected line start in seek mode, or the start of the file.
+        """
+        if self.index_cache is not None:
+            index = self._get_index(filename, file)
+            offset, timestamp = self.index_cache.seek_sample(index, start_window)
+            if timestamp is None or self._sample_matches(file, offset, timestamp):
+                return offset
+            # Same fingerprint but different content: the cached index belongs to another file
+            self.logger.warning(f"Cached index for {filename} does not match its content, rebuilding it")
+            index = self._build_index(filename, file, self.index_cache.stride)
+            self.index_cache.put(self.index_cache.make_key(filename, self.index_cache.fingerprint(file)), *index)
+            return self.index_cache.seek_offset(index, start_window)
+        if self.seek_mode:
+            return self._find_window_offset(file, start_window)
+        return 0
+
+    def _get_index(self, filename, file):
+        key = self.index_cache.make_key(filename, self.index_cache.fingerprint(file))
+        index = self.index_cache.get(key)
+        if index is None:
+            index = self._build_index(filename, file, self.index_cache.stride)
+            self.index_cache.put(key, *index)
+        return index
+
+    def _sample_matches(self, file, offset, timestamp):
+        """Returns True if a line starts at offset in the open binary file and carries timestamp."""
+        if offset > 0:
+            file.seek(offset - 1)
+            if file.read(1) != b'\n':
+                return False
+        else:
+            file.seek(0)
+        line = file.readline()
+        try:
+            return parse_line_timestamp_us(line.decode('utf-8', errors='replace')) == timestamp
+        except ValueError:
+            return False
+
+    def _build_index(self, filename, file, stride):
+        """
+        Samples every stride-th timestamped line of the open binary file.
+
+        :return: A tuple of (timestamps, offsets) lists in file order.
+        """
+        timestamps, offsets = [], []
+        file.seek(0)
+        line_offset = 0
+        count = 0
+        for line in iter(file.readline, b''):
+            if line.startswith(b'['):
+                if count % stride == 0:
+                    try:
+                        timestamps.append(parse_line_timestamp_us(line.decode('utf-8', errors='replace')))
+                        offsets.append(line_offset)
+                    except ValueError:
+                        count -= 1  # Sample the next well-formed line instead
+                count += 1
+            line_offset += len(line)
+        self.logger.debug(f"Indexed {filename}: {len(offsets)} samples over {line_offset} bytes")
+        return timestamps, offsets
+
+    def _find_window_offset(self, file, start_window):
+        """
+        Bisects the open binary file for the offset of the first timestamped line whose
+        timestamp is not before start_window.
+
+        :return: The byte offset of the start of that line (or the end of the file).
+        """
+        file.seek(0, os.SEEK_END)
+        low, high = 0, file.tell()
+        while low < high:
+            mid = (low + high) // 2
+            line_offset, log_us = self._next_timestamp(file, mid)
+            if log_us is None or log_us >= start_window:
+                high = mid
+            else:
+                low = line_offset + 1
+        return self._resync(file, low)
+
+    def _resync(self, file, position):
+        """
+        Moves to the start of the first line beginning at or after position and returns its offset.
+        """
+        if position > 0:
+            file.seek(position - 1)
+            file.readline()  # Discard the remainder of the line that position falls inside
+        else:
+            file.seek(0)
+        return file.tell()
+
+    def _next_timestamp(self, file, position):
+        """
+        Finds the first '['-prefixed line starting at or after position that carries a valid timestamp.
+
+        :return: A tuple of (line offset, epoch microseconds), or (end offset, None) if there is none.
+        """
+        line_offset = self._resync(file, position)
+        while True:
+            line = file.readline()
+            if not line:
+                return line_offset, None
+            if line.startswith(b'['):
+                try:
+                    return line_offset, parse_line_timestamp_us(line.decode('utf-8', errors='replace'))
+                except ValueError:
+                    pass  # Malformed lines are reported by the forward scan if they fall inside the window
+            line_offset += len(line)
     
     def cleanup_directory(self, directory):
         """
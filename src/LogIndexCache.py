@@ -0,0 +1,101 @@
+import hashlib
+import os
+from bisect import bisect_left
+from collections import OrderedDict
+from threading import Lock
+
+class LogIndexCache:
+    def __init__(self, max_entries=64, stride=256, fingerprint_bytes=65536):
+        """
+        Initializes an LRU cache of sparse timestamp indexes for extracted log files.
+
+        Entries are keyed by the file's base name and a content fingerprint rather than its full
+        path, so the same log re-extracted into a new extract_* directory reuses its index.
+
+        :param max_entries: The number of file indexes kept before the least recently used is evicted.
+        :param stride: Record one (timestamp, byte offset) pair for every stride timestamped lines.
+        :param fingerprint_bytes: Bytes hashed from each end of the file to fingerprint its content.
+        """
+        self.max_entries = max_entries
+        self.stride = stride
+        self.fingerprint_bytes = fingerprint_bytes
+        self._entries = OrderedDict()
+        self._lock = Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def fingerprint(self, file):
+        """
+        Fingerprints an open binary file by hashing its size plus its first and last blocks.
+        Files that differ only in the middle share a fingerprint, so the sampled line an index
+        points at is verified before a scan starts from it (see seek_sample).
+
+        :param file: A seekable file object opened in binary mode.
+        :return: A hex digest identifying the file content.
+        """
+        file.seek(0, os.SEEK_END)
+        size = file.tell()
+        digest = hashlib.blake2b(str(size).encode('ascii'), digest_size=16)
+        file.seek(0)
+        digest.update(file.read(self.fingerprint_bytes))
+        if size > self.fingerprint_bytes:
+            file.seek(max(self.fingerprint_bytes, size - self.fingerprint_bytes))
+            digest.update(file.read(self.fingerprint_bytes))
+        file.seek(0)
+        return digest.hexdigest()
+
+    def make_key(self, path, fingerprint):
+        return (os.path.basename(path), fingerprint)
+
+    def get(self, key):
+        """
+        Returns the (timestamps, offsets) index stored under key, or None, marking it recently used.
+        """
+        with self._lock:
+            index = self._entries.get(key)
+            if index is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return index
+
+    def put(self, key, timestamps, offsets):
+        """
+        Stores an index, evicting the least recently used entries beyond max_entries.
+
+        :param timestamps: Ascending epoch-microsecond timestamps of the sampled lines.
+        :param offsets: Byte offsets of the sampled lines, parallel to timestamps.
+        """
+        with self._lock:
+            self._entries[key] = (timestamps, offsets)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+    @staticmethod
+    def seek_offset(index, start_us):
+        """
+        Returns the offset of the last sampled line strictly before start_us, from which a forward
+        scan is guaranteed to reach every line inside the window.
+        """
+        return LogIndexCache.seek_sample(index, start_us)[0]
+
+    @staticmethod
+    def seek_sample(index, start_us):
+        """
+        Returns (offset, timestamp) of the last sampled line strictly before start_us, or (0, None)
+        when the scan starts at the beginning of the file. Callers check that the line at offset
+        still carries timestamp before trusting it, since the fingerprint does not cover the
+        middle of the file.
+        """
+        timestamps, offsets = index
+        position = bisect_left(timestamps, start_us) - 1
+        return (offsets[position], timestamps[position]) if position >= 0 else (0, None)
@@ -0,0 +1,102 @@
+from array import array
+
+class LogWindow:
+    """
+    A category's log window held as one contiguous UTF-8 buffer, lines separated by newlines, plus an
+    array of line start offsets, instead of one str object per line. It behaves as a read-only
+    sequence of str lines; lines are decoded when they are read.
+
+    The buffer is a bytearray grown in place, so appending a line costs its own length rather than
+    the whole window's. Copies share the buffer up to their own end and take a private one on their
+    first append after the other window has grown it.
+    """
+    __slots__ = ('_buffer', '_end', '_starts')
+
+    def __init__(self, lines=()):
+        self._buffer = bytearray()
+        self._end = 0  # Bytes of _buffer that belong to this window
+        self._starts = array('I')  # Byte offset where each line starts
+        if lines:
+            self.extend(lines)
+
+    def extend(self, lines):
+        """Appends lines, encoding only the new ones."""
+        parts = [line.encode('utf-8') for line in lines]
+        if not parts:
+            return
+        if len(self._buffer) != self._end:
+            self._buffer = self._buffer[:self._end]  # A shared buffer another window has grown
+        buffer = self._buffer
+        starts = self._starts
+        if starts:
+            buffer += b'\n'
+        for part in parts:
+            starts.append(len(buffer))
+            buffer += part
+            buffer += b'\n'
+        del buffer[-1]
+        self._end = len(buffer)
+
+    def append(self, line):
+        self.extend((line,))
+
+    def copy(self):
+        """Returns a LogWindow with the current lines; the buffer is shared, only the offsets are copied."""
+        window = LogWindow()
+        window._buffer = self._buffer
+        window._end = self._end
+        window._starts = array('I', self._starts)
+        return window
+
+    def clear(self):
+        self._buffer = bytearray()  # Replaced, not emptied, as copies may share it
+        self._end = 0
+        self._starts = array('I')
+
+    def __len__(self):
+        return len(self._starts)
+
+    def _line(self, index):
+        starts = self._starts
+        end = starts[index + 1] - 1 if index + 1 < len(starts) else self._end
+        return self._buffer[starts[index]:end].decode('utf-8')
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self._line(i) for i in range(*index.indices(len(self._starts)))]
+        if index < 0:
+            index += len(self._starts)
+        if not 0 <= index < len(self._starts):
+            raise IndexError("LogWindow index out of range")
+        return self._line(index)
+
+    def __iter__(self):
+        if not self._starts:
+            return iter(())
+        end = self._end
+        if self._buffer.count(b'\n', 0, end) == len(self._starts) - 1:
+            # No line has an embedded newline, so one decode and split yields every line
+            return iter(self._buffer[:end].decode('utf-8').split('\n'))
+        return (self._line(i) for i in range(len(self._starts)))
+
+    def text(self):
+        """Returns the whole window as one string, equal to '\\n'.join(lines), with a single decode."""
+        return self._buffer[:self._end].decode('utf-8')
+
+    @property
+    def nbytes(self):
+        """Bytes held by the buffer and the offset array."""
+        return self._end + self._starts.itemsize * len(self._starts)
+
+    def __eq__(self, other):
+        if isinstance(other, LogWindow):
+            return self._buffer[:self._end] == other._buffer[:other._end] and self._starts == other._starts
+        try:
+            return list(self) == list(other)
+        except TypeError:
+            return NotImplemented
+
+    __hash__ = None
+
+    def __repr__(self):
+        return f"LogWindow({list(self)!r})"
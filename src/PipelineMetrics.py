@@ -0,0 +1,161 @@
+import logging
+import math
+import time
+from collections import OrderedDict
+from threading import Lock
+
+class LatencyHistogram:
+    def __init__(self, sub_bucket_bits=7):
+        """
+        Initializes an HDR-style log-linear histogram of integer microsecond values. Values below
+        2**sub_bucket_bits are counted exactly; above that every power of two is split into
+        2**(sub_bucket_bits - 1) equal buckets, so each recorded value is kept to within
+        1 / 2**(sub_bucket_bits - 1) of its true value (under 1.6% at the default) at any magnitude.
+
+        :param sub_bucket_bits: Precision of the buckets, in bits.
+        """
+        self.sub_bucket_bits = sub_bucket_bits
+        self._sub_buckets = 1 << sub_bucket_bits
+        self._half = self._sub_buckets >> 1
+        self.counts = {}  # Bucket index to count; sparse, since latencies cluster
+        self.count = 0
+        self.total = 0
+        self.min = None
+        self.max = None
+
+    def _index(self, value):
+        if value < self._sub_buckets:
+            return value
+        shift = value.bit_length() - self.sub_bucket_bits
+        return self._sub_buckets + (shift - 1) * self._half + (value >> shift) - self._half
+
+    def _highest_equivalent(self, index):
+        """Returns the largest value that falls into the bucket."""
+        if index < self._sub_buckets:
+            return index
+        shift, offset = divmod(index - self._sub_buckets, self._half)
+        shift += 1
+        return ((offset + self._half + 1) << shift) - 1
+
+    def record(self, value):
+        value = max(int(value), 0)
+        index = self._index(value)
+        self.counts[index] = self.counts.get(index, 0) + 1
+        self.count += 1
+        self.total += value
+        if self.min is None or value < self.min:
+            self.min = value
+        if self.max is None or value > self.max:
+            self.max = value
+
+    def percentile(self, percentile):
+        """Returns the value at the given percentile (0-100), or None if nothing was recorded."""
+        if not self.count:
+            return None
+        rank = max(math.ceil(percentile / 100.0 * self.count), 1)
+        seen = 0
+        for index in sorted(self.counts):
+            seen += self.counts[index]
+            if seen >= rank:
+                return min(self._highest_equivalent(index), self.max)
+        return self.max
+
+    def summary(self):
+        if not self.count:
+            return {'count': 0}
+        return {'count': self.count,
+                'min': self.min,
+                'mean': round(self.total / self.count),
+                'p50': self.percentile(50),
+                'p90': self.percentile(90),
+                'p99': self.percentile(99),
+                'p999': self.percentile(99.9),
+                'max': self.max}
+
+class PipelineMetrics:
+    """
+    Per-event stage timestamps across the fault-to-syslog pipeline, aggregated into latency histograms.
+    Each stage's histogram holds the time from the event's previous recorded stage to that stage.
+    """
+    STAGES = ('receive', 'event_create', 'upload_request', 'sftp_close', 'extraction', 'parse', 'syslog_send')
+    TOTAL = 'total'  # From the first recorded stage to syslog_send
+    _instance = None
+    _lock = Lock()
+
+    def __new__(cls, logger=None, max_open_events=10000):
+        with cls._lock:
+            if cls._instance is None:
+                cls._instance = super(PipelineMetrics, cls).__new__(cls)
+                cls._instance.logger = logger if logger else logging.getLogger('PipelineMetrics')
+                cls._instance.max_open_events = max_open_events
+                cls._instance._timelines = OrderedDict()  # event_id to {stage: monotonic ns}
+                cls._instance._completed = OrderedDict()  # Recently finished event_ids, oldest first
+                cls._instance._histograms = {stage: LatencyHistogram() for stage in cls.STAGES + (cls.TOTAL,)}
+                cls._instance._data_lock = Lock()
+            return cls._instance
+
+    @classmethod
+    def get_instance(cls):
+        if not cls._instance:
+            cls._instance = cls()
+        return cls._instance
+
+    def mark(self, event_id, stage, timestamp_ns=None):
+        """
+        Records that event_id reached stage. Only the first mark of a stage counts, so a stage that
+        runs once per category (syslog_send) measures when the first window left.
+
+        :param event_id: The event ID, in the "ip_datetime" form used across the pipeline.
+        :param stage: One of STAGES.
+        :param timestamp_ns: time.monotonic_ns() of when the stage happened, defaulting to now.
+        """
+        if timestamp_ns is None:
+            timestamp_ns = time.monotonic_ns()
+        with self._data_lock:
+            if event_id in self._completed:
+                return  # A later category's syslog_send, or a stage replayed after the event finished
+            timeline = self._timelines.get(event_id)
+            if timeline is None:
+                timeline = self._timelines[event_id] = {}
+                while len(self._timelines) > self.max_open_events:
+                    self._timelines.popitem(last=False)  # Drop events that never finished
+            elif stage in timeline:
+                return
+            previous = None
+            for earlier in self.STAGES[:self.STAGES.index(stage)]:
+                if earlier in timeline:
+                    previous = timeline[earlier]
+            timeline[stage] = timestamp_ns
+            if previous is not None:
+                self._histograms[stage].record((timestamp_ns - previous) // 1000)
+            if stage == self.STAGES[-1]:
+                self._histograms[self.TOTAL].record((timestamp_ns - min(timeline.values())) // 1000)
+                del self._timelines[event_id]
+                self._completed[event_id] = None
+                while len(self._completed) > self.max_open_events:
+                    self._completed.popitem(last=False)
+
+    def get_timeline(self, event_id):
+        """Returns a copy of the stage timestamps recorded so far for an unfinished event."""
+        with self._data_lock:
+            return dict(self._timelines.get(event_id, {}))
+
+    def dump(self):
+        """Returns {stage: latency summary in microseconds} for every stage and the end-to-end total."""
+        with self._data_lock:
+            return {stage: histogram.summary() for stage, histogram in self._histograms.items()}
+
+    def log_summary(self, logger=None):
+        """Logs one line per stage; suitable as a SIGUSR1 handler."""
+        logger = logger if logger else self.logger
+        for stage, summary in self.dump().items():
+            if not summary['count']:
+                continue
+            logger.info(f"Pipeline latency {stage} (us): count={summary['count']} p50={summary['p50']} "
+                        f"p90={summary['p90']} p99={summary['p99']} p999={summary['p999']} max={summary['max']}")
+
+    def reset(self):
+        with self._data_lock:
+            self._timelines.clear()
+            self._completed.clear()
+            self._histograms = {stage: LatencyHistogram() for stage in self.STAGES + (self.TOTAL,)}
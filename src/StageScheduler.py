@@ -0,0 +1,162 @@
+import asyncio
+import logging
+import os
+
+class StageScheduler:
+    def __init__(self, limits=None, logger=None, coalesce=True):
+        """
+        Initializes a scheduler that caps how many requests of each pipeline stage run at once,
+        both overall and per device, so a fault storm across many PLCs cannot open an unbounded
+        number of SSH sessions, extractions or parses.
+
+        :param limits: A dictionary of stage (signal name) to {'global': n, 'per_device': m}. A missing
+                       cap means no limit.
+        :param logger: Logger instance for logging information.
+        :param coalesce: Drop a request when the same stage is already running for the same event ID.
+        """
+        self.limits = limits or {}
+        self.logger = logger if logger else logging.getLogger('StageScheduler')
+        self.coalesce = coalesce
+        self._global = {}  # stage to asyncio.Semaphore
+        self._devices = {}  # (stage, device ip) to [asyncio.Semaphore, requests holding or waiting on it]
+        self._in_flight = set()  # (stage, event_id) currently queued or running
+        self.counters = {}  # stage to {'started', 'coalesced', 'waiting', 'running'}
+        self._tasks = set()
+
+    @staticmethod
+    def request_event_id(kwargs):
+        """
+        Returns the event ID a pipeline signal refers to, from event_id, an uploaded file's path
+        ("event_id.tar.gz") or the network data dictionary, or None.
+        """
+        if kwargs.get('event_id'):
+            return kwargs['event_id']
+        if kwargs.get('path'):
+            filename = os.path.basename(kwargs['path'])
+            return filename[:-len('.tar.gz')] if filename.endswith('.tar.gz') else filename
+        data = kwargs.get('data')
+        if isinstance(data, dict) and data.get('ip'):
+            return f"{data['ip']}_{data.get('datetime')}"
+        return None
+
+    @staticmethod
+    def device_ip(event_id):
+        return event_id.split('_')[0] if event_id else None  # Assuming event_id is in the format "ip_datetime"
+
+    def wrap(self, stage, handler, blocking=False):
+        """
+        Returns a coroutine function that starts handler as a scheduled task under the stage's limits
+        and returns at once, so the caller (an AsyncEventBus worker) is never held by a busy device.
+
+        :param blocking: Run a synchronous handler in a worker thread once its slots are acquired.
+        """
+        async def scheduled(sender=None, **kwargs):
+            self.submit(stage, handler, sender, kwargs, blocking)
+        scheduled.__name__ = getattr(handler, '__name__', 'scheduled')
+        return scheduled
+
+    def submit(self, stage, handler, sender, kwargs, blocking=False):
+        """Starts run() as a task on the running loop and returns the task."""
+        task = asyncio.get_running_loop().create_task(self.run(stage, handler, sender, kwargs, blocking))
+        self._tasks.add(task)
+        task.add_done_callback(self._task_done)
+        return task
+
+    def _task_done(self, task):
+        self._tasks.discard(task)
+        if not task.cancelled() and task.exception():
+            self.logger.error(f"Scheduled handler failed: {str(task.exception())}")
+
+    async def run(self, stage, handler, sender, kwargs, blocking=False):
+        counters = self.counters.setdefault(stage, {'started': 0, 'coalesced': 0, 'waiting': 0, 'running': 0})
+        event_id = self.request_event_id(kwargs)
+        request = (stage, event_id)
+        if self.coalesce and event_id is not None:
+            if request in self._in_flight:
+                counters['coalesced'] += 1
+                self.logger.info(f"Coalesced duplicate {stage} request for event {event_id}")
+                return None
+            self._in_flight.add(request)
+        device = self._acquire_device(stage, self.device_ip(event_id))
+        global_limit = self._global_semaphore(stage)
+        counters['waiting'] += 1
+        acquired = False
+        try:
+            # Wait for the device first, so requests queued behind one busy AP hold no global slot
+            async with device[0] if device else _NO_LIMIT:
+                async with global_limit if global_limit else _NO_LIMIT:
+                    acquired = True
+                    counters['waiting'] -= 1
+                    counters['running'] += 1
+                    counters['started'] += 1
+                    try:
+                        return await self._invoke(handler, sender, kwargs, blocking)
+                    finally:
+                        counters['running'] -= 1
+        finally:
+            if not acquired:
+                counters['waiting'] -= 1  # Cancelled while queued for a slot
+            if device:
+                self._release_device(stage, self.device_ip(event_id))
+            self._in_flight.discard(request)
+
+    async def _invoke(self, handler, sender, kwargs, blocking):
+        if asyncio.iscoroutinefunction(handler):
+            return await handler(sender=sender, **kwargs)
+        if blocking:
+            result = await asyncio.to_thread(handler, sender=sender, **kwargs)
+        else:
+            result = handler(sender=sender, **kwargs)
+        if asyncio.iscoroutine(result):
+            result = await result
+        return result
+
+    def _global_semaphore(self, stage):
+        limit = self.limits.get(stage, {}).get('global')
+        if not limit:
+            return None
+        if stage not in self._global:
+            self._global[stage] = asyncio.Semaphore(limit)
+        return self._global[stage]
+
+    def _acquire_device(self, stage, ip):
+        limit = self.limits.get(stage, {}).get('per_device')
+        if not limit or ip is None:
+            return None
+        device = self._devices.get((stage, ip))
+        if device is None:
+            device = self._devices[(stage, ip)] = [asyncio.Semaphore(limit), 0]
+        device[1] += 1
+        return device
+
+    def _release_device(self, stage, ip):
+        device = self._devices.get((stage, ip))
+        if device is None:
+            return
+        device[1] -= 1
+        if not device[1]:
+            del self._devices[(stage, ip)]  # Keep the table to devices with requests in flight
+
+    def stats(self):
+        """Returns the started, coalesced, waiting and running counts for every stage."""
+        return {stage: dict(counters) for stage, counters in self.counters.items()}
+
+    async def join(self):
+        """Waits until every scheduled request, including ones scheduled meanwhile, has finished."""
+        while self._tasks:
+            await asyncio.gather(*list(self._tasks), return_exceptions=True)
+
+    async def stop(self):
+        """Cancels every queued or running request."""
+        for task in list(self._tasks):
+            task.cancel()
+        await asyncio.gather(*list(self._tasks), return_exceptions=True)
+
+class _NoLimit:
+    async def __aenter__(self):
+        return None
+
+    async def __aexit__(self, *exc):
+        return False
+
+_NO_LIMIT = _NoLimit()
@@ -0,0 +1,257 @@
+import asyncio
+import json
+import logging
+import os
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from threading import Lock
+
+_NOTHING_SPILLED = object()  # _read_spilled found no written window left to read
+
+class SyslogSendQueue:
+    POLICIES = ('drop-oldest', 'drop-newest', 'spill-to-disk')
+
+    def __init__(self, sink, logger=None, max_lines=100000, overflow_policy='drop-oldest', spill_path=None):
+        """
+        Initializes a bounded queue of log windows waiting to go out to syslog, drained by a
+        background task so producers never wait on the collector.
+
+        :param sink: Coroutine function called as sink(events, source_ip, category, event_id) for each window.
+        :param logger: Logger instance for logging information.
+        :param max_lines: Log lines held in memory before the overflow policy applies.
+        :param overflow_policy: 'drop-oldest', 'drop-newest' or 'spill-to-disk'.
+        :param spill_path: File that overflowing windows are appended to under 'spill-to-disk'. Windows
+                           left in it by an earlier run are recovered and sent before any spilled later.
+        """
+        if overflow_policy not in self.POLICIES:
+            raise ValueError(f"Unknown overflow policy {overflow_policy}, expected one of {self.POLICIES}")
+        if overflow_policy == 'spill-to-disk' and not spill_path:
+            raise ValueError("spill-to-disk requires a spill_path")
+        self.sink = sink
+        self.logger = logger if logger else logging.getLogger('SyslogSendQueue')
+        self.max_lines = max_lines
+        self.overflow_policy = overflow_policy
+        self.spill_path = spill_path
+        self._items = deque()
+        self._lines = 0
+        self._lock = Lock()
+        self._spilled_items = 0
+        self._spilled_lines = 0
+        # Spill file I/O runs on one worker thread, in submission order, never on the loop or under _lock
+        self._spill_executor = None
+        self._spill_offset = 0  # Worker thread only
+        self._spill_counts = deque()  # Worker thread only: line count of each written, unread window
+        self._loop = None
+        self._wakeup = None
+        self._drain_task = None
+        self.enqueued = 0
+        self.dropped = 0
+        self.spilled = 0
+        if overflow_policy == 'spill-to-disk':
+            self._spill_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='SyslogSpill')
+            self._recover_spill()
+
+    def _recover_spill(self):
+        """Counts the windows a previous run left in the spill file, dropping a torn final line."""
+        try:
+            with open(self.spill_path, 'rb') as spill:
+                data = spill.read()
+        except FileNotFoundError:
+            return
+        except OSError as e:
+            self.logger.error(f"Failed to read leftover syslog spill file {self.spill_path}: {str(e)}")
+            return
+        complete = data.rfind(b'\n') + 1
+        if complete < len(data):
+            self.logger.warning(f"Dropping a torn final window from syslog spill file {self.spill_path}")
+            with open(self.spill_path, 'r+b') as spill:
+                spill.truncate(complete)
+        for line in data[:complete].splitlines():
+            try:
+                count = len(json.loads(line)[0])
+            except (ValueError, IndexError, TypeError):
+                count = 0  # Counted as a window; reported and skipped when it is read back
+            self._spill_counts.append(count)
+            self._spilled_items += 1
+            self._spilled_lines += count
+        if self._spilled_items:
+            self.logger.info(f"Recovered {self._spilled_items} spilled syslog windows ({self._spilled_lines} lines) "
+                             f"from {self.spill_path}")
+
+    async def start(self):
+        """Starts the background drain task on the running loop."""
+        self._loop = asyncio.get_running_loop()
+        self._wakeup = asyncio.Event()
+        self._drain_task = self._loop.create_task(self._drain())
+
+    def put(self, events, source_ip, category, event_id=None):
+        """
+        Queues one window without blocking. Safe to call from the loop or from worker threads.
+
+        :return: False if the window was dropped by the overflow policy.
+        """
+        count = len(events)
+        with self._lock:
+            # Once anything has spilled, later windows follow it to disk to keep them in order
+            if self._spilled_items or self._lines + count > self.max_lines:
+                if not self._overflow(events, source_ip, category, event_id):
+                    return False
+            else:
+                self._items.append((events, source_ip, category, event_id))
+                self._lines += count
+            self.enqueued += count
+        self._notify()
+        return True
+
+    def _overflow(self, events, source_ip, category, event_id):
+        """Applies the overflow policy with the lock held. Returns False if the new window is dropped."""
+        count = len(events)
+        if self.overflow_policy == 'drop-newest' or (self.overflow_policy == 'drop-oldest' and count > self.max_lines):
+            self.dropped += count
+            self.logger.warning(f"Syslog queue full, dropped {count} new lines under category '{category}'")
+            return False
+        if self.overflow_policy == 'drop-oldest':
+            while self._items and self._lines + count > self.max_lines:
+                oldest = self._items.popleft()
+                self._lines -= len(oldest[0])
+                self.dropped += len(oldest[0])
+            self._items.append((events, source_ip, category, event_id))
+            self._lines += count
+            return True
+        try:
+            self._spill_executor.submit(self._write_spilled, (events, source_ip, category, event_id))
+        except RuntimeError:  # The queue has been closed
+            self.dropped += count
+            return False
+        self._spilled_items += 1
+        self._spilled_lines += count
+        self.spilled += count
+        return True
+
+    def _write_spilled(self, item):
+        """
+        Appends one window to the spill file. Runs on the spill worker thread. A window that cannot
+        be written is uncounted here, and only here; _read_spilled never sees it.
+        """
+        count = len(item[0])
+        try:
+            with open(self.spill_path, 'a', encoding='utf-8') as spill:
+                spill.write(json.dumps(list(item)) + '\n')
+        except Exception as e:
+            self.logger.error(f"Failed to spill syslog queue to {self.spill_path}: {str(e)}")
+            with self._lock:
+                self._spilled_items -= 1
+                self._spilled_lines -= count
+                self.spilled -= count
+                self.dropped += count
+            return
+        self._spill_counts.append(count)
+
+    def _read_spilled(self):
+        """
+        Reads the next spilled window, removing the file once every written window has been read.
+        Runs on the spill worker thread, so it always follows the writes submitted before it.
+
+        :return: (window, line count), with window None if it could not be read, or _NOTHING_SPILLED
+                 if every window counted for reading failed to be written.
+        """
+        if not self._spill_counts:
+            return _NOTHING_SPILLED
+        count = self._spill_counts.popleft()
+        item = None
+        try:
+            with open(self.spill_path, 'r', encoding='utf-8') as spill:
+                spill.seek(self._spill_offset)
+                line = spill.readline()
+                self._spill_offset = spill.tell()
+            item = tuple(json.loads(line))
+        except (OSError, ValueError) as e:
+            self.logger.error(f"Failed to read spilled syslog window: {str(e)}")
+        if not self._spill_counts:
+            self._spill_offset = 0
+            try:
+                os.remove(self.spill_path)
+            except OSError:
+                pass
+        return item, count
+
+    def _notify(self):
+        if self._loop is None:
+            return
+        try:
+            running = asyncio.get_running_loop()
+        except RuntimeError:
+            running = None
+        if running is self._loop:
+            self._wakeup.set()
+        else:
+            self._loop.call_soon_threadsafe(self._wakeup.set)
+
+    async def _next_item(self):
+        """Takes the next window from memory, then from the spill file, or returns None."""
+        with self._lock:
+            if self._items:
+                item = self._items.popleft()
+                self._lines -= len(item[0])
+                return item
+            if not self._spilled_items:
+                return None
+        result = await self._loop.run_in_executor(self._spill_executor, self._read_spilled)
+        if result is _NOTHING_SPILLED:
+            return None  # The failed write already uncounted its window
+        item, count = result
+        with self._lock:
+            self._spilled_items -= 1
+            self._spilled_lines -= count
+            if item is None:
+                self.dropped += count
+            return item
+
+    async def _drain(self):
+        while True:
+            item = await self._next_item()
+            if item is None:
+                self._wakeup.clear()
+                if self.depth():
+                    continue  # A producer queued between the check and the clear
+                await self._wakeup.wait()
+                continue
+            try:
+                await self.sink(*item)
+            except asyncio.CancelledError:
+                with self._lock:
+                    self.dropped += len(item[0])  # Cut off mid-send by close()
+                raise
+            except Exception as e:
+                self.logger.error(f"Syslog drain failed for category '{item[2]}': {str(e)}")
+
+    def depth(self):
+        """Returns the number of log lines waiting, in memory and on disk."""
+        return self._lines + self._spilled_lines
+
+    def stats(self):
+        return {'depth': self.depth(), 'enqueued': self.enqueued, 'dropped': self.dropped, 'spilled': self.spilled}
+
+    async def close(self, timeout=5.0):
+        """
+        Gives the drain task up to timeout seconds to empty the queue, then stops it. Windows still in
+        memory are counted as dropped; spilled windows stay on disk for the next run.
+        """
+        if self._drain_task is None:
+            return
+        deadline = self._loop.time() + timeout
+        while self.depth() and self._loop.time() < deadline:
+            await asyncio.sleep(0.05)
+        self._drain_task.cancel()
+        await asyncio.gather(self._drain_task, return_exceptions=True)
+        self._drain_task = None
+        with self._lock:
+            discarded = self._lines
+            self.dropped += discarded
+            self._items.clear()
+            self._lines = 0
+        if discarded:
+            self.logger.warning(f"Syslog queue closed with {discarded} unsent lines in memory, dropped them")
+        if self._spill_executor is not None:
+            # Finish pending spill writes; windows still on disk are recovered by the next run
+            await asyncio.to_thread(self._spill_executor.shutdown)
@@ -2,6 +2,7 @@ from pydispatch import dispatcher
 import socket
 from datetime import datetime
 from CIPEventManager import CIPEventManager
+from PipelineMetrics import PipelineMetrics
 class SyslogSender:
     _instance = None
 
@@ -32,6 +33,7 @@ class SyslogSender:
             if event.categorized_logs:
                 for category, logs in event.categorized_logs.items():
                     self.send_events(logs, source_ip, category)
+                PipelineMetrics.get_instance().mark(event_id, 'syslog_send')
             else:
                 self.logger.error(f"No categorized logs found for event ID {event_id}")
         else:
@@ -2,18 +2,23 @@ import tarfile
 import datetime
 import os
 from pydispatch import dispatcher
+from PipelineMetrics import PipelineMetrics
 
 
 class TarFileExtractor:
-    def __init__(self, logger, fs = None):
+    def __init__(self, logger, fs = None, stream_handler = None):
         """
         Initializes the TarFileExtractor with a logger.
         
         :param fs: The filesystem object to interact with files (can be set later).
         :param logger: Logger instance for logging information.
+        :param stream_handler: Optional callable(event_id, member_name, stream) returning the filtered
+                               log lines for a member. When set, members are streamed straight into it
+                               instead of being written to the filesystem.
         """
         self.fs = fs
         self.logger = logger
+        self.stream_handler = stream_handler
         self.extracted_items = []  # List to store paths of extracted files and directories
         dispatcher.connect(self.handle_file_received, signal="FileReceived", sender=dispatcher.Any)
 
@@ -22,8 +27,42 @@ class TarFileExtractor:
         self.tar_path = kwargs.get('path')
         self.unique_dir = None  # Reset or create a new directory for each file
         filename = os.path.basename(self.tar_path)
-        self.event_id = filename.split('.')[0]  # Assuming the format "event_id.tar.gz"
-        self.extract_files()
+        # Assuming the format "event_id.tar.gz"; the event ID itself contains the device IP's dots
+        self.event_id = filename[:-len('.tar.gz')] if filename.endswith('.tar.gz') else filename.split('.')[0]
+        if self.stream_handler:
+            self.stream_files()
+        else:
+            self.extract_files()
+
+    def stream_files(self):
+        """
+        Reads the tarball as a forward-only stream and hands each member's decompressed data to the
+        stream handler, so no member is ever fully buffered or written to the filesystem.
+        """
+        log_results = {}
+        try:
+            with self.fs.open(self.tar_path, mode='rb') as file_obj:
+                with tarfile.open(fileobj=file_obj, mode='r|gz') as tar:
+                    for member in tar:
+                        if not member.isfile() or member.size == 0:
+                            continue
+                        with tar.extractfile(member) as source_file:
+                            filtered_logs = self.stream_handler(self.event_id, member.name, source_file)
+                        if filtered_logs:
+                            # Key by filename without the extension, as IwEventParser does for extracted files
+                            file_key = os.path.splitext(os.path.basename(member.name))[0]
+                            log_results[file_key] = filtered_logs
+
+            self.logger.info(f"Streamed {self.tar_path} through the parser")
+
+            self.fs.remove(self.tar_path)
+            self.logger.info(f"Removed original tar file: {self.tar_path}")
+
+            PipelineMetrics.get_instance().mark(self.event_id, 'extraction')
+            dispatcher.send(signal="ExtractionCompleted", sender=self, directory=None, extracted_items=[], event_id=self.event_id, log_results=log_results)
+
+        except Exception as e:
+            self.logger.error(f"Error streaming {self.tar_path}: {str(e)}")
 
     def extract_files(self):
         if not self.unique_dir:
@@ -52,6 +91,7 @@ class TarFileExtractor:
             self.fs.remove(self.tar_path)
             self.logger.info(f"Removed original tar file: {self.tar_path}")
 
+            PipelineMetrics.get_instance().mark(self.event_id, 'extraction')
             # Emit the custom event with the directory and the list of extracted items
             dispatcher.send(signal="ExtractionCompleted", sender=self, directory=self.unique_dir, extracted_items=self.extracted_items, event_id=self.event_id)
 
@@ -8,8 +8,10 @@ import signal
 #from pydispatch.dispatch import Dispatcher
 from pydispatch import dispatcher
 from CIPEventManager import CIPEventManager  # Ensure these are correctly imported
+from CIPEventJournal import CIPEventJournal
 from CiscoDeviceManager import CiscoDeviceManager
 from CIPNetworkListener import CIPNetworkListener
+from CIPListenerPool import CIPListenerPool
 from ConfigurationLoader import ConfigLoader
 from DeviceLogger import DeviceLogger
 from VirtualFileSystem import VirtualFileSystem
@@ -17,6 +19,11 @@ from AsyncMainSFTPServer import AsyncMainSFTPServer
 from TarFileExtractor import TarFileExtractor
 from IwEventParser import IwEventParser
 from SyslogSender import SyslogSender
+from AsyncSyslogSender import AsyncSyslogSender
+from ErrorCodeMapper import ErrorCodeMapper
+from AsyncEventBus import AsyncEventBus
+from StageScheduler import StageScheduler
+from PipelineMetrics import PipelineMetrics
 
 def logger_setup(config):
     # Load the configuration settings
@@ -46,6 +53,29 @@ def setup_asyncssh_logger(config):
     # Optionally set the logging level on the logger if you want it to be different from the global level
     logger.setLevel(asyncssh_debug_level)
 
+def setup_event_bus(config, logger, stages):
+    """
+    Moves the pipeline stages off the synchronous pydispatch chain onto an AsyncEventBus.
+    Stages listed in stage_limits are handed to a StageScheduler that caps their global and
+    per-device concurrency and coalesces duplicate in-flight requests for the same event.
+
+    :param stages: A list of (signal, handler, blocking) tuples in pipeline order.
+    :return: The (bus, scheduler) pair; scheduler is None without stage_limits.
+    """
+    concurrency = config.get('event_bus_concurrency', {})
+    limits = config.get('stage_limits')
+    scheduler = StageScheduler(limits, logger) if limits else None
+    bus = AsyncEventBus(logger, queue_size=config.get('event_bus_queue_size', 0))
+    for signal_name, handler, blocking in stages:
+        wrapper = None
+        if scheduler and signal_name in limits:
+            # Handlers that keep per-call state on their instance (TarFileExtractor, IwEventParser)
+            # need a global limit of 1 here, as they do for the bus's own workers
+            wrapper = scheduler.wrap(signal_name, handler, blocking)
+        bus.add_stage(signal_name, handler, concurrency=concurrency.get(signal_name), blocking=blocking,
+                      wrapper=wrapper)
+    return bus, scheduler
+
 async def start_sftp_server(fs, logger, config):
     sftp_server = AsyncMainSFTPServer(None, None, fs, logger, config)
     server = await sftp_server.start_sftp_server()
@@ -79,8 +109,23 @@ async def main():
     }    # Initialize components
     # Setup other components as before...
     vfs = VirtualFileSystem()
+    # Per-stage latency histograms, dumped to the log on SIGUSR1
+    metrics = PipelineMetrics(main_logger, max_open_events=config.get('pipeline_metrics_max_open_events', 10000))
+    # Journal events to disk so pending correlations survive a restart
+    journal = None
+    if config.get('event_journal_dir'):
+        journal = CIPEventJournal(config['event_journal_dir'], main_logger,
+                                  fsync_interval=config.get('event_journal_fsync_interval', 0.05),
+                                  fsync_batch=config.get('event_journal_fsync_batch', 256),
+                                  compact_records=config.get('event_journal_compact_records', 10000))
     #We listen here for a CIPEvent and let event_manager handle that.
-    event_manager = CIPEventManager(main_logger)
+    event_manager = CIPEventManager(main_logger,
+                                    ttl_seconds=config.get('event_ttl_seconds'),
+                                    max_bytes=config.get('event_store_max_bytes'),
+                                    shards=config.get('event_manager_shards', 16),
+                                    journal=journal,
+                                    coalesce_window=config.get('coalesce_window_seconds', 0),
+                                    coalesce_max_age=config.get('coalesce_max_age_seconds', 300))
 
     dispatcher.connect(event_manager.handle_network_data, signal="NetworkDataReceived", sender=dispatcher.Any)
     #event_manager emits the CIP event created when it completes its work
@@ -97,6 +142,21 @@ async def main():
     # Deal with the log data which is to a) send to syslog server, b) do analysis of it for sending back to plc
     #syslog_sndr = SyslogSender(main_logger, '1.1.1.1', 514) # Configure these details
     #dispatcher.connect(syslog_sndr.handle_log_processing_completed, signal="LogProcessingCompleted", sender=dispatcher.Any)
+    # Classify the attached log windows into the error code that goes back to the plc
+    error_mapper = ErrorCodeMapper(config.get('regex_patterns'), compiled=True)
+    dispatcher.connect(error_mapper.handle_log_processing_completed, signal="LogProcessingCompleted", sender=dispatcher.Any)
+    # Optionally run each stage on its own worker queue so slow stages never block ingest
+    event_bus = None
+    stage_scheduler = None
+    if config.get('async_event_bus', False):
+        event_bus, stage_scheduler = setup_event_bus(config, main_logger, [
+            ("NetworkDataReceived", event_manager.handle_network_data, False),
+            ("NetworkDataBatchReceived", event_manager.handle_network_batch, False),
+            ("CIPEventCreated", device_manager.connect_and_retrieve_logs, False),
+            ("FileReceived", extractor.handle_file_received, True),
+            ("LogProcessingCompleted", error_mapper.handle_log_processing_completed, True),
+        ])
+        await event_bus.start()
     loop = asyncio.get_running_loop()
     # Attach signal handlers
     for signame in {'SIGINT', 'SIGTERM'}:
@@ -106,14 +166,37 @@ async def main():
             getattr(signal, signame),
             loop
         )
-
-
-    network_listener = CIPNetworkListener(host=config["CIPNetworkListener_host"], 
-                                          port=config["CIPNetworkListener_port"], 
-                                          use_udp=config["CIPNetworkListener_udp"], 
-                                          logger=main_logger,
-                                          config=config
-                                          )
+    if hasattr(signal, 'SIGUSR1'):
+        loop.add_signal_handler(signal.SIGUSR1, metrics.log_summary, main_logger)
+
+    # Batched asyncio syslog sender, enabled when a collector is configured
+    syslog_sender = None
+    if config.get('syslog_server_ip'):
+        syslog_sender = AsyncSyslogSender(main_logger, config['syslog_server_ip'],
+                                          config.get('syslog_server_port', 514),
+                                          transport=config.get('syslog_transport', 'udp'),
+                                          pool_size=config.get('syslog_pool_size', 2),
+                                          max_queue_lines=config.get('syslog_queue_max_lines', 100000),
+                                          overflow_policy=config.get('syslog_queue_overflow', 'drop-oldest'),
+                                          spill_path=config.get('syslog_queue_spill_path'))
+        await syslog_sender.start()
+
+    if config.get("CIPNetworkListener_workers", 1) > 1:
+        # Spread ingest across cores; records are relayed back to this process's event manager
+        network_listener = CIPListenerPool(host=config["CIPNetworkListener_host"],
+                                           port=config["CIPNetworkListener_port"],
+                                           use_udp=config["CIPNetworkListener_udp"],
+                                           logger=main_logger,
+                                           config=config,
+                                           workers=config["CIPNetworkListener_workers"]
+                                           )
+    else:
+        network_listener = CIPNetworkListener(host=config["CIPNetworkListener_host"], 
+                                              port=config["CIPNetworkListener_port"], 
+                                              use_udp=config["CIPNetworkListener_udp"], 
+                                              logger=main_logger,
+                                              config=config
+                                              )
     await network_listener.start_server()
 
     # Replace the old SFTP server start method with the new async one
@@ -131,8 +214,16 @@ async def main():
         sftp_server.close()
         await sftp_server.wait_closed()
         await network_listener.shutdown()
+        if syslog_sender:
+            await syslog_sender.close()
+        if event_bus:
+            await event_bus.stop()
+        if stage_scheduler:
+            await stage_scheduler.stop()
     finally:
         # Ensure all cleanup routines are called here
+        if journal:
+            journal.close()
         print("Cleanup can be done here.")
 
 
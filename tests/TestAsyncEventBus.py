@@ -0,0 +1,138 @@
+import sys
+import os
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src')))
+
+import asyncio
+import threading
+import unittest
+from unittest.mock import MagicMock
+from pydispatch import dispatcher
+from AsyncEventBus import AsyncEventBus
+from StageScheduler import StageScheduler
+
+
+class TestAsyncEventBus(unittest.TestCase):
+    def test_single_worker_keeps_order_and_handler_sequence(self):
+        calls = []
+
+        async def first(sender=None, **kwargs):
+            await asyncio.sleep(0.001 * (5 - kwargs['n']))  # Later sends finish faster if run in parallel
+            calls.append(('first', kwargs['n']))
+
+        def second(sender=None, **kwargs):
+            calls.append(('second', kwargs['n']))
+
+        async def run():
+            bus = AsyncEventBus(MagicMock())
+            bus.add_stage('BusTestOrdered', first)
+            bus.add_stage('BusTestOrdered', second)
+            await bus.start()
+            for n in range(5):
+                dispatcher.send(signal='BusTestOrdered', sender=self, n=n)
+            await bus.join()
+            stats = bus.stats()
+            await bus.stop()
+            return stats
+
+        stats = asyncio.run(run())
+        self.assertEqual(calls, [(name, n) for n in range(5) for name in ('first', 'second')])
+        self.assertEqual(stats['BusTestOrdered'], {'depth': 0, 'workers': 1, 'processed': 5, 'failed': 0})
+
+    def test_concurrency_per_signal(self):
+        running = {'now': 0, 'peak': 0}
+
+        async def handler(sender=None, **kwargs):
+            running['now'] += 1
+            running['peak'] = max(running['peak'], running['now'])
+            await asyncio.sleep(0.01)
+            running['now'] -= 1
+
+        async def run(concurrency):
+            running['peak'] = 0
+            bus = AsyncEventBus(MagicMock())
+            bus.add_stage('BusTestConcurrent', handler, concurrency=concurrency)
+            await bus.start()
+            for n in range(10):
+                bus.send('BusTestConcurrent', self, n=n)
+            await bus.join()
+            await bus.stop()
+            return running['peak']
+
+        self.assertEqual(asyncio.run(run(1)), 1)
+        self.assertEqual(asyncio.run(run(3)), 3)
+
+    def test_full_queue_drops_and_counts(self):
+        release = None
+        handled = []
+
+        async def slow(sender=None, **kwargs):
+            await release.wait()
+            handled.append(kwargs['n'])
+
+        async def run():
+            nonlocal release
+            release = asyncio.Event()
+            bus = AsyncEventBus(MagicMock(), queue_size=2)
+            bus.add_stage('BusTestBackpressure', slow)
+            await bus.start()
+            bus.send('BusTestBackpressure', self, n=0)
+            await asyncio.sleep(0)  # The worker takes the first send and waits
+            for n in range(1, 5):
+                bus.send('BusTestBackpressure', self, n=n)
+            stats = bus.stats()['BusTestBackpressure']
+            release.set()
+            await bus.join()
+            await bus.stop()
+            return stats
+
+        stats = asyncio.run(run())
+        self.assertEqual(stats['depth'], 2)
+        self.assertEqual(stats['failed'], 2)
+        self.assertEqual(handled, [0, 1, 2])
+
+    def test_blocking_handlers_run_off_the_loop_and_threads_can_send(self):
+        threads = []
+
+        def blocking(sender=None, **kwargs):
+            threads.append(threading.get_ident())
+
+        async def run():
+            bus = AsyncEventBus(MagicMock())
+            bus.add_stage('BusTestBlocking', blocking, blocking=True)
+            await bus.start()
+            await asyncio.to_thread(bus.send, 'BusTestBlocking', self, n=1)
+            await asyncio.sleep(0.01)
+            await bus.join()
+            await bus.stop()
+            return threading.get_ident()
+
+        loop_thread = asyncio.run(run())
+        self.assertEqual(len(threads), 1)
+        self.assertNotEqual(threads[0], loop_thread)
+
+    def test_wrapped_stage_disconnects_the_original_handler(self):
+        calls = []
+
+        def handler(sender=None, **kwargs):
+            calls.append(kwargs['event_id'])
+
+        async def run():
+            dispatcher.connect(handler, signal='BusTestWrapped', sender=dispatcher.Any)
+            scheduler = StageScheduler({'BusTestWrapped': {'global': 1, 'per_device': 1}}, MagicMock())
+            bus = AsyncEventBus(MagicMock())
+            bus.add_stage('BusTestWrapped', handler, wrapper=scheduler.wrap('BusTestWrapped', handler))
+            await bus.start()
+            for n in range(3):
+                dispatcher.send(signal='BusTestWrapped', sender=self, event_id=f'10.0.0.{n}_t')
+            await bus.join()
+            await scheduler.join()
+            await bus.stop()
+
+        asyncio.run(run())
+        # Once each, through the scheduler; a handler still connected directly would run twice
+        self.assertEqual(sorted(calls), ['10.0.0.0_t', '10.0.0.1_t', '10.0.0.2_t'])
+
+
+if __name__ == '__main__':
+    unittest.main()
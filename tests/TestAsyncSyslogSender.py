@@ -0,0 +1,160 @@
+import sys
+import os
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src')))
+
+import asyncio
+import re
+import unittest
+from unittest.mock import MagicMock
+from AsyncSyslogSender import AsyncSyslogSender
+
+MESSAGE = re.compile(r'^<134>\w{3} [ \d]\d \d\d:\d\d:\d\d 10\.0\.0\.1 IWPLOGPARSER event: (.*)$', re.S)
+
+
+def parse_octet_counted(data):
+    """Splits an RFC 6587 octet-counted stream into its messages."""
+    messages = []
+    while data:
+        length, _, rest = data.partition(b' ')
+        length = int(length)
+        messages.append(rest[:length].decode('utf-8'))
+        data = rest[length:]
+    return messages
+
+
+class TcpCollector:
+    def __init__(self, close_after_first_read=False):
+        self.received = bytearray()
+        self.connections = 0
+        self.close_after_first_read = close_after_first_read
+
+    async def handle(self, reader, writer):
+        self.connections += 1
+        while True:
+            data = await reader.read(65536)
+            if not data:
+                break
+            self.received += data
+            if self.close_after_first_read and self.connections == 1:
+                break
+        writer.close()
+
+    async def start(self):
+        self.server = await asyncio.start_server(self.handle, '127.0.0.1', 0)
+        return self.server.sockets[0].getsockname()[1]
+
+
+class UdpCollector(asyncio.DatagramProtocol):
+    def __init__(self):
+        self.datagrams = []
+
+    def datagram_received(self, data, addr):
+        self.datagrams.append(data)
+
+
+async def settle(condition, timeout=2.0):
+    deadline = asyncio.get_running_loop().time() + timeout
+    while not condition() and asyncio.get_running_loop().time() < deadline:
+        await asyncio.sleep(0.01)
+
+
+class TestAsyncSyslogSender(unittest.TestCase):
+    def lines(self, count):
+        return [f'line {n} rssi -{n} ünïcode' for n in range(count)]
+
+    def test_tcp_octet_counted_framing_and_batching(self):
+        async def run():
+            collector = TcpCollector()
+            port = await collector.start()
+            sender = AsyncSyslogSender(MagicMock(), '127.0.0.1', port, transport='tcp', pool_size=1, max_batch_bytes=300)
+            await sender.start()
+            lines = self.lines(20)
+            batches = list(sender._frames(lines, '10.0.0.1', 'event'))
+            self.assertGreater(len(batches), 1)
+            self.assertTrue(all(len(payload) <= 300 for payload, _ in batches))
+            self.assertEqual(await sender.send_events(lines, '10.0.0.1', 'event'), 20)
+            await settle(lambda: len(collector.received) >= sender.bytes_sent)
+            await sender.close()
+            collector.server.close()
+            messages = parse_octet_counted(bytes(collector.received))
+            self.assertEqual([MESSAGE.match(message).group(1) for message in messages], lines)
+            self.assertEqual(sender.stats(), {'sent': 20, 'dropped': 0, 'bytes_sent': len(collector.received), 'reconnects': 0})
+        asyncio.run(run())
+
+    def test_udp_coalesces_messages_into_datagrams(self):
+        async def run():
+            loop = asyncio.get_running_loop()
+            transport, collector = await loop.create_datagram_endpoint(UdpCollector, local_addr=('127.0.0.1', 0))
+            port = transport.get_extra_info('sockname')[1]
+            sender = AsyncSyslogSender(MagicMock(), '127.0.0.1', port, transport='udp', udp_max_datagram=250)
+            await sender.start()
+            lines = self.lines(12)
+            self.assertEqual(await sender.send_events(lines, '10.0.0.1', 'event'), 12)
+            await settle(lambda: sum(len(d) for d in collector.datagrams) >= sender.bytes_sent)
+            await sender.close()
+            transport.close()
+            self.assertGreater(len(collector.datagrams), 1)
+            self.assertTrue(all(len(datagram) <= 250 for datagram in collector.datagrams))
+            messages = [message for datagram in collector.datagrams for message in datagram.decode('utf-8').split('\n')]
+            self.assertEqual([MESSAGE.match(message).group(1) for message in messages], lines)
+            self.assertEqual(sender.stats()['sent'], 12)
+        asyncio.run(run())
+
+    def test_tcp_reconnects_after_the_collector_closes(self):
+        async def run():
+            collector = TcpCollector(close_after_first_read=True)
+            port = await collector.start()
+            sender = AsyncSyslogSender(MagicMock(), '127.0.0.1', port, transport='tcp', pool_size=1, reconnect_delay=0.01)
+            await sender.start()
+            await sender.send_events(['first'], '10.0.0.1', 'event')
+            await settle(lambda: collector.connections == 1 and collector.received)
+            await asyncio.sleep(0.05)  # Let the collector's close reach the sender
+            self.assertEqual(await sender.send_events(['second'], '10.0.0.1', 'event'), 1)
+            await settle(lambda: b'second' in collector.received)
+            await sender.close()
+            collector.server.close()
+            messages = parse_octet_counted(bytes(collector.received))
+            self.assertEqual([MESSAGE.match(message).group(1) for message in messages], ['first', 'second'])
+            self.assertEqual(sender.stats()['reconnects'], 1)
+            self.assertEqual(collector.connections, 2)
+        asyncio.run(run())
+
+    def test_close_waits_for_sends_submitted_from_other_threads(self):
+        async def run():
+            collector = TcpCollector()
+            port = await collector.start()
+            sender = AsyncSyslogSender(MagicMock(), '127.0.0.1', port, transport='tcp', pool_size=1)
+            await sender.start()
+            release = asyncio.Event()
+            original = sender._write_tcp
+
+            async def slow_write(payload):
+                await release.wait()
+                return await original(payload)
+
+            sender._write_tcp = slow_write
+            await asyncio.to_thread(sender._submit, sender.send_events(['from a thread'], '10.0.0.1', 'event'))
+            self.assertEqual(len(sender._futures), 1)
+            asyncio.get_running_loop().call_later(0.05, release.set)
+            await sender.close()
+            self.assertEqual(sender.stats()['sent'], 1)
+            collector.server.close()
+        asyncio.run(run())
+
+    def test_unreachable_collector_counts_drops(self):
+        async def run():
+            collector = TcpCollector()
+            port = await collector.start()
+            collector.server.close()
+            await collector.server.wait_closed()
+            sender = AsyncSyslogSender(MagicMock(), '127.0.0.1', port, transport='tcp', pool_size=1, reconnect_delay=0.01)
+            await sender.start()
+            self.assertEqual(await sender.send_events(self.lines(3), '10.0.0.1', 'event'), 0)
+            await sender.close()
+            self.assertEqual(sender.stats(), {'sent': 0, 'dropped': 3, 'bytes_sent': 0, 'reconnects': 0})
+        asyncio.run(run())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,35 @@
+import sys
+import os
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src')))
+
+import itertools
+import unittest
+from CIPDataValidation import CIPDataValidator
+
+IPS = ['10.0.0.1', '255.255.255.255', '0.0.0.0', '256.1.1.1', '01.2.3.4', '1.2.3', '::1', '10.0.0.1 ']
+DATES = ['04182024', '02292024', '02292023', '02292000', '02291900', '04312024', '12312024', '00012024',
+         '13012024', '01010000', '4182024', '1122024', '04 82024', '0418202', '04182024\n']
+ERRORS = ['E1', '', 'x' * 48, 'x' * 49, 'E-1', 'é1']
+SECRETS = ['helpme', '', 'a' * 48, 'a' * 49, 'he-lp', 'a,b']
+
+
+class TestCIPDataValidator(unittest.TestCase):
+    def test_fast_path_matches_field_checks(self):
+        for validator in (CIPDataValidator(), CIPDataValidator(allowed_chars='-_.')):
+            for parts in itertools.product(IPS, DATES, ERRORS, SECRETS):
+                message = ','.join(parts)
+                self.assertEqual(validator.validate_message(message, 'helpme'),
+                                 validator.validate_message_fields(message, 'helpme'), repr(message))
+
+    def test_validate_many_returns_a_mask(self):
+        validator = CIPDataValidator()
+        messages = ['10.0.0.1,04182024,E1,helpme', '10.0.0.1,02302024,E1,helpme', 'garbage', '::1,4182024,E1,helpme',
+                    '10.0.0.1,04182024,E1,helpmf']
+        self.assertEqual(validator.validate_many(messages, 'helpme'), [True, False, False, True, False])
+        # Without a configured secret only the format is checked
+        self.assertEqual(validator.validate_many(messages, None), [True, False, False, True, True])
+
+
+if __name__ == '__main__':
+    unittest.main()
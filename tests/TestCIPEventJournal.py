@@ -0,0 +1,68 @@
+import sys
+import os
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src')))
+
+import tempfile
+import time
+import unittest
+from unittest.mock import MagicMock
+from CIPEventJournal import CIPEventJournal
+from CIPEventManager import CIPEventManager
+
+
+class TestCIPEventJournal(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        CIPEventManager._instance = None
+
+    def tearDown(self):
+        CIPEventManager._instance = None
+        self.directory.cleanup()
+
+    def start(self, compact_records=10000, fsync_interval=60):
+        CIPEventManager._instance = None
+        journal = CIPEventJournal(self.directory.name, MagicMock(), fsync_interval=fsync_interval,
+                                  compact_records=compact_records)
+        return CIPEventManager(MagicMock(), shards=2, journal=journal), journal
+
+    def test_recovers_events_and_logs_after_restart(self):
+        manager, journal = self.start()
+        manager.add_event('10.0.0.1', '2024-04-18T06:10:00', 'fault', 'E1')
+        manager.add_event('10.0.0.2', 1713420600, 'fault', 'E2')
+        manager.add_categorized_logs_to_event('10.0.0.1_2024-04-18T06:10:00', {'event': ['line one', 'lïne two']})
+        # Producers only queue records; the journal thread writes them
+        self.assertEqual(os.path.getsize(journal._segment_path(journal.stats()['segment'])), 0)
+        journal.close()
+
+        manager, journal = self.start()
+        event = manager.get_event('10.0.0.1_2024-04-18T06:10:00')
+        self.assertEqual(event.get_categorized_logs('event'), ['line one', 'lïne two'])
+        self.assertEqual(manager.get_event('10.0.0.2_1713420600').erc, 'E2')
+        self.assertEqual(manager.stats()['events'], 2)
+        journal.close()
+
+    def test_compaction_bounds_replay_and_skips_torn_records(self):
+        manager, journal = self.start(compact_records=20, fsync_interval=0.01)
+        for second in range(60):
+            manager.add_event('10.0.0.1', f'2024-04-18T06:00:{second:02d}', 'fault', 'E1')
+        # Compaction runs on the journal thread, not in add_event
+        deadline = time.monotonic() + 2
+        while not (journal.compactions and journal.stats()['records_since_snapshot'] == 0) and time.monotonic() < deadline:
+            time.sleep(0.01)
+        self.assertGreater(journal.compactions, 0)
+        self.assertLessEqual(journal.stats()['records_since_snapshot'], 120)
+        journal.close()
+        # A crash mid-write leaves a partial final line
+        segment = journal._segment_path(journal._segments()[-1])
+        with open(segment, 'a', encoding='utf-8') as file:
+            file.write('{"op": "create", "ip": "10.0.0')
+
+        manager, journal = self.start(compact_records=20)
+        self.assertEqual(manager.stats()['events'], 60)
+        self.assertEqual(len(manager.get_events('10.0.0.1')), 60)
+        journal.close()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,116 @@
+import sys
+import os
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src')))
+
+import asyncio
+import tempfile
+import unittest
+from threading import Thread
+from unittest.mock import MagicMock
+from pydispatch import dispatcher
+from AsyncSyslogSender import AsyncSyslogSender
+from CIPEventJournal import CIPEventJournal
+from CIPEventManager import CIPEventManager
+
+
+class TestCIPEventManager(unittest.TestCase):
+    def setUp(self):
+        CIPEventManager._instance = None
+        self.manager = CIPEventManager(MagicMock(), shards=4)
+
+    def tearDown(self):
+        CIPEventManager._instance = None
+
+    def test_concurrent_producers(self):
+        ips = [f'10.0.0.{n}' for n in range(1, 9)]
+
+        def produce(ip):
+            for second in range(50):
+                event_id = f'{ip}_2024-04-18T06:00:{second:02d}'
+                self.manager.add_event(ip, f'2024-04-18T06:00:{second:02d}', 'fault', 'E1')
+                self.manager.add_event(ip, f'2024-04-18T06:00:{second:02d}', 'fault', 'E1')  # Duplicate
+                self.manager.add_categorized_logs_to_event(event_id, {'event': ['line one', 'line two']})
+
+        threads = [Thread(target=produce, args=(ip,)) for ip in ips for _ in range(2)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        stats = self.manager.stats()
+        self.assertEqual(stats['events'], len(ips) * 50)
+        self.assertEqual(stats['sources'], len(ips))
+        self.assertEqual(stats['shards'], 4)
+        for ip in ips:
+            events = self.manager.get_events(ip)
+            self.assertEqual(len(events), 50)
+            # Both producer threads for this ip attached their lines to the one stored event
+            self.assertEqual(len(events[0].get_categorized_logs('event')), 4)
+        self.assertIsNotNone(self.manager.get_event('10.0.0.3_2024-04-18T06:00:07'))
+
+    def coalescing_manager(self, **kwargs):
+        CIPEventManager._instance = None
+        manager = CIPEventManager(MagicMock(), shards=4, coalesce_window=5.0, **kwargs)
+        self.now = 0.0
+        manager.clock = lambda: self.now
+        return manager
+
+    def test_coalesces_fault_storms_per_ip_and_error_code(self):
+        manager = self.coalescing_manager()
+        created = []
+        for second in range(10):
+            self.now = second * 3.0  # Each repeat lands within the window of the previous one
+            created.append(manager.add_event('10.0.0.1', f'2024-04-18T06:00:{second:02d}', 'fault', 'E1'))
+        self.assertEqual(created, [True] + [False] * 9)
+        self.assertTrue(manager.add_event('10.0.0.1', '2024-04-18T06:01:00', 'fault', 'E2'))
+        self.assertTrue(manager.add_event('10.0.0.2', '2024-04-18T06:01:00', 'fault', 'E1'))
+        event = manager.get_event('10.0.0.1_2024-04-18T06:00:00')
+        coalesced = event.get_categorized_logs(CIPEventManager.COALESCED_CATEGORY)
+        self.assertEqual(len(coalesced), 9)
+        self.assertEqual(coalesced[0], 'Coalesced fault at 2024-04-18T06:00:01 error E1: fault')
+        self.assertEqual(manager.stats()['coalesced'], 9)
+
+        self.now += 5.0  # The window has passed since the last fault
+        self.assertTrue(manager.add_event('10.0.0.1', '2024-04-18T06:02:00', 'fault', 'E1'))
+
+    def test_coalesced_faults_are_sent_and_journaled(self):
+        with tempfile.TemporaryDirectory() as directory:
+            CIPEventManager._instance = None
+            journal = CIPEventJournal(directory, MagicMock(), fsync_interval=60)
+            manager = CIPEventManager(MagicMock(), shards=4, journal=journal, coalesce_window=5.0)
+            manager.add_event('10.0.0.1', '2024-04-18T06:00:00', 'fault', 'E1')
+            manager.add_event('10.0.0.1', '2024-04-18T06:00:01', 'fault again', 'E1')
+            sender = AsyncSyslogSender(MagicMock(), '127.0.0.1', 514, max_queue_lines=100)
+            sender.loop = asyncio.new_event_loop()
+            try:
+                sender.handle_log_processing_completed(None, event_id='10.0.0.1_2024-04-18T06:00:00')
+            finally:
+                sender.loop.close()
+            queued = {item[2]: item[0] for item in sender.queue._items}
+            self.assertEqual(queued, {'coalesced': ['Coalesced fault at 2024-04-18T06:00:01 error E1: fault again']})
+            journal.close()
+
+            CIPEventManager._instance = None
+            journal = CIPEventJournal(directory, MagicMock(), fsync_interval=60)
+            manager = CIPEventManager(MagicMock(), shards=4, journal=journal)
+            event = manager.get_event('10.0.0.1_2024-04-18T06:00:00')
+            self.assertEqual(len(event.get_categorized_logs('coalesced')), 1)
+            journal.close()
+
+    def test_faults_stop_attaching_after_processing_or_max_age(self):
+        manager = self.coalescing_manager(coalesce_max_age=10.0)
+        self.assertTrue(manager.add_event('10.0.0.1', '2024-04-18T06:00:00', 'fault', 'E1'))
+        self.now = 4.0
+        self.assertFalse(manager.add_event('10.0.0.1', '2024-04-18T06:00:04', 'fault', 'E1'))
+        self.now = 8.0
+        self.assertFalse(manager.add_event('10.0.0.1', '2024-04-18T06:00:08', 'fault', 'E1'))
+        self.now = 12.0  # Within the window of the last fault, but the event is 12 seconds old
+        self.assertTrue(manager.add_event('10.0.0.1', '2024-04-18T06:00:12', 'fault', 'E1'))
+
+        dispatcher.send(signal="LogProcessingCompleted", sender=self, event_id='10.0.0.1_2024-04-18T06:00:12')
+        self.now = 13.0
+        self.assertTrue(manager.add_event('10.0.0.1', '2024-04-18T06:00:13', 'fault', 'E1'))
+
+if __name__ == '__main__':
+    unittest.main()
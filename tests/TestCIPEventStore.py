@@ -0,0 +1,78 @@
+import sys
+import os
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src')))
+
+import time
+import unittest
+from datetime import datetime, timedelta, timezone
+from CIPEventData import CIPEventData
+from CIPEventStore import CIPEventStore
+
+
+class TestCIPEventStore(unittest.TestCase):
+    def setUp(self):
+        self.now = 0.0
+        self.clock = lambda: self.now
+
+    def event(self, ip, minute):
+        return CIPEventData(ip, f'2024-04-18T06:{minute:02d}:00', 'fault', 'E1')
+
+    def test_range_queries_per_ip(self):
+        store = CIPEventStore(clock=self.clock)
+        for minute in (30, 10, 20, 20, 40):
+            store.add(self.event('10.0.0.1', minute))
+        store.add(self.event('10.0.0.2', 15))
+        self.assertFalse(store.add(self.event('10.0.0.1', 10)))
+        events = store.range('10.0.0.1', datetime(2024, 4, 18, 6, 10), datetime(2024, 4, 18, 6, 30))
+        self.assertEqual([event.datetime.minute for event in events], [10, 20, 30])
+        recent = store.recent('10.0.0.1', 600, now=datetime(2024, 4, 18, 6, 40))
+        self.assertEqual([event.datetime.minute for event in recent], [30, 40])
+        self.assertEqual(store.range('10.0.0.9'), [])
+
+    def test_ttl_eviction_leaves_the_evicted_event_intact(self):
+        store = CIPEventStore(ttl_seconds=60, clock=self.clock)
+        old = self.event('10.0.0.1', 10)
+        store.add(old)
+        store.add_logs(old.id, {'event': ['line one', 'line two']})
+        self.assertEqual(old.categorized_logs, {'event': ['line one', 'line two']})
+        self.now = 61
+        store.add(self.event('10.0.0.1', 20))
+        self.assertNotIn(old.id, store)
+        # Readers still holding the event can finish iterating its logs
+        self.assertEqual(old.categorized_logs, {'event': ['line one', 'line two']})
+        self.assertEqual(len(store.range('10.0.0.1')), 1)
+        self.assertEqual(store.stats()['evicted'], 1)
+
+    def test_max_bytes_evicts_oldest_first(self):
+        store = CIPEventStore(max_bytes=5000, clock=self.clock)
+        events = [self.event('10.0.0.1', minute) for minute in range(3)]
+        for event in events:
+            store.add(event)
+        store.add_logs(events[2].id, {'event': ['x' * 1000] * 2})
+        self.assertEqual([event.id in store for event in events], [False, True, True])
+        self.assertLessEqual(store.total_bytes, 5000)
+        store.remove(events[1].id)
+        store.remove(events[2].id)
+        self.assertEqual(store.total_bytes, 0)
+        self.assertEqual(store.stats()['sources'], 0)
+
+    def test_recent_defaults_to_utc_now_outside_utc(self):
+        previous = os.environ.get('TZ')
+        os.environ['TZ'] = 'America/New_York'
+        time.tzset()
+        try:
+            store = CIPEventStore(clock=self.clock)
+            dts = (datetime.now(timezone.utc) - timedelta(seconds=60)).replace(tzinfo=None).isoformat()
+            store.add(CIPEventData('10.0.0.1', dts, 'fault', 'E1'))
+            self.assertEqual(len(store.recent('10.0.0.1', 300)), 1)
+        finally:
+            if previous is None:
+                del os.environ['TZ']
+            else:
+                os.environ['TZ'] = previous
+            time.tzset()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,47 @@
+import sys
+import os
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src')))
+
+import unittest
+from CIPFrameDecoder import CIPFrameDecoder
+
+
+class TestCIPFrameDecoder(unittest.TestCase):
+    def setUp(self):
+        self.frames = [CIPFrameDecoder.encode(f'10.0.0.{i}', 1713420000 + i, f'E{i}', 'helpme\x00\x00')
+                       for i in range(50)]
+        self.stream = b''.join(self.frames)
+
+    def expected(self, i):
+        return {'ip': f'10.0.0.{i}', 'datetime': 1713420000 + i, 'error_code': f'E{i}', 'shared_secret': 'helpme'}
+
+    def test_coalesced_frames_decode_from_one_read(self):
+        decoder = CIPFrameDecoder()
+        self.assertEqual(decoder.feed(self.stream), [self.expected(i) for i in range(50)])
+        self.assertEqual(decoder.pending(), 0)
+
+    def test_frames_split_at_every_byte(self):
+        for chunk in (1, 2, 7, 25, 31):
+            decoder = CIPFrameDecoder()
+            records = []
+            for start in range(0, len(self.stream), chunk):
+                records.extend(decoder.feed(self.stream[start:start + chunk]))
+            self.assertEqual(records, [self.expected(i) for i in range(50)], chunk)
+            self.assertEqual(decoder.pending(), 0)
+
+    def test_partial_tail_is_kept(self):
+        decoder = CIPFrameDecoder()
+        self.assertEqual(decoder.feed(self.frames[0] + self.frames[1][:5]), [self.expected(0)])
+        self.assertEqual(decoder.pending(), 5)
+        self.assertEqual(decoder.feed(self.frames[1][5:]), [self.expected(1)])
+
+    def test_out_of_range_length_is_rejected(self):
+        with self.assertRaises(ValueError):
+            CIPFrameDecoder(max_frame=20).feed(CIPFrameDecoder.encode('10.0.0.1', 1, 'E1', 'x' * 10))
+        with self.assertRaises(ValueError):
+            CIPFrameDecoder().feed(b'\x00\x03abc')
+
+
+if __name__ == '__main__':
+    unittest.main()
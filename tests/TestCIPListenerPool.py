@@ -0,0 +1,67 @@
+import sys
+import os
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src')))
+
+import asyncio
+import socket
+import unittest
+from unittest.mock import MagicMock
+from pydispatch import dispatcher
+from CIPListenerPool import CIPListenerPool
+
+
+class TestCIPListenerPool(unittest.IsolatedAsyncioTestCase):
+    async def test_workers_relay_records_to_the_parent(self):
+        with socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as probe:
+            probe.bind(('127.0.0.1', 0))
+            port = probe.getsockname()[1]
+        pool = CIPListenerPool('127.0.0.1', port, logger=MagicMock(), workers=2,
+                               config={'shared_secret': 'helpme', 'CIPNetworkListener_udp_batch': True})
+        records = []
+        def receiver(sender, **kwargs):
+            records.extend(kwargs['data'])
+        dispatcher.connect(receiver, signal="NetworkDataBatchReceived", sender=dispatcher.Any)
+        await pool.start_server()
+        try:
+            with socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as client:
+                # Keep sending until the spawned workers have bound the port
+                for attempt in range(200):
+                    client.sendto(f'10.0.0.{attempt % 250},04182024,E1,helpme'.encode(), ('127.0.0.1', port))
+                    await asyncio.sleep(0.05)
+                    if len(records) >= 5:
+                        break
+        finally:
+            dispatcher.disconnect(receiver, signal="NetworkDataBatchReceived", sender=dispatcher.Any)
+            await pool.shutdown()
+        self.assertGreaterEqual(len(records), 5)
+        self.assertEqual(records[0]['datetime'], '2024-04-18')
+        self.assertGreaterEqual(pool.forwarded, 1)
+
+    async def test_dead_worker_is_restarted_and_worker_logs_reach_the_parent(self):
+        logger = MagicMock()
+        pool = CIPListenerPool('127.0.0.1', 0, logger=logger, workers=1,
+                               config={'CIPNetworkListener_udp_batch': True, 'CIPListenerPool_check_interval': 0.05})
+        await pool.start_server()
+        try:
+            first = pool.processes[0]
+            for _ in range(200):
+                await asyncio.sleep(0.05)
+                if any('listening' in call.args[1] for call in logger.log.call_args_list):
+                    break
+            first.kill()
+            for _ in range(200):
+                await asyncio.sleep(0.05)
+                if pool.restarts and pool.processes[0].is_alive():
+                    break
+            self.assertEqual(pool.restarts, 1)
+            self.assertIsNot(pool.processes[0], first)
+            self.assertEqual(pool.stats()['workers'], 1)
+        finally:
+            await pool.shutdown()
+        messages = [call.args[1] for call in logger.log.call_args_list]
+        self.assertTrue(any(message.startswith('[worker 0] UDP Server listening') for message in messages))
+
+
+if __name__ == '__main__':
+    unittest.main()
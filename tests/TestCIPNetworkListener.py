@@ -5,10 +5,14 @@ sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 's
 print (sys.path)
 
 import asyncio
+import socket
 import unittest
 from unittest.mock import MagicMock, patch
 from unittest.mock import AsyncMock
-from CIPNetworkListener import CIPNetworkListener  # Import your class
+from CIPNetworkListener import CIPNetworkListener, UDPBatchReceiver, make_authenticator  # Import your class
+from CIPRateLimiter import CIPRateLimiter
+from CIPFrameDecoder import CIPFrameDecoder
+from pydispatch import dispatcher
 
 
 # sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src')))
@@ -58,5 +62,82 @@ class TestCIPNetworkListener(unittest.IsolatedAsyncioTestCase):
             mock_server.close.assert_called_once()
             self.mock_logger.info.assert_called_with("Server has been shutdown")
 
+    async def test_handle_tcp_connection_decodes_coalesced_and_split_frames(self):
+        stream = b''.join(CIPFrameDecoder.encode(f'10.0.0.{i}', 1713420000, 'E42', 'helpme') for i in range(3))
+        reader = MagicMock()
+        reader.read = AsyncMock(side_effect=[stream[:30], stream[30:], b''])
+        received = []
+        def receiver(sender, **kwargs):
+            received.append(kwargs['data'])
+        dispatcher.connect(receiver, signal="NetworkDataReceived", sender=dispatcher.Any)
+        try:
+            await self.listener.handle_tcp_connection(reader, MagicMock())
+        finally:
+            dispatcher.disconnect(receiver, signal="NetworkDataReceived", sender=dispatcher.Any)
+        self.assertEqual([message['ip'] for message in received], ['10.0.0.0', '10.0.0.1', '10.0.0.2'])
+        self.assertEqual(received[0]['error_code'], 'E42')
+
+    async def test_udp_batch_mode_drains_and_counts_per_source(self):
+        listener = CIPNetworkListener('127.0.0.1', 0, logger=self.mock_logger,
+                                      config={'shared_secret': 'helpme', 'CIPNetworkListener_udp_batch': True})
+        batches = []
+        def receiver(sender, **kwargs):
+            batches.append(kwargs['data'])
+        dispatcher.connect(receiver, signal="NetworkDataBatchReceived", sender=dispatcher.Any)
+        await listener.start_udp_server()
+        try:
+            address = listener.server.sock.getsockname()
+            with socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as client:
+                for i in range(5):
+                    client.sendto(f'10.0.0.{i},04182024,E{i},helpme'.encode(), address)
+                client.sendto(b'not,a,valid,message!', address)
+            for _ in range(50):
+                await asyncio.sleep(0.01)
+                if sum(len(batch) for batch in batches) == 5:
+                    break
+        finally:
+            dispatcher.disconnect(receiver, signal="NetworkDataBatchReceived", sender=dispatcher.Any)
+            await listener.shutdown()
+        records = [record for batch in batches for record in batch]
+        self.assertEqual([record['ip'] for record in records], [f'10.0.0.{i}' for i in range(5)])
+        self.assertEqual(records[0]['datetime'], '2024-04-18')
+        self.assertEqual(listener.server.stats(), {'127.0.0.1': {'packets': 6, 'drops': 1}})
+    def test_udp_batch_drops_by_reason_with_bounded_sources_and_logging(self):
+        now = [0.0]
+        logger = MagicMock()
+        receiver = UDPBatchReceiver(logger, config={'shared_secret': 'helpme', 'CIPNetworkListener_udp_max_sources': 2},
+                                    rate_limiter=CIPRateLimiter(rate=1, burst=1, clock=lambda: now[0]),
+                                    clock=lambda: now[0])
+        good = b'10.0.0.1,04182024,E1,helpme'
+        for second in range(3):
+            now[0] = float(second)
+            # The second datagram from 10.0.0.1 is over its rate, the one from 10.0.0.2 fails validation
+            receiver.handle_batch([(good, ('10.0.0.1', 1)), (good, ('10.0.0.1', 1)),
+                                   (b'bad,message', (f'10.0.0.{second + 2}', 1))])
+        self.assertEqual(receiver.drop_counts(), {'invalid': 3, 'rate_limited': 3, 'unauthenticated': 0})
+        # Only the two most recently seen sources are kept
+        self.assertEqual(receiver.stats(), {'10.0.0.1': {'packets': 6, 'drops': 3},
+                                            '10.0.0.4': {'packets': 1, 'drops': 1}})
+        # One warning for the first batch, then none until the interval has passed
+        self.assertEqual(logger.warning.call_count, 1)
+        self.assertIn('1 invalid, 1 rate limited', logger.warning.call_args[0][0])
+        now[0] = 12.0
+        receiver.handle_batch([(b'bad', ('10.0.0.1', 1))])
+        self.assertEqual(logger.warning.call_count, 2)
+        self.assertIn('in the last 12s: 3 invalid, 2 rate limited', logger.warning.call_args[0][0])
+
+    def test_auth_cache_is_opt_in_and_never_trusts_udp_addresses(self):
+        self.assertIsNone(make_authenticator({'shared_secret': 'helpme'}))
+        config = {'shared_secret': 'helpme', 'CIPNetworkListener_auth_cache': True}
+        self.assertEqual(make_authenticator(config).positive_ttl, 10.0)
+        receiver = UDPBatchReceiver(MagicMock(), config=config, authenticator=make_authenticator(config, use_udp=True))
+        plc = ('10.0.0.1', 1)
+        self.assertEqual(receiver.handle_batch([(b'10.0.0.1,04182024,E1,helpme', plc)]), 1)
+        # A forged datagram from the trusted address is still checked, and does not block the PLC
+        self.assertEqual(receiver.handle_batch([(b'10.0.0.1,04182024,E2,forged', plc)]), 0)
+        self.assertEqual(receiver.handle_batch([(b'10.0.0.1,04182024,E3,helpme', plc)]), 1)
+        self.assertEqual(receiver.drop_counts()['unauthenticated'], 1)
+
+
 if __name__ == '__main__':
     unittest.main()
\ No newline at end of file
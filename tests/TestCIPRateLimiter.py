@@ -0,0 +1,38 @@
+import sys
+import os
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src')))
+
+import unittest
+from CIPRateLimiter import CIPRateLimiter
+
+
+class TestCIPRateLimiter(unittest.TestCase):
+    def setUp(self):
+        self.now = 0.0
+        self.clock = lambda: self.now
+
+    def test_token_bucket_is_per_source(self):
+        limiter = CIPRateLimiter(rate=10, burst=5, clock=self.clock)
+        results = [limiter.allow('10.0.0.1') for _ in range(8)]
+        self.assertEqual(results, [True] * 5 + [False] * 3)
+        # A flooding source does not use up anyone else's tokens
+        self.assertTrue(limiter.allow('10.0.0.2'))
+        self.now += 0.25  # Refills 2.5 tokens
+        self.assertEqual([limiter.allow('10.0.0.1') for _ in range(3)], [True, True, False])
+        self.assertEqual(limiter.stats()['10.0.0.1'], {'allowed': 7, 'rate_limited': 4, 'duplicates': 0})
+        self.assertEqual(limiter.drops('10.0.0.1'), 4)
+
+    def test_duplicates_within_the_window_are_dropped(self):
+        limiter = CIPRateLimiter(duplicate_window=1.0, clock=self.clock)
+        self.assertTrue(limiter.allow('10.0.0.1', b'10.0.0.1,04182024,E1,helpme'))
+        self.assertFalse(limiter.allow('10.0.0.1', b'10.0.0.1,04182024,E1,helpme'))
+        self.assertTrue(limiter.allow('10.0.0.1', b'10.0.0.1,04182024,E2,helpme'))
+        self.assertTrue(limiter.allow('10.0.0.2', b'10.0.0.1,04182024,E1,helpme'))
+        self.now += 1.5
+        self.assertTrue(limiter.allow('10.0.0.1', b'10.0.0.1,04182024,E1,helpme'))
+        self.assertEqual(limiter.stats()['10.0.0.1']['duplicates'], 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
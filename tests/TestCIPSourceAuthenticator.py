@@ -0,0 +1,39 @@
+import sys
+import os
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src')))
+
+import unittest
+from CIPSourceAuthenticator import CIPSourceAuthenticator
+
+
+class TestCIPSourceAuthenticator(unittest.TestCase):
+    def setUp(self):
+        self.now = 100.0
+        self.authenticator = CIPSourceAuthenticator('helpme', positive_ttl=10, negative_ttl=5,
+                                                    max_sources=2, clock=lambda: self.now)
+
+    def test_trusted_sources_skip_the_comparison_until_expiry(self):
+        self.assertTrue(self.authenticator.authenticate('10.0.0.1', 'helpme'))
+        self.assertTrue(self.authenticator.authenticate('10.0.0.1', 'anything'))
+        self.assertFalse(self.authenticator.is_blocked('10.0.0.1'))
+        self.now += 11
+        self.assertFalse(self.authenticator.authenticate('10.0.0.1', 'anything'))
+        self.assertEqual(self.authenticator.counters['trusted_hits'], 1)
+
+    def test_bad_secret_blocks_an_untrusted_source(self):
+        self.assertFalse(self.authenticator.authenticate('10.0.0.9', 'guess'))
+        self.assertTrue(self.authenticator.is_blocked('10.0.0.9'))
+        self.now += 6
+        self.assertFalse(self.authenticator.is_blocked('10.0.0.9'))
+        self.assertTrue(self.authenticator.authenticate('10.0.0.9', 'helpme'))
+
+    def test_sources_are_bounded(self):
+        for source in ('10.0.0.1', '10.0.0.2', '10.0.0.3'):
+            self.authenticator.authenticate(source, 'helpme')
+        self.assertEqual(self.authenticator.stats()['sources'], 2)
+        self.assertFalse(self.authenticator.authenticate('10.0.0.1', 'anything'))
+
+
+if __name__ == '__main__':
+    unittest.main()
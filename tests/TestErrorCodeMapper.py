@@ -0,0 +1,100 @@
+import sys
+import os
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src')))
+
+import unittest
+from ErrorCodeMapper import ErrorCodeMapper, _split_literal
+
+ERROR_MAP = {
+    'LOW_RSSI': r'DOT11_UPLINK_EV: parent_rssi: (-\d+), configured low rssi: (-\d+)',
+    'ROUTED': r'IP: tableid=0, s=(\d+\.\d+\.\d+\.\d+) \(local\)',
+    'ROAM': r'Aux roam switch radio role',
+    'ASSOC': r'Associated To AP (?P<ap>\S+)',
+    'ANY_RSSI': r'rssi -?\d+',
+}
+
+LOG_LINES = [
+    '[04/18/2024 06:00:00.000001] DOT11_UPLINK_EV: parent_rssi: -81, configured low rssi: -70 serving 1 scanning 2',
+    '[04/18/2024 06:00:00.000002] IP: tableid=0, s=10.1.2.1 (local), d=10.1.2.3 (Vlan5), routed via FIB',
+    '[04/18/2024 06:00:00.000003] rssi -60 then Aux roam switch radio role: from SCANNING to SERVING',
+    '[04/18/2024 06:00:00.000004] Associated To AP 00:11:22 on radio 1 rssi -55',
+    '[04/18/2024 06:00:00.000005] MPLS-WIRELESS: link metric update',
+    '',
+]
+
+
+class TestErrorCodeMapper(unittest.TestCase):
+    def test_compiled_mode_keeps_first_match_priority(self):
+        sequential = ErrorCodeMapper(ERROR_MAP)
+        compiled = ErrorCodeMapper(ERROR_MAP, compiled=True)
+        self.assertTrue(compiled._get_combined())
+        for line in LOG_LINES:
+            self.assertEqual(compiled.find_error_code(line), sequential.find_error_code(line), line)
+        # The leftmost match is ANY_RSSI but ROAM is listed first
+        self.assertEqual(compiled.find_error_code(LOG_LINES[2]), 'ROAM')
+
+    def test_compiled_mode_falls_back_for_uncombinable_patterns(self):
+        mapper = ErrorCodeMapper({'REPEAT': r'(\w+) \1', 'ROAM': r'roam'}, compiled=True)
+        self.assertFalse(mapper._get_combined())
+        self.assertEqual(mapper.find_error_code('fault fault'), 'REPEAT')
+        self.assertEqual(mapper.find_error_code('roam'), 'ROAM')
+
+    def test_adding_a_code_rebuilds_the_combined_pattern(self):
+        mapper = ErrorCodeMapper({'ROAM': r'Aux roam'}, compiled=True)
+        self.assertIsNone(mapper.find_error_code(LOG_LINES[4]))
+        mapper.add_error_code('MPLS', r'MPLS-WIRELESS')
+        self.assertEqual(mapper.find_error_code(LOG_LINES[4]), 'MPLS')
+
+    def test_classify_logs_matches_per_line_lookup(self):
+        mapper = ErrorCodeMapper(dict(ERROR_MAP, END=r'FIB$', SPAN=r'link metric update\s+\[04'), compiled=True)
+        categorized_logs = {'event': LOG_LINES * 3, 'radio': LOG_LINES[::-1], 'empty': []}
+        result = mapper.classify_logs(categorized_logs)
+
+        expected_counts = {}
+        for category, lines in categorized_logs.items():
+            counts = expected_counts.setdefault(category, {})
+            for line in lines:
+                code = mapper.find_error_code(line)
+                if code:
+                    counts[code] = counts.get(code, 0) + 1
+        self.assertEqual(result['category_counts'], expected_counts)
+        self.assertEqual(result['category_counts']['event']['ROAM'], 3)
+        self.assertNotIn('SPAN', result['category_counts']['event'])
+        self.assertEqual(result['first_matches']['ROUTED'], LOG_LINES[1])
+        self.assertEqual(result['error_code'], 'LOW_RSSI')
+
+    def test_classify_logs_keeps_lookaround_and_whitespace_within_a_line(self):
+        patterns = {'E1': r'radio reset(?=\s*failed)', 'E2': r'link down(?!\s*recovered)', 'E4': r'timeout\s+\d+'}
+        lines = ['radio reset', 'failed to join', 'link down', 'recovered ok', 'timeout', '5 retries', 'timeout 7']
+        for extra in ({}, {'E3': r'(?<!no )carrier\s+lost'}):
+            mapper = ErrorCodeMapper(dict(patterns, **extra), compiled=True)
+            expected = {}
+            for line in lines:
+                code = mapper.find_error_code(line)
+                if code:
+                    expected[code] = expected.get(code, 0) + 1
+            self.assertEqual(expected, {'E2': 1, 'E4': 1})
+            result = mapper.classify_logs({'event': lines})
+            self.assertEqual(result['category_counts'], {'event': expected})
+            self.assertEqual(result['first_matches'], {'E2': 'link down', 'E4': 'timeout 7'})
+
+    def test_bulk_hits_are_rechecked_per_line(self):
+        mapper = ErrorCodeMapper({'E5': r'reset[^,]*done', 'E6': r'fault'}, compiled=True)
+        self.assertIsNotNone(mapper._get_combined()[5])
+        lines = ['reset started', 'done fault', 'reset then done']
+        result = mapper.classify_logs({'event': lines})
+        self.assertEqual(result['category_counts'], {'event': {'E6': 1, 'E5': 1}})
+
+    def test_split_literal(self):
+        self.assertEqual(_split_literal(r'IP: tableid=0, s=(\d+)'), ('IP: tableid=0, s=', r'(\d+)'))
+        self.assertEqual(_split_literal(r'Aux\.roam\.? switch'), ('Aux.roam', r'\.? switch'))
+        self.assertEqual(_split_literal(r'rssi -?\d+'), ('rssi ', r'-?\d+'))
+        self.assertEqual(_split_literal(r'abc+d'), ('ab', 'c+d'))
+        self.assertEqual(_split_literal(r'^roam'), ('', '^roam'))
+        self.assertEqual(_split_literal(r'foo|bar'), ('', 'foo|bar'))
+        self.assertEqual(_split_literal(r'(?i)roam'), ('', '(?i)roam'))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,163 @@
+import sys
+import os
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src')))
+
+import io
+import tarfile
+import unittest
+from datetime import datetime, timedelta
+from unittest.mock import MagicMock
+from fs.memoryfs import MemoryFS
+from pydispatch import dispatcher
+from IwEventParser import IwEventParser, parse_iw_timestamp_us
+from LogIndexCache import LogIndexCache
+from TarFileExtractor import TarFileExtractor
+
+
+def build_log(start, count, step_ms=250):
+    """Builds an IW9165-style event log with a continuation line every tenth entry."""
+    lines = []
+    for i in range(count):
+        stamp = (start + timedelta(milliseconds=i * step_ms)).strftime("%m/%d/%Y %H:%M:%S.%f")
+        marker = '*' if i % 3 == 0 else ''
+        lines.append(f"[{marker}{stamp}] event {i}: DOT11_UPLINK_EV parent_rssi -{40 + i % 30}\n")
+        if i % 10 == 0:
+            lines.append(f"    continuation of event {i}\n")
+    return ''.join(lines)
+
+
+class TestIwEventParser(unittest.TestCase):
+    def setUp(self):
+        self.fs = MemoryFS()
+        self.start = datetime(2024, 4, 18, 12, 0, 0)
+        self.fs.writetext('/event.log', build_log(self.start, 2000))
+        self.mock_logger = MagicMock()
+
+    def make_parser(self, **kwargs):
+        parser = IwEventParser(self.fs, self.mock_logger, **kwargs)
+        parser.set_filename('/event.log')
+        return parser
+
+    def test_seek_mode_matches_linear_scan(self):
+        linear = self.make_parser()
+        seek = self.make_parser(seek_mode=True)
+        for offset_seconds in (0, 1.5, 250, 499.9, 600):
+            base = (self.start + timedelta(seconds=offset_seconds)).strftime("%m/%d/%Y %H:%M:%S.%f")
+            expected = linear.filter_events_by_time_window(base, 2)
+            self.assertEqual(seek.filter_events_by_time_window(base, 2), expected)
+
+    def test_window_bounds_are_inclusive(self):
+        parser = self.make_parser(seek_mode=True)
+        base = (self.start + timedelta(seconds=100)).strftime("%m/%d/%Y %H:%M:%S.%f")
+        events = parser.filter_events_by_time_window(base, 1)
+        self.assertEqual(len(events), 9)
+        self.assertIn('event 396:', events[0])
+        self.assertIn('event 404:', events[-1])
+
+    def test_index_cache_matches_linear_scan_and_is_reused(self):
+        linear = self.make_parser()
+        cache = LogIndexCache(max_entries=2, stride=16)
+        indexed = self.make_parser(index_cache=cache)
+        for offset_seconds in (0, 120, 499.9):
+            base = (self.start + timedelta(seconds=offset_seconds)).strftime("%m/%d/%Y %H:%M:%S.%f")
+            self.assertEqual(indexed.filter_events_by_time_window(base, 2), linear.filter_events_by_time_window(base, 2))
+        self.assertEqual((cache.misses, cache.hits), (1, 2))
+
+    def test_index_cache_rebuilds_when_only_the_middle_differs(self):
+        cache = LogIndexCache(stride=16, fingerprint_bytes=1024)
+        self.fs.writetext('/event.log', build_log(self.start, 2000))
+        base = (self.start + timedelta(seconds=175)).strftime("%m/%d/%Y %H:%M:%S.%f")
+        self.make_parser(index_cache=cache).filter_events_by_time_window(base, 2)
+        # Same size, head and tail; the lines between the two edits move by 9 bytes
+        content = build_log(self.start, 2000)
+        content = content.replace('continuation of event 500\n', 'continuation of event 500 XXXXXXXX\n')
+        content = content.replace('    continuation of event 900\n', '    cont o event 900\n')
+        self.fs.writetext('/event.log', content)
+        self.assertEqual(len(cache), 1)
+        expected = self.make_parser().filter_events_by_time_window(base, 2)
+        self.assertEqual(len(expected), 17)
+        self.assertEqual(self.make_parser(index_cache=cache).filter_events_by_time_window(base, 2), expected)
+        self.mock_logger.warning.assert_called()
+
+    def test_index_cache_evicts_least_recently_used(self):
+        cache = LogIndexCache(max_entries=2)
+        for name in ('a', 'b', 'a', 'c'):
+            cache.put(cache.make_key(f'/extracts/{name}.log', 'f'), [0], [0])
+        self.assertIsNone(cache.get(cache.make_key('/extracts/b.log', 'f')))
+        self.assertIsNotNone(cache.get(cache.make_key('/other/a.log', 'f')))
+
+    def test_parallel_parse_matches_sequential(self):
+        self.fs.makedirs('/extract')
+        for i in range(4):
+            self.fs.writetext(f'/extract/log{i}.txt', build_log(self.start + timedelta(seconds=i), 400))
+        self.fs.writetext('/extract/empty.txt', '')
+        paths = [f'/extract/log{i}.txt' for i in range(4)] + ['/extract/empty.txt']
+        base = (self.start + timedelta(seconds=50)).strftime("%m/%d/%Y %H:%M:%S.%f")
+        sequential = self.make_parser()
+        expected = {}
+        for path in paths[:4]:
+            sequential.set_filename(path)
+            expected[os.path.splitext(os.path.basename(path))[0]] = sequential.filter_events_by_time_window(base, 2)
+        for executor in ('thread', 'process'):
+            parser = self.make_parser(parse_workers=3, parse_executor=executor)
+            try:
+                self.assertEqual(parser._filter_files_parallel(paths, base, 2), expected)
+            finally:
+                parser.shutdown()
+
+    def test_streaming_extraction_matches_file_filter(self):
+        content = build_log(self.start, 2000).encode('utf-8')
+        buffer = io.BytesIO()
+        with tarfile.open(fileobj=buffer, mode='w:gz') as tar:
+            info = tarfile.TarInfo('logs/event.log')
+            info.size = len(content)
+            tar.addfile(info, io.BytesIO(content))
+        self.fs.writebytes('/10.0.0.1_event.tar.gz', buffer.getvalue())
+
+        parser = self.make_parser()
+        parser._base_timestamp = lambda event_id: (self.start + timedelta(seconds=30)).strftime("%m/%d/%Y %H:%M:%S.%f")
+        extractor = TarFileExtractor(self.mock_logger, self.fs, stream_handler=parser.handle_member_stream)
+        received = []
+        receiver = lambda sender, **kwargs: received.append(kwargs['log_results'])
+        dispatcher.connect(receiver, signal="ExtractionCompleted", sender=extractor)
+        extractor.handle_file_received(None, fs=self.fs, path='/10.0.0.1_event.tar.gz')
+
+        expected = parser.filter_events_by_time_window(parser._base_timestamp(None), 2)
+        self.assertTrue(expected)
+        self.assertEqual(received, [{'event': expected}])
+        self.assertFalse(self.fs.exists('/10.0.0.1_event.tar.gz'))
+        self.assertFalse(self.fs.exists('/extracts'))
+
+    def test_batch_windows_match_single_window_calls(self):
+        offsets = {'a': (100, 2), 'b': (101, 2), 'c': (103.3, 0.5), 'd': (0, 1), 'e': (900, 2)}
+        queries = [(event_id, (self.start + timedelta(seconds=offset)).strftime("%m/%d/%Y %H:%M:%S.%f"), window)
+                   for event_id, (offset, window) in offsets.items()]
+        for kwargs in ({}, {'seek_mode': True}, {'index_cache': LogIndexCache(stride=32)}):
+            parser = self.make_parser(**kwargs)
+            expected = {event_id: parser.filter_events_by_time_window(base, window) for event_id, base, window in queries}
+            self.assertEqual(parser.filter_events_by_time_windows(queries), expected)
+            self.assertEqual(parser.filter_files_by_time_windows(['/event.log'], queries)['b'], {'event': expected['b']})
+
+
+class TestParseIwTimestamp(unittest.TestCase):
+    def to_us(self, value):
+        return (value - datetime(1970, 1, 1)) // timedelta(microseconds=1)
+
+    def test_fixed_width_matches_strptime(self):
+        for value in (datetime(2024, 2, 29, 23, 59, 59, 999999), datetime(1969, 12, 31, 0, 0, 0, 1),
+                      datetime(2100, 3, 1, 7, 8, 9, 123456), datetime(2000, 2, 29)):
+            self.assertEqual(parse_iw_timestamp_us(value.strftime("%m/%d/%Y %H:%M:%S.%f")), self.to_us(value))
+
+    def test_falls_back_for_short_fractions(self):
+        self.assertEqual(parse_iw_timestamp_us('01/01/2020 12:00:00.000'), self.to_us(datetime(2020, 1, 1, 12)))
+        self.assertEqual(parse_iw_timestamp_us('1/2/2020 12:00:00.5'), self.to_us(datetime(2020, 1, 2, 12, 0, 0, 500000)))
+
+    def test_rejects_invalid_calendar_dates(self):
+        for bad in ('02/29/2023 00:00:00.000000', '13/01/2024 00:00:00.000000', '01/01/2024 24:00:00.000000'):
+            with self.assertRaises(ValueError):
+                parse_iw_timestamp_us(bad)
+
+
+if __name__ == '__main__':
+    unittest.main()
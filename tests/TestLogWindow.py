@@ -0,0 +1,71 @@
+import sys
+import os
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src')))
+
+import unittest
+from CIPEventData import CIPEventData
+from LogWindow import LogWindow
+
+
+class TestLogWindow(unittest.TestCase):
+    def test_behaves_like_a_list_of_lines(self):
+        lines = ['first', 'sécond ünïcode', '', 'fourth']
+        window = LogWindow(lines[:2])
+        window.extend(lines[2:])
+        self.assertEqual(len(window), 4)
+        self.assertEqual(list(window), lines)
+        self.assertEqual(window, lines)
+        self.assertEqual(window[1], 'sécond ünïcode')
+        self.assertEqual(window[-1], 'fourth')
+        self.assertEqual(window[1:3], lines[1:3])
+        self.assertEqual(window.text(), '\n'.join(lines))
+        with self.assertRaises(IndexError):
+            window[4]
+
+    def test_lines_with_embedded_newlines(self):
+        window = LogWindow(['a\nb', 'c'])
+        self.assertEqual(list(window), ['a\nb', 'c'])
+        self.assertEqual(window[0], 'a\nb')
+
+    def test_appends_grow_the_buffer_in_place(self):
+        window = LogWindow(['first'])
+        buffer = window._buffer
+        for n in range(1000):
+            window.append(f'line {n}')
+        # The same buffer throughout, so each append copies only its own line
+        self.assertIs(window._buffer, buffer)
+        self.assertEqual(len(window), 1001)
+        self.assertEqual(window[-1], 'line 999')
+        self.assertEqual(window.nbytes, len(window.text().encode('utf-8')) + 4 * 1001)
+
+    def test_copies_and_the_original_grow_independently(self):
+        window = LogWindow(['one', 'two'])
+        snapshot = window.copy()
+        window.append('three')
+        self.assertEqual(snapshot, ['one', 'two'])
+        self.assertEqual(snapshot.text(), 'one\ntwo')
+        snapshot.append('other')
+        self.assertEqual(snapshot, ['one', 'two', 'other'])
+        self.assertEqual(window, ['one', 'two', 'three'])
+        branch = window.copy()
+        branch.append('four')  # Appends in place, as the original has not grown since
+        window.append('five')
+        self.assertEqual(list(branch), ['one', 'two', 'three', 'four'])
+        self.assertEqual(list(window), ['one', 'two', 'three', 'five'])
+        window.clear()
+        self.assertEqual(branch[-1], 'four')
+
+    def test_event_uses_compact_fields(self):
+        event = CIPEventData('10.0.0.1', '2024-04-18T06:10:00', 'fault', 'E1')
+        self.assertFalse(hasattr(event, '__dict__'))
+        self.assertEqual(event.epoch_us, 1713420600 * 1000000)
+        self.assertEqual(CIPEventData('10.0.0.1', 1713420600, 'fault', 'E1').datetime, event.datetime)
+        event.add_categorized_log('event', 'one')
+        event.add_categorized_logs('event', ['two'])
+        self.assertEqual(event.get_categorized_logs('event'), ['one', 'two'])
+        self.assertEqual(event.get_categorized_logs('missing'), [])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,74 @@
+import sys
+import os
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src')))
+
+import random
+import unittest
+from PipelineMetrics import LatencyHistogram, PipelineMetrics
+
+
+class TestLatencyHistogram(unittest.TestCase):
+    def test_percentiles_stay_within_bucket_precision(self):
+        histogram = LatencyHistogram()
+        rng = random.Random(7)
+        values = sorted(int(rng.lognormvariate(8, 2)) for _ in range(20000))
+        for value in values:
+            histogram.record(value)
+        for percentile in (50, 90, 99, 99.9):
+            exact = values[max(int(percentile / 100.0 * len(values) + 0.999999) - 1, 0)]
+            self.assertLessEqual(abs(histogram.percentile(percentile) - exact), exact / 64 + 1, percentile)
+        self.assertEqual(histogram.percentile(100), values[-1])
+        self.assertEqual(histogram.min, values[0])
+
+    def test_small_values_are_exact(self):
+        histogram = LatencyHistogram()
+        for value in range(100):
+            histogram.record(value)
+        self.assertEqual(histogram.percentile(50), 49)
+        self.assertEqual(histogram.summary()['count'], 100)
+
+
+class TestPipelineMetrics(unittest.TestCase):
+    def setUp(self):
+        self.metrics = PipelineMetrics.get_instance()
+        self.metrics.reset()
+
+    def test_stage_latency_is_measured_from_the_previous_recorded_stage(self):
+        self.metrics.mark('10.0.0.1_x', 'receive', 1000000)
+        self.metrics.mark('10.0.0.1_x', 'event_create', 1500000)
+        # upload_request and sftp_close skipped, e.g. for a locally dropped tarball
+        self.metrics.mark('10.0.0.1_x', 'extraction', 4500000)
+        self.metrics.mark('10.0.0.1_x', 'extraction', 9000000)  # Only the first mark counts
+        self.metrics.mark('10.0.0.1_x', 'syslog_send', 5500000)
+        dump = self.metrics.dump()
+        self.assertEqual(dump['event_create']['max'], 500)
+        self.assertEqual(dump['extraction']['max'], 3000)
+        self.assertEqual(dump['syslog_send']['max'], 1000)
+        self.assertEqual(dump['total']['max'], 4500)
+        self.assertEqual(dump['parse']['count'], 0)
+        self.assertEqual(self.metrics.get_timeline('10.0.0.1_x'), {})
+
+    def test_syslog_send_per_category_counts_once(self):
+        self.metrics.mark('10.0.0.2_x', 'receive', 1000000)
+        for offset in (0, 1000000, 2000000):  # One syslog_send mark per category
+            self.metrics.mark('10.0.0.2_x', 'syslog_send', 5999000 + offset)
+        dump = self.metrics.dump()
+        self.assertEqual(dump['total']['count'], 1)
+        self.assertEqual(dump['total']['max'], 4999)
+        self.assertEqual(dump['syslog_send']['count'], 1)
+        self.assertEqual(self.metrics.get_timeline('10.0.0.2_x'), {})
+
+    def test_unfinished_events_are_bounded(self):
+        self.metrics.max_open_events, limit = 3, self.metrics.max_open_events
+        try:
+            for i in range(5):
+                self.metrics.mark(f'10.0.0.{i}_x', 'receive')
+            self.assertEqual(self.metrics.get_timeline('10.0.0.0_x'), {})
+            self.assertIn('receive', self.metrics.get_timeline('10.0.0.4_x'))
+        finally:
+            self.metrics.max_open_events = limit
+
+
+if __name__ == '__main__':
+    unittest.main()
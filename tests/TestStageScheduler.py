@@ -0,0 +1,59 @@
+import sys
+import os
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src')))
+
+import asyncio
+import unittest
+from unittest.mock import MagicMock
+from StageScheduler import StageScheduler
+
+
+class TestStageScheduler(unittest.TestCase):
+    def run_storm(self, limits, event_ids):
+        scheduler = StageScheduler(limits, MagicMock())
+        running = {'total': 0, 'peak': 0, 'per_device': {}, 'device_peak': 0, 'calls': []}
+
+        async def retrieve(sender=None, **kwargs):
+            ip = kwargs['event_id'].split('_')[0]
+            running['calls'].append(kwargs['event_id'])
+            running['total'] += 1
+            running['per_device'][ip] = running['per_device'].get(ip, 0) + 1
+            running['peak'] = max(running['peak'], running['total'])
+            running['device_peak'] = max(running['device_peak'], running['per_device'][ip])
+            await asyncio.sleep(0.01)
+            running['total'] -= 1
+            running['per_device'][ip] -= 1
+
+        async def storm():
+            handler = scheduler.wrap('CIPEventCreated', retrieve)
+            for event_id in event_ids:
+                await handler(sender=None, event_id=event_id)
+            await scheduler.join()
+
+        asyncio.run(storm())
+        return scheduler, running
+
+    def test_global_and_per_device_caps(self):
+        event_ids = [f'10.0.0.{i % 10}_2024-04-18T06:00:{i:02d}' for i in range(60)]
+        scheduler, running = self.run_storm({'CIPEventCreated': {'global': 4, 'per_device': 1}}, event_ids)
+        self.assertEqual(running['peak'], 4)
+        self.assertEqual(running['device_peak'], 1)
+        self.assertEqual(sorted(running['calls']), sorted(event_ids))
+        self.assertEqual(scheduler.stats()['CIPEventCreated'],
+                         {'started': 60, 'coalesced': 0, 'waiting': 0, 'running': 0})
+
+    def test_duplicate_in_flight_requests_are_coalesced(self):
+        event_ids = ['10.0.0.1_2024-04-18T06:00:00'] * 5 + ['10.0.0.2_2024-04-18T06:00:00']
+        scheduler, running = self.run_storm({'CIPEventCreated': {'global': 2}}, event_ids)
+        self.assertEqual(running['calls'], ['10.0.0.1_2024-04-18T06:00:00', '10.0.0.2_2024-04-18T06:00:00'])
+        self.assertEqual(scheduler.stats()['CIPEventCreated']['coalesced'], 4)
+
+    def test_request_event_id(self):
+        self.assertEqual(StageScheduler.request_event_id({'path': '/up/10.0.0.1_x.tar.gz'}), '10.0.0.1_x')
+        self.assertEqual(StageScheduler.request_event_id({'data': {'ip': '10.0.0.1', 'datetime': 5}}), '10.0.0.1_5')
+        self.assertIsNone(StageScheduler.request_event_id({'data': 'raw'}))
+
+
+if __name__ == '__main__':
+    unittest.main()
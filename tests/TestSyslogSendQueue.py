@@ -0,0 +1,105 @@
+import sys
+import os
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src')))
+
+import asyncio
+import json
+import tempfile
+import unittest
+from unittest.mock import MagicMock
+from SyslogSendQueue import SyslogSendQueue
+
+
+class TestSyslogSendQueue(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.spill_path = os.path.join(self.directory.name, 'spill.jsonl')
+        self.sent = []
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    async def sink(self, events, source_ip, category, event_id):
+        self.sent.append((list(events), category))
+
+    def run_queue(self, policy, windows, max_lines=4, spill_path=None):
+        """Queues windows before the drain starts, then drains them and returns the queue."""
+        async def run():
+            queue = SyslogSendQueue(self.sink, MagicMock(), max_lines=max_lines, overflow_policy=policy,
+                                    spill_path=spill_path)
+            results = [queue.put(lines, '10.0.0.1', category) for category, lines in windows]
+            await queue.start()
+            await queue.close(timeout=2.0)
+            return queue, results
+        return asyncio.run(run())
+
+    def windows(self):
+        return [(f'c{i}', [f'w{i} line {n}' for n in range(2)]) for i in range(4)]
+
+    def test_drop_newest(self):
+        queue, results = self.run_queue('drop-newest', self.windows())
+        self.assertEqual(results, [True, True, False, False])
+        self.assertEqual([category for _, category in self.sent], ['c0', 'c1'])
+        self.assertEqual(queue.stats()['dropped'], 4)
+
+    def test_drop_oldest(self):
+        queue, results = self.run_queue('drop-oldest', self.windows())
+        self.assertEqual(results, [True] * 4)
+        self.assertEqual([category for _, category in self.sent], ['c2', 'c3'])
+        self.assertEqual(queue.stats()['dropped'], 4)
+
+    def test_spill_keeps_order_and_removes_the_file(self):
+        queue, results = self.run_queue('spill-to-disk', self.windows(), spill_path=self.spill_path)
+        self.assertEqual(results, [True] * 4)
+        self.assertEqual(self.sent, [(lines, category) for category, lines in self.windows()])
+        self.assertEqual(queue.stats(), {'depth': 0, 'enqueued': 8, 'dropped': 0, 'spilled': 4})
+        self.assertFalse(os.path.exists(self.spill_path))
+
+    def test_spill_file_left_by_a_previous_run_is_sent_first(self):
+        with open(self.spill_path, 'w', encoding='utf-8') as spill:
+            spill.write(json.dumps([['stale one'], '10.0.0.9', 'old', None]) + '\n')
+            spill.write(json.dumps([['stale two'], '10.0.0.9', 'old', None]) + '\n')
+            spill.write('[["torn')  # A crash mid-write
+        queue, _ = self.run_queue('spill-to-disk', self.windows(), spill_path=self.spill_path)
+        self.assertEqual([lines for lines, _ in self.sent[:2]], [['stale one'], ['stale two']])
+        # The recovered backlog sends every new window through the spill file after it, in order
+        self.assertEqual(self.sent[2:], [(lines, category) for category, lines in self.windows()])
+        self.assertEqual(queue.depth(), 0)
+        self.assertFalse(os.path.exists(self.spill_path))
+
+    def test_failed_spill_write_is_uncounted_once(self):
+        async def run():
+            missing = os.path.join(self.directory.name, 'missing', 'spill.jsonl')
+            queue = SyslogSendQueue(self.sink, MagicMock(), max_lines=1, overflow_policy='spill-to-disk',
+                                    spill_path=missing)
+            await queue.start()
+            # The drain counts the window for reading before the worker fails to write it
+            self.assertTrue(queue.put(['big 1', 'big 2'], '10.0.0.1', 'big'))
+            await asyncio.sleep(0.2)
+            self.assertEqual((queue._spilled_items, queue.depth()), (0, 0))
+            # With the count back at zero a window that fits stays in memory instead of spilling
+            self.assertTrue(queue.put(['small'], '10.0.0.1', 'small'))
+            await queue.close(timeout=2.0)
+            return queue
+        queue = asyncio.run(run())
+        self.assertEqual(self.sent, [(['small'], 'small')])
+        self.assertEqual(queue.stats(), {'depth': 0, 'enqueued': 3, 'dropped': 2, 'spilled': 0})
+
+    def test_close_counts_unsent_windows_as_dropped(self):
+        async def stuck_sink(events, source_ip, category, event_id):
+            await asyncio.Event().wait()
+
+        async def run():
+            queue = SyslogSendQueue(stuck_sink, MagicMock(), max_lines=10)
+            await queue.start()
+            for category, lines in self.windows():
+                queue.put(lines, '10.0.0.1', category)
+            await queue.close(timeout=0.1)
+            return queue
+        queue = asyncio.run(run())
+        self.assertEqual(queue.stats(), {'depth': 0, 'enqueued': 8, 'dropped': 8, 'spilled': 0})
+
+
+if __name__ == '__main__':
+    unittest.main()